@@ -0,0 +1,137 @@
+import sys
+import json
+
+
+class TraceAnalyzer:
+    """
+    Turns a benchmark trace into orchestration numbers.
+
+    A trace is JSON lines of flow, step and command intervals. Commands
+    are the stubs, so their time is synthetic; everything else in a flow's
+    wall time is the framework itself. The critical path is the time at
+    least one command was running: the wall time the flow would take if
+    orchestration cost nothing, given the concurrency it actually achieved.
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self.commands = sorted(
+            (event for event in events if event["kind"] == "command"),
+            key=lambda event: event["start"]
+        )
+
+    @classmethod
+    def load(cls, path):
+        events = []
+
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    events.append(json.loads(line))
+
+        return cls(events)
+
+    # -----------------------------
+    # Interval Arithmetic
+    # -----------------------------
+    def union(self, intervals):
+        """Total time covered by at least one interval"""
+        total = 0
+        current_start = current_end = None
+
+        for start, end in sorted(intervals):
+            if current_end is None or start > current_end:
+                if current_end is not None:
+                    total += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+
+        if current_end is not None:
+            total += current_end - current_start
+
+        return total
+
+    def peak(self, intervals):
+        """Most commands running at the same moment"""
+        edges = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+        running = best = 0
+
+        for _, change in edges:
+            running += change
+            best = max(best, running)
+
+        return best
+
+    def within(self, start, end):
+        return [
+            (command["start"], command["end"])
+            for command in self.commands
+            if command["start"] >= start and command["end"] <= end
+        ]
+
+    # -----------------------------
+    # Metrics
+    # -----------------------------
+    def metrics(self, start, end):
+        intervals = self.within(start, end)
+        wall = end - start
+        busy = sum(stop - begin for begin, stop in intervals)
+        critical_path = self.union(intervals)
+
+        return {
+            "wall": wall,
+            "commands": len(intervals),
+            "command_time": busy,
+            "critical_path": critical_path,
+            "overhead": wall - critical_path,
+            "parallelism": busy / critical_path if critical_path else 0.0,
+            "peak": self.peak(intervals)
+        }
+
+    def flows(self):
+        return [event for event in self.events if event["kind"] == "flow"]
+
+    def steps(self, flow):
+        """Step metrics inside one flow, in the order they ran"""
+        steps = [
+            event for event in self.events
+            if event["kind"] == "step"
+            and event["start"] >= flow["start"] and event["end"] <= flow["end"]
+        ]
+
+        return [
+            dict(self.metrics(step["start"], step["end"]), name=step["name"], ok=step["ok"])
+            for step in sorted(steps, key=lambda step: step["start"])
+        ]
+
+    def spawn_cost(self):
+        """Median start-up cost of one stub, measured before the flows ran"""
+        samples = sorted(
+            event["seconds"] for event in self.events if event["kind"] == "calibration"
+        )
+        return samples[len(samples) // 2] if samples else 0.0
+
+    def summary(self):
+        results = {}
+
+        for flow in self.flows():
+            metrics = self.metrics(flow["start"], flow["end"])
+            steps = self.steps(flow)
+
+            # Imports, detection and bookkeeping between the recorded steps
+            metrics["outside_steps"] = metrics["wall"] - sum(step["wall"] for step in steps)
+            metrics["ok"] = flow["ok"]
+            metrics["steps"] = steps
+
+            results[flow["name"]] = metrics
+
+        return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python3 -m benchmarks.analyze_trace <trace.jsonl>")
+        sys.exit(1)
+
+    print(json.dumps(TraceAnalyzer.load(sys.argv[1]).summary(), indent=2))
@@ -0,0 +1,197 @@
+import os
+import sys
+import shutil
+import tarfile
+import subprocess
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeRoot:
+    """
+    A disposable copy of this node for the benchmarks.
+
+    Runs inside fresh mount, network and PID namespaces: / is an overlay
+    whose writes land in the work directory, /sys and /proc/sys are small
+    fake trees, and the network is loopback only. Everything a flow does,
+    removers included, disappears with the namespace; the stubbed commands
+    on PATH stand in for the real builds and daemons.
+    """
+
+    # Inside the fake root; bind-mounted from the host work directory
+    BENCH_DIR = "/var/tmp/hpcctl-bench"
+
+    STUBBED = [
+        "apt", "apt-get", "dnf", "systemctl", "make", "munge", "unmunge",
+        "mysql", "sudo", "sacctmgr", "gcc", "gfortran"
+    ]
+
+    # Same names the installers compute, pinned so nothing asks the network
+    VERSIONS = {
+        "HPC_PYTHON_VERSION": "3.12.0",
+        "HPC_GCC_VERSION": "14.2.0",
+        "HPC_OPENMPI_VERSION": "4.1.6",
+        "HPC_PMIX_VERSION": "4.2.9",
+        "HPC_HWLOC_VERSION": "2.10.0",
+        "HPC_LIBEVENT_VERSION": "2.1.12",
+        "HPC_OPENBLAS_VERSION": "0.3.28",
+        "HPC_FFTW_VERSION": "3.3.10",
+        "HPC_SLURM_VERSION": "24.11.1"
+    }
+
+    def __init__(self, work_dir):
+        self.work_dir = work_dir
+        self.upper = f"{work_dir}/upper"
+        self.work = f"{work_dir}/work"
+        self.merged = f"{work_dir}/root"
+        self.bench = f"{work_dir}/bench"
+
+    # -----------------------------
+    # Host Side
+    # -----------------------------
+    def prepare(self, durations):
+        """Creates the layers and the bench directory (stubs, durations, trace)"""
+        for path in [self.upper, self.work, self.merged, f"{self.bench}/bin", f"{self.bench}/home"]:
+            os.makedirs(path, exist_ok=True)
+
+        with open(f"{self.bench}/durations.json", "w") as f:
+            f.write(durations)
+
+        stub = f"{self.bench}/bin/stub"
+        with open(stub, "w") as f:
+            f.write(self.stub_source())
+        os.chmod(stub, 0o755)
+
+        for name in self.STUBBED:
+            os.symlink("stub", f"{self.bench}/bin/{name}")
+
+    def stub_source(self):
+        with open(os.path.join(BASE_DIR, "benchmarks", "stub_command.py")) as f:
+            return f"#!{sys.executable} -S\n" + f.read()
+
+    def command(self, argv):
+        """argv run inside new namespaces; it calls enter() itself"""
+        return ["unshare", "-m", "-n", "-p", "-f", "--propagation", "private"] + argv
+
+    def environment(self):
+        env = dict(os.environ)
+
+        env.update(self.VERSIONS)
+        env.update({
+            "HOME": f"{self.BENCH_DIR}/home",
+            "PATH": f"{self.BENCH_DIR}/bin:/usr/local/sbin:/usr/local/bin:"
+                    f"/usr/sbin:/usr/bin:/sbin:/bin:{os.environ.get('PATH', '')}",
+            "HPC_BENCH_DIR": self.BENCH_DIR,
+            "HPC_TRACE_FILE": f"{self.BENCH_DIR}/trace.jsonl",
+            "HPC_SITE": "benchmark"
+        })
+
+        return env
+
+    def discard(self):
+        # The mounts went away with the namespace; only plain files remain
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    # -----------------------------
+    # Inside The Namespaces
+    # -----------------------------
+    def mount(self, *args):
+        subprocess.run(["mount"] + list(args), check=True)
+
+    def enter(self):
+        """Builds the fake root and chroots into it"""
+        self.mount("-t", "overlay", "overlay", "-o",
+                   f"lowerdir=/,upperdir={self.upper},workdir={self.work}", self.merged)
+
+        # The overlay does not descend into other mounts; bring the code along
+        for path in [BASE_DIR, sys.prefix]:
+            if not os.path.exists(self.merged + path):
+                os.makedirs(self.merged + path, exist_ok=True)
+                self.mount("--rbind", "-o", "ro", path, self.merged + path)
+
+        os.makedirs(self.merged + self.BENCH_DIR, exist_ok=True)
+        self.mount("--bind", self.bench, self.merged + self.BENCH_DIR)
+
+        self.mount("--rbind", "/dev", f"{self.merged}/dev")
+        self.mount("-t", "proc", "proc", f"{self.merged}/proc")
+
+        for path in ["/proc/sys", "/sys", "/run", "/tmp"]:
+            self.mount("-t", "tmpfs", "tmpfs", self.merged + path)
+
+        self.seed_kernel_settings()
+
+        subprocess.run(["ip", "link", "set", "lo", "up"], check=False)
+
+        os.chroot(self.merged)
+        os.chdir(BASE_DIR)
+
+        self.seed_sources()
+
+    def seed_kernel_settings(self):
+        """The untuned defaults NodeTuner expects on a fresh node"""
+        settings = {
+            "sys/kernel/mm/transparent_hugepage/enabled": "[always] madvise never",
+            "sys/kernel/mm/transparent_hugepage/defrag": "always defer defer+madvise [madvise] never",
+            "proc/sys/kernel/numa_balancing": "1",
+            "proc/sys/vm/swappiness": "60",
+            "proc/sys/vm/zone_reclaim_mode": "0"
+        }
+
+        for cpu in range(os.cpu_count() or 1):
+            settings[f"sys/devices/system/cpu/cpu{cpu}/cpufreq/scaling_governor"] = "ondemand"
+
+        for path, value in settings.items():
+            full = os.path.join(self.merged, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "w") as f:
+                f.write(value + "\n")
+
+    # -----------------------------
+    # Source Tarballs
+    # -----------------------------
+    def seed_sources(self):
+        """Tiny stand-ins for every tarball, so no installer downloads anything"""
+        home = f"{self.BENCH_DIR}/home"
+        versions = self.VERSIONS
+
+        tarballs = [
+            (f"{home}/hpc_sources/Python-{versions['HPC_PYTHON_VERSION']}.tar.xz", "python", {}),
+            (f"{home}/hpc_sources/openmpi-{versions['HPC_OPENMPI_VERSION']}.tar.gz", "openmpi", {}),
+            (f"{home}/hpc_sources/pmix-{versions['HPC_PMIX_VERSION']}.tar.gz", "pmix", {}),
+            (f"{home}/hpc_sources/hwloc-{versions['HPC_HWLOC_VERSION']}.tar.gz", "hwloc", {}),
+            (f"{home}/hpc_sources/libevent-{versions['HPC_LIBEVENT_VERSION']}-stable.tar.gz", "libevent", {}),
+            (f"{home}/hpc_sources/OpenBLAS-{versions['HPC_OPENBLAS_VERSION']}.tar.gz", "openblas", {}),
+            (f"{home}/hpc_sources/fftw-{versions['HPC_FFTW_VERSION']}.tar.gz", "fftw", {}),
+            (f"{home}/hpc_sources/gcc-{versions['HPC_GCC_VERSION']}.tar.gz", "gcc", {
+                "contrib/download_prerequisites": self.stub_source()
+            }),
+            (f"/root/slurm-{versions['HPC_SLURM_VERSION']}.tar.bz2", "slurm", {
+                f"etc/{unit}": f"[Unit]\nDescription={unit} (benchmark stub)\n"
+                for unit in ["slurmctld.service", "slurmd.service", "slurmdbd.service"]
+            })
+        ]
+
+        staging = "/tmp/seed"
+
+        for path, package, files in tarballs:
+            name = os.path.basename(path).split(".tar")[0]
+            tree = f"{staging}/{name}"
+
+            files = dict(files, **{"configure": self.stub_source(), ".stub-package": package})
+
+            for relative, content in files.items():
+                os.makedirs(os.path.dirname(f"{tree}/{relative}"), exist_ok=True)
+                with open(f"{tree}/{relative}", "w") as f:
+                    f.write(content)
+                if content.startswith("#!"):
+                    os.chmod(f"{tree}/{relative}", 0o755)
+
+            # A real extracted tree next to the tarball would be built for real
+            shutil.rmtree(os.path.join(os.path.dirname(path), name), ignore_errors=True)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with tarfile.open(path, f"w:{path.rsplit('.', 1)[1]}") as tar:
+                tar.add(tree, arcname=name)
+
+        shutil.rmtree(staging)
@@ -0,0 +1,301 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import tempfile
+import importlib
+import subprocess
+from pathlib import Path
+
+from benchmarks.fake_root import FakeRoot
+from benchmarks.analyze_trace import TraceAnalyzer
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class BenchmarkSuite:
+    """
+    Runs the framework's real flows against stubbed commands in a fake
+    root and reports what the orchestration itself costs: per-step
+    overhead, the parallelism achieved and the critical path. Results are
+    kept in ~/hpc/.benchmarks.json and compared with earlier runs on the
+    same hardware and synthetic durations.
+    """
+
+    # name -> (module, class, method)
+    FLOWS = {
+        "setup": ("master_setup", "HPCFramework", "setup"),
+        "gcc": ("modules.install_gcc_module", "GCCInstaller", "install"),
+        "cleanup-gcc": ("cleanup.remove_gcc", "GCCRemover", "remove"),
+        "cleanup-all": ("cleanup.master_cleanup", "HPCCleanup", "cleanup"),
+        "python": ("modules.install_python_module", "PythonInstaller", "install"),
+        "pmix": ("modules.install_pmix_module", "PMIxInstaller", "install"),
+        "openmpi": ("modules.install_openmpi_module", "OpenMPIInstaller", "install"),
+        "openblas": ("modules.install_openblas_module", "OpenBLASInstaller", "install"),
+        "fftw": ("modules.install_fftw_module", "FFTWInstaller", "install"),
+        "wheelhouse": ("modules.build_wheelhouse", "WheelhouseBuilder", "install"),
+        "slurm": ("slurm.install_slurm", "SlurmInstaller", "install"),
+        "tuning": ("tuning.apply_profile", "NodeTuner", "apply"),
+        "cleanup-python": ("cleanup.remove_python_env", "PythonRemover", "remove"),
+        "cleanup-openmpi": ("cleanup.remove_openmpi", "OpenMPIRemover", "remove"),
+        "cleanup-pmix": ("cleanup.remove_pmix", "PMIxRemover", "remove"),
+        "cleanup-openblas": ("cleanup.remove_openblas", "OpenBLASRemover", "remove"),
+        "cleanup-fftw": ("cleanup.remove_fftw", "FFTWRemover", "remove"),
+        "cleanup-slurm": ("cleanup.remove_slurm", "SlurmRemover", "remove"),
+        "cleanup-tuning": ("cleanup.remove_tuning", "TuningRemover", "remove")
+    }
+
+    # Each flow finds the node the previous ones left behind
+    DEFAULT_ORDER = list(FLOWS)
+
+    HISTORY = 50
+    CALIBRATION_RUNS = 20
+
+    # Flagged when overhead grows this much over the median of earlier runs
+    REGRESSION_RATIO = 1.2
+    REGRESSION_SECONDS = 0.05
+
+    def __init__(self):
+        self.home = str(Path.home())
+        self.history_path = f"{self.home}/hpc/.benchmarks.json"
+        self.durations = self.load_durations()
+
+    # -----------------------------
+    # Configuration
+    # -----------------------------
+    def load_durations(self):
+        """benchmarks/durations.json, overridden by HPC_BENCH_DURATIONS (same format)"""
+        with open(os.path.join(BASE_DIR, "benchmarks", "durations.json")) as f:
+            durations = json.load(f)
+
+        override = os.getenv("HPC_BENCH_DURATIONS")
+        if override:
+            with open(override) as f:
+                durations.update(json.load(f))
+
+        return durations
+
+    def durations_key(self):
+        """Runs are only comparable under the same synthetic durations"""
+        config = json.dumps(
+            {"durations": self.durations, "scale": os.getenv("HPC_BENCH_SCALE", "1")},
+            sort_keys=True
+        )
+        return hashlib.sha256(config.encode()).hexdigest()[:8]
+
+    # -----------------------------
+    # Host Side
+    # -----------------------------
+    def run(self, flows):
+        unknown = [flow for flow in flows if flow not in self.FLOWS]
+        if unknown:
+            raise Exception(f"Unknown flow(s): {', '.join(unknown)}. Known: {', '.join(self.FLOWS)}")
+
+        if os.geteuid() != 0:
+            print("Benchmarks build a fake root in new namespaces. Run as root.")
+            sys.exit(1)
+
+        work_dir = tempfile.mkdtemp(prefix="hpcctl-bench-")
+        fake_root = FakeRoot(work_dir)
+        fake_root.prepare(json.dumps(self.durations))
+
+        print(f"===== HPC BENCHMARKS ({len(flows)} flows, durations {self.durations_key()}) =====")
+
+        try:
+            subprocess.run(
+                fake_root.command([sys.executable, "-m", "benchmarks.run_benchmarks",
+                                   "--inside", work_dir] + flows),
+                cwd=BASE_DIR,
+                check=True
+            )
+            results = TraceAnalyzer.load(f"{fake_root.bench}/trace.jsonl")
+        finally:
+            if os.getenv("HPC_BENCH_KEEP") == "1":
+                print(f"Kept {work_dir} (flow logs in bench/logs)")
+            else:
+                fake_root.discard()
+
+        summary = results.summary()
+        previous = self.record(summary)
+
+        self.show(summary, previous, results.spawn_cost())
+
+        return all(metrics["ok"] for metrics in summary.values())
+
+    # -----------------------------
+    # Inside The Fake Root
+    # -----------------------------
+    def run_inside(self, work_dir, flows):
+        fake_root = FakeRoot(work_dir)
+        fake_root.enter()
+
+        env = fake_root.environment()
+        log_dir = f"{FakeRoot.BENCH_DIR}/logs"
+        os.makedirs(log_dir, exist_ok=True)
+
+        self.calibrate(env)
+
+        for flow in flows:
+            start = time.time()
+
+            with open(f"{log_dir}/{flow}.log", "w") as log:
+                result = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.run_benchmarks", "--flow", flow],
+                    cwd=BASE_DIR,
+                    env=env,
+                    stdin=subprocess.DEVNULL,
+                    stdout=log,
+                    stderr=subprocess.STDOUT
+                )
+
+            end = time.time()
+            mark = "✔" if result.returncode == 0 else "✖"
+            print(f"{mark} {flow:<16} {end - start:6.2f}s")
+
+            self.append_event(env, {
+                "kind": "flow", "name": flow, "start": start, "end": end,
+                "ok": result.returncode == 0
+            })
+
+    def calibrate(self, env):
+        """What one stub costs to start, so it is not mistaken for framework overhead"""
+        stub = f"{FakeRoot.BENCH_DIR}/bin/stub"
+
+        for _ in range(self.CALIBRATION_RUNS):
+            start = time.time()
+            subprocess.run([stub], env=env, stdout=subprocess.DEVNULL)
+            elapsed = time.time() - start
+
+            self.append_event(env, {"kind": "calibration", "seconds": elapsed})
+
+    def append_event(self, env, event):
+        with open(env["HPC_TRACE_FILE"], "a") as f:
+            f.write(json.dumps(event) + "\n")
+
+    def run_flow(self, flow):
+        module_name, class_name, method = self.FLOWS[flow]
+        module = importlib.import_module(module_name)
+        getattr(getattr(module, class_name)(), method)()
+
+    # -----------------------------
+    # History
+    # -----------------------------
+    def load_history(self):
+        try:
+            with open(self.history_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def commit(self):
+        result = subprocess.run(
+            ["git", "-C", BASE_DIR, "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True
+        )
+        return result.stdout.strip() or None
+
+    def record(self, summary):
+        """Appends this run; returns the earlier runs of each flow for comparison"""
+        from common.step_timings import StepTimings
+
+        history = self.load_history()
+        key = f"{StepTimings().hardware_key()} | durations {self.durations_key()}"
+        flows = history.setdefault(key, {})
+
+        previous = {name: list(flows.get(name, [])) for name in summary}
+        commit = self.commit()
+
+        for name, metrics in summary.items():
+            if not metrics["ok"]:
+                continue
+
+            runs = flows.setdefault(name, [])
+            runs.append({
+                "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "commit": commit,
+                **{
+                    field: round(metrics[field], 4)
+                    for field in ["wall", "critical_path", "overhead", "parallelism"]
+                },
+                "commands": metrics["commands"]
+            })
+            del runs[:-self.HISTORY]
+
+        os.makedirs(os.path.dirname(self.history_path), exist_ok=True)
+        tmp_path = f"{self.history_path}.{os.getpid()}"
+
+        with open(tmp_path, "w") as f:
+            json.dump(history, f, indent=2)
+
+        os.replace(tmp_path, self.history_path)
+
+        return previous
+
+    def median(self, values):
+        ordered = sorted(values)
+        middle = len(ordered) // 2
+
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+    # -----------------------------
+    # Report
+    # -----------------------------
+    def trend(self, overhead, runs):
+        if not runs:
+            return "first run"
+
+        baseline = self.median([run["overhead"] for run in runs])
+        delta = overhead - baseline
+
+        if overhead > baseline * self.REGRESSION_RATIO and delta > self.REGRESSION_SECONDS:
+            return f"⚠ {delta * 1000:+.0f} ms vs median of {len(runs)}"
+
+        return f"{delta * 1000:+.0f} ms vs median of {len(runs)}"
+
+    def show(self, summary, previous, spawn_cost):
+        print("--------------------------------")
+        print(f"Stub start-up: {spawn_cost * 1000:.1f} ms per command (counted as overhead)")
+
+        for name, metrics in summary.items():
+            mark = "✔" if metrics["ok"] else "✖"
+
+            print("--------------------------------")
+            print(
+                f"{mark} {name}: wall {metrics['wall']:.2f}s, "
+                f"critical path {metrics['critical_path']:.2f}s, "
+                f"overhead {metrics['overhead']:.2f}s, "
+                f"parallelism {metrics['parallelism']:.2f} (peak {metrics['peak']}), "
+                f"{metrics['commands']} commands"
+            )
+
+            if metrics["ok"]:
+                print(f"  trend: {self.trend(metrics['overhead'], previous[name])}")
+
+            for step in metrics["steps"]:
+                print(
+                    f"  {step['name']:<34} {step['wall']:6.2f}s "
+                    f"overhead {step['overhead'] * 1000:7.1f} ms "
+                    f"x{step['parallelism']:.2f} ({step['commands']} cmds)"
+                )
+
+            print(f"  {'(outside steps)':<34} {metrics['outside_steps']:6.2f}s")
+
+        print("--------------------------------")
+        print(f"History: {self.history_path}")
+
+
+if __name__ == "__main__":
+    suite = BenchmarkSuite()
+    args = sys.argv[1:]
+
+    if args[:1] == ["--inside"]:
+        suite.run_inside(args[1], args[2:])
+    elif args[:1] == ["--flow"]:
+        suite.run_flow(args[1])
+    else:
+        sys.exit(0 if suite.run(args or suite.DEFAULT_ORDER) else 1)
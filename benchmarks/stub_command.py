@@ -0,0 +1,345 @@
+"""
+Stand-in for every external command the framework runs during a benchmark.
+
+The file is linked into the fake root under each command's name (make,
+apt, systemctl, ...) and copied into the seeded source tarballs as
+./configure. It sleeps for the synthetic duration configured for the
+command, does just enough for the calling flow to carry on (a configure
+remembers its prefix, make install stages stub binaries, systemctl keeps
+unit state and opens the daemon's port) and appends its interval to the
+trace. Standard library only: it runs with python -S.
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+
+
+BENCH_DIR = os.getenv("HPC_BENCH_DIR", "/var/tmp/hpcctl-bench")
+SELF = os.path.realpath(__file__)
+
+# What make install stages for each seeded source tree (.stub-package)
+BINARIES = {
+    "python": ["python3", "pip3"],
+    "openmpi": ["mpicc", "mpirun", "mpiexec"],
+    "pmix": ["pmix_info"],
+    "hwloc": ["lstopo"],
+    "gcc": ["gcc", "g++"],
+    "slurm": ["sinfo", "scontrol", "sacctmgr", "srun", "squeue", "slurmctld", "slurmd", "slurmdbd"]
+}
+
+# Libraries the installers' verify steps look for
+LIBRARIES = {
+    "openblas": ["libopenblas.so"],
+    "fftw": [
+        f"libfftw3{precision}{variant}.so"
+        for precision in ["", "f"]
+        for variant in ["", "_mpi", "_threads", "_omp"]
+    ]
+}
+
+# Daemons the readiness probes connect to once systemctl has "started" them
+PORTS = {
+    "mariadb.service": 3306,
+    "slurmctld.service": 6817,
+    "slurmd.service": 6818,
+    "slurmdbd.service": 6819
+}
+
+LISTENER = """
+import sys, socket
+server = socket.socket()
+server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+server.bind(("127.0.0.1", int(sys.argv[1])))
+server.listen(16)
+while True:
+    server.accept()[0].close()
+"""
+
+
+# -----------------------------
+# Synthetic Duration
+# -----------------------------
+def positional(args):
+    """Arguments that are not options (nor the value of -m/-p/-o/-C)"""
+    words = []
+    skip = False
+
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg in ["-p", "-o", "-C", "-u"]:
+            skip = True
+        elif not arg.startswith("-"):
+            words.append(arg)
+
+    return words
+
+
+def duration_key(name, args, durations):
+    """Most specific configured key, e.g. 'apt install' before 'apt'"""
+    words = positional(args)
+
+    if name.startswith("python") and "-m" in args:
+        words = args[args.index("-m") + 1:args.index("-m") + 3]
+
+    for count in [2, 1, 0]:
+        key = " ".join([name] + words[:count])
+        if len(words) >= count and key in durations:
+            return key
+
+    return name
+
+
+def load_durations():
+    try:
+        with open(f"{BENCH_DIR}/durations.json") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def trace(key, start):
+    event = {"kind": "command", "name": key, "start": start, "end": time.time(), "pid": os.getpid()}
+
+    with open(f"{BENCH_DIR}/trace.jsonl", "a") as f:
+        f.write(json.dumps(event) + "\n")
+
+
+# -----------------------------
+# Behaviours
+# -----------------------------
+def find_upwards(filename):
+    directory = os.getcwd()
+
+    while True:
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            with open(path) as f:
+                return f.read().strip()
+        if directory == "/":
+            return None
+        directory = os.path.dirname(directory)
+
+
+def configure(args):
+    prefix = "/usr/local"
+
+    for arg in args:
+        if arg.startswith("--prefix="):
+            prefix = arg.split("=", 1)[1]
+
+    with open(".stub-prefix", "w") as f:
+        f.write(prefix)
+
+    print(f"configure: prefix {prefix}")
+
+
+def make(args):
+    if "install" not in args:
+        print("make: nothing real to build")
+        return
+
+    options = dict(arg.split("=", 1) for arg in args if "=" in arg)
+    destdir = options.get("DESTDIR", "")
+
+    # OpenBLAS has no configure; its prefix comes with make install
+    prefix = options.get("PREFIX") or find_upwards(".stub-prefix") or "/usr/local"
+    package = find_upwards(".stub-package")
+
+    staged = destdir + prefix
+    for subdir in ["bin", "lib", "include", "share/man"]:
+        os.makedirs(f"{staged}/{subdir}", exist_ok=True)
+
+    for binary in BINARIES.get(package, []):
+        link = f"{staged}/bin/{binary}"
+        if not os.path.lexists(link):
+            os.symlink(SELF, link)
+
+    for library in LIBRARIES.get(package, []):
+        open(f"{staged}/lib/{library}", "a").close()
+
+    print(f"make install: staged {package} into {staged}")
+
+
+def python(args):
+    if args[:2] == ["-m", "venv"]:
+        venv = positional(args[2:])[0]
+        os.makedirs(f"{venv}/bin", exist_ok=True)
+        for name in ["python", "python3"]:
+            if not os.path.lexists(f"{venv}/bin/{name}"):
+                os.symlink(SELF, f"{venv}/bin/{name}")
+
+    elif args[:3] == ["-m", "pip", "wheel"]:
+        wheel_dir = args[args.index("--wheel-dir") + 1]
+        package = positional(args[3:])[-1]
+        os.makedirs(wheel_dir, exist_ok=True)
+        open(f"{wheel_dir}/{package.replace('-', '_')}-0.0-py3-none-any.whl", "w").close()
+
+    elif "-c" in args:
+        # Verification scripts print one value per line
+        print("0.0")
+        print("")
+
+
+def compile(args):
+    """The output is the stub itself; running it behaves like a check program"""
+    if "-o" in args:
+        output = args[args.index("-o") + 1]
+        if not os.path.lexists(output):
+            os.symlink(SELF, output)
+
+
+def units():
+    directory = f"{BENCH_DIR}/units"
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def unit_state(unit):
+    try:
+        with open(f"{units()}/{unit}") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return "inactive"
+
+
+def set_unit_state(unit, state):
+    with open(f"{units()}/{unit}", "w") as f:
+        f.write(state)
+
+    pid_file = f"{units()}/{unit}.pid"
+
+    if state == "active" and unit in PORTS and not os.path.exists(pid_file):
+        listener = subprocess.Popen(
+            [sys.executable, "-S", "-c", LISTENER, str(PORTS[unit])],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        with open(pid_file, "w") as f:
+            f.write(str(listener.pid))
+
+    elif state != "active" and os.path.exists(pid_file):
+        with open(pid_file) as f:
+            pid = int(f.read())
+        try:
+            os.kill(pid, 15)
+        except ProcessLookupError:
+            pass
+        os.remove(pid_file)
+
+
+def known_units():
+    installed = set()
+
+    if os.path.isdir("/etc/systemd/system"):
+        installed |= {name for name in os.listdir("/etc/systemd/system") if name.endswith(".service")}
+
+    installed |= {name for name in os.listdir(units()) if name.endswith(".service")}
+    return sorted(installed)
+
+
+def systemctl(args):
+    words = positional(args)
+    if not words:
+        return 0
+
+    action = words[0]
+    names = [name if "." in name else f"{name}.service" for name in words[1:]]
+
+    if action in ["start", "restart"]:
+        for name in names:
+            set_unit_state(name, "active")
+    elif action == "try-restart":
+        for name in names:
+            if unit_state(name) == "active":
+                set_unit_state(name, "active")
+    elif action == "stop":
+        for name in names:
+            set_unit_state(name, "inactive")
+    elif action == "is-active":
+        state = unit_state(names[0])
+        if "--quiet" not in args:
+            print(state)
+        return 0 if state == "active" else 3
+    elif action == "show":
+        blocks = []
+        for name in names:
+            state = unit_state(name)
+            blocks.append("\n".join([
+                f"Id={name}",
+                "LoadState=loaded",
+                f"ActiveState={state}",
+                f"SubState={'running' if state == 'active' else 'dead'}",
+                "Result=success"
+            ]))
+        print("\n\n".join(blocks))
+    elif action == "list-unit-files":
+        for name in known_units():
+            print(f"{name} enabled enabled")
+    elif action == "list-units":
+        for name in known_units():
+            state = unit_state(name)
+            print(f"{name} loaded {state} {'running' if state == 'active' else 'dead'} stub")
+
+    return 0
+
+
+def behave(name, args):
+    """Does what the caller relies on; returns the exit code"""
+    if "--version" in args or "-V" in args:
+        print(f"{name} (hpcctl benchmark stub) 0.0")
+    elif name == "configure":
+        configure(args)
+    elif name == "make":
+        make(args)
+    elif name.startswith("python"):
+        python(args)
+    elif name in ["gcc", "gfortran"]:
+        compile(args)
+    elif name.endswith("-check"):
+        # Throughput probes print numbers, then an error of zero
+        print("0.0 0.0 0")
+    elif name == "systemctl":
+        return systemctl(args)
+    elif name == "munge":
+        print("MUNGE:hpcctl-benchmark-stub:")
+    elif name in ["unmunge", "mysql"]:
+        sys.stdin.read()
+    elif name == "sinfo":
+        print("PARTITION AVAIL  TIMELIMIT  NODES  STATE NODELIST")
+        print("debug*       up   infinite      1   idle localhost")
+
+    return 0
+
+
+def main():
+    name = os.path.basename(sys.argv[0])
+    args = sys.argv[1:]
+
+    # sudo is transparent: the benchmark already runs as root inside the fake root
+    if name == "sudo":
+        os.execvp(args[0], args)
+
+    start = time.time()
+    durations = load_durations()
+    key = duration_key(name, args, durations)
+
+    returncode = behave(name, args)
+    sys.stdout.flush()
+
+    scale = float(os.getenv("HPC_BENCH_SCALE", "1"))
+    remaining = durations.get(key, durations.get("*", 0)) * scale - (time.time() - start)
+    if remaining > 0:
+        time.sleep(remaining)
+
+    trace(key, start)
+    sys.exit(returncode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import tarfile
+import tempfile
+import subprocess
+from pathlib import Path
+
+from system_check.detect_os import OSDetector
+from common.command_engine import CommandEngine
+from common.source_store import SourceStore
+from common.select_mirror import MirrorSelector
+
+
+class HashingReader:
+    """File wrapper that hashes exactly the bytes tarfile copies into the archive"""
+
+    def __init__(self, f):
+        self.f = f
+        self.hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.hash.update(data)
+        return data
+
+
+class BundleBuilder:
+
+    def __init__(self, output=None):
+        self.home = str(Path.home())
+        self.src_dir = f"{self.home}/hpc_sources"
+        self.output = output or f"{self.home}/hpc-bundle-{time.strftime('%Y%m%d')}.tar"
+
+        self.engine = CommandEngine("bundle")
+        self.store = SourceStore()
+        self.mirrors = MirrorSelector()
+
+        # (archive path, local path, kind, package)
+        self.entries = []
+
+    # -----------------------------
+    # Resolve Versions
+    # -----------------------------
+    def installers(self):
+        from modules.install_gcc_module import GCCInstaller
+        from modules.install_python_module import PythonInstaller
+        from modules.install_openmpi_module import OpenMPIInstaller
+        from modules.install_pmix_module import PMIxInstaller
+        from modules.install_openblas_module import OpenBLASInstaller
+        from modules.install_fftw_module import FFTWInstaller
+        from slurm.install_slurm import SlurmInstaller
+
+        return {
+            "gcc": GCCInstaller(),
+            "python": PythonInstaller(),
+            "pmix": PMIxInstaller(),
+            "openmpi": OpenMPIInstaller(),
+            "openblas": OpenBLASInstaller(),
+            "fftw": FFTWInstaller(),
+            "slurm": SlurmInstaller()
+        }
+
+    def versions(self, installers):
+        versions = {name: installer.VERSION for name, installer in installers.items()}
+
+        # PMIx builds its own hwloc and libevent; their pins travel with the bundle too
+        if "pmix" in installers:
+            versions["hwloc"] = installers["pmix"].HWLOC_VERSION
+            versions["libevent"] = installers["pmix"].LIBEVENT_VERSION
+
+        return versions
+
+    # -----------------------------
+    # Source Tarballs
+    # -----------------------------
+    def fetch(self, package, url, path):
+        if os.path.exists(path):
+            print(f"Using cached {os.path.basename(path)}")
+            return
+
+        self.mirrors.download(package, url, path)
+
+    def run(self, command, **kwargs):
+        self.engine.run(command, **kwargs)
+
+    def tarballs(self, package, installer):
+        """(package, url, tar name) for every source tarball the installer downloads"""
+        if hasattr(installer, "components"):
+            return [
+                (component["name"], component["url"], component["tar_name"])
+                for component in installer.components
+            ]
+
+        return [(package, installer.source_url(), installer.tar_name)]
+
+    def collect_sources(self, installers):
+        print("==== Collecting Source Tarballs ====")
+
+        for package, installer in installers.items():
+            for name, url, tar_name in self.tarballs(package, installer):
+                path = os.path.join(self.src_dir, tar_name)
+                self.fetch(name, url, path)
+                self.store.touch(tar_name)
+
+                self.entries.append((f"sources/{tar_name}", path, "source", name))
+
+        print("==== Collecting GCC Prerequisites ====")
+
+        gcc = installers["gcc"]
+        gcc.fetch_prerequisites()
+
+        for archive, _ in gcc.prerequisite_archives():
+            path = os.path.join(gcc.prereq_dir, archive)
+            self.entries.append((f"prerequisites/{archive}", path, "prerequisite", "gcc"))
+
+    # -----------------------------
+    # System Packages (.deb / .rpm)
+    # -----------------------------
+    def resolve_apt_closure(self, packages):
+        """Every real package the list depends on, recursively"""
+        result = subprocess.run(
+            [
+                "apt-cache", "depends", "--recurse",
+                "--no-recommends", "--no-suggests", "--no-conflicts",
+                "--no-breaks", "--no-replaces", "--no-enhances"
+            ] + packages,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+
+        # Indented lines are relations, "<...>" are virtual packages
+        return sorted({
+            line.strip() for line in result.stdout.splitlines()
+            if line and not line.startswith((" ", "<"))
+        })
+
+    def collect_packages(self, installers, pkg_manager, staging):
+        print("==== Collecting System Packages ====")
+
+        packages = sorted({
+            package
+            for installer in installers.values()
+            for package in installer.dependency_packages(pkg_manager)
+        })
+
+        if pkg_manager == "apt":
+            closure = self.resolve_apt_closure(packages)
+            print(f"Resolved {len(closure)} packages (with dependencies).")
+            self.run(["apt-get", "download"] + closure, cwd=staging)
+            kind = "deb"
+
+        elif pkg_manager == "dnf":
+            self.run([
+                "dnf", "download", "--resolve", "--alldeps",
+                "--destdir", staging
+            ] + packages)
+            kind = "rpm"
+
+        else:
+            raise Exception("Unsupported package manager.")
+
+        for item in sorted(os.listdir(staging)):
+            self.entries.append((f"packages/{item}", os.path.join(staging, item), kind, None))
+
+    # -----------------------------
+    # Wheelhouse Sources (sdists + build requirements)
+    # -----------------------------
+    def collect_wheelhouse(self, installers, staging):
+        from modules.build_wheelhouse import WheelhouseBuilder
+
+        print("==== Collecting Wheelhouse Sources ====")
+
+        builder = WheelhouseBuilder()
+        if not builder.enabled:
+            print("Wheelhouse disabled (HPC_WHEELHOUSE=0).")
+            return
+
+        # Wheels only fit the node that builds them; the sources fit every node
+        dest = os.path.join(staging, "wheelhouse")
+        os.makedirs(dest)
+        builder.download_sources(dest, installers["python"].VERSION)
+
+        for item in sorted(os.listdir(dest)):
+            self.entries.append((f"wheelhouse/{item}", os.path.join(dest, item), "wheelhouse", None))
+
+    # -----------------------------
+    # Write Indexed Archive
+    # -----------------------------
+    def write_archive(self, system_info, versions):
+        print(f"==== Writing {self.output} ====")
+
+        files = []
+        tmp_output = f"{self.output}.part"
+
+        # Sources are already compressed; a plain tar keeps members seekable
+        with tarfile.open(tmp_output, "w") as tar:
+            for arcname, path, kind, package in self.entries:
+                info = tar.gettarinfo(path, arcname)
+                info.uid = info.gid = 0
+                info.uname = info.gname = "root"
+
+                with open(path, "rb") as f:
+                    reader = HashingReader(f)
+                    tar.addfile(info, reader)
+
+                files.append({
+                    "path": arcname,
+                    "kind": kind,
+                    "package": package,
+                    "size": info.size,
+                    "sha256": reader.hash.hexdigest()
+                })
+
+            index = json.dumps({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "os_id": system_info["os_id"],
+                "os_version": system_info["os_version"],
+                "package_manager": system_info["package_manager"],
+                "versions": versions,
+                "files": files
+            }, indent=2).encode()
+
+            info = tarfile.TarInfo("index.json")
+            info.size = len(index)
+            info.mtime = int(time.time())
+            tar.addfile(info, fileobj=io.BytesIO(index))
+
+        os.replace(tmp_output, self.output)
+
+        total = sum(entry["size"] for entry in files)
+        print(f"✔ Bundle written: {self.output} ({len(files)} files, {total / 1024 ** 2:.0f} MiB)")
+
+    # -----------------------------
+    # Main Flow
+    # -----------------------------
+    def create(self):
+        print("===== CREATING OFFLINE BUNDLE =====")
+
+        system_info = OSDetector().detect()
+        installers = self.installers()
+        versions = self.versions(installers)
+
+        # Dot-prefixed, so the source store never counts or evicts it
+        os.makedirs(self.src_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".bundle-", dir=self.src_dir)
+
+        try:
+            self.collect_sources(installers)
+            self.collect_packages(installers, system_info["package_manager"], staging)
+            self.collect_wheelhouse(installers, staging)
+            self.write_archive(system_info, versions)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        print("===== BUNDLE COMPLETE =====")
+        print(f"Install on a node with: hpcctl --bundle install {self.output}")
+
+
+if __name__ == "__main__":
+    BundleBuilder(*sys.argv[1:2]).create()
@@ -0,0 +1,175 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tarfile
+import urllib.request
+from pathlib import Path
+
+from system_check.detect_os import OSDetector
+from common.command_engine import CommandEngine
+from common.source_store import SourceStore
+
+
+class BundleInstaller:
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, source):
+        """source: bundle archive path, or base URL of an unpacked bundle mirror"""
+        self.home = str(Path.home())
+        self.src_dir = f"{self.home}/hpc_sources"
+        self.prereq_dir = f"{self.src_dir}/gcc-prerequisites"
+        self.package_dir = f"{self.src_dir}/.bundle-packages"
+        self.wheelhouse_dir = f"{self.src_dir}/.wheelhouse-sources"
+
+        self.source = source
+        self.is_mirror = source.startswith(("http://", "https://"))
+        self.tar = None
+
+        self.engine = CommandEngine("bundle")
+        self.store = SourceStore()
+
+    # -----------------------------
+    # Bundle Access (archive or local mirror)
+    # -----------------------------
+    def open_member(self, name):
+        if self.is_mirror:
+            return urllib.request.urlopen(f"{self.source.rstrip('/')}/{name}")
+
+        if self.tar is None:
+            self.tar = tarfile.open(self.source)
+
+        return self.tar.extractfile(name)
+
+    def load_index(self):
+        with self.open_member("index.json") as f:
+            return json.load(f)
+
+    def extract(self, entry, dest):
+        """Copies one member to dest, verifying its checksum on the way"""
+        digest = hashlib.sha256()
+        tmp_dest = f"{dest}.part"
+
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+        with self.open_member(entry["path"]) as src, open(tmp_dest, "wb") as out:
+            while True:
+                chunk = src.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+
+        if digest.hexdigest() != entry["sha256"]:
+            os.remove(tmp_dest)
+            raise Exception(f"Checksum mismatch for {entry['path']}. Bundle is corrupt.")
+
+        os.replace(tmp_dest, dest)
+
+    # -----------------------------
+    # Platform Check
+    # -----------------------------
+    def check_platform(self, index):
+        system_info = OSDetector().detect()
+
+        if (system_info["os_id"], system_info["os_version"]) != (index["os_id"], index["os_version"]):
+            raise Exception(
+                f"Bundle was built for {index['os_id']} {index['os_version']}, "
+                f"this node runs {system_info['os_id']} {system_info['os_version']}."
+            )
+
+    # -----------------------------
+    # Stage Files
+    # -----------------------------
+    def destination(self, entry):
+        from slurm.install_slurm import SlurmInstaller
+
+        name = os.path.basename(entry["path"])
+
+        if entry["kind"] == "source" and entry["package"] == "slurm":
+            return os.path.join(SlurmInstaller.WORKDIR, name)
+        if entry["kind"] == "source":
+            return os.path.join(self.src_dir, name)
+        if entry["kind"] == "prerequisite":
+            return os.path.join(self.prereq_dir, name)
+        if entry["kind"] == "wheelhouse":
+            return os.path.join(self.wheelhouse_dir, name)
+
+        return os.path.join(self.package_dir, name)
+
+    def stage_files(self, index):
+        print("==== Staging Bundle Contents ====")
+
+        for entry in index["files"]:
+            dest = self.destination(entry)
+            self.extract(entry, dest)
+
+            if os.path.dirname(dest) == self.src_dir:
+                self.store.touch(os.path.basename(dest))
+
+            print(f"✔ {entry['path']}")
+
+    # -----------------------------
+    # System Packages
+    # -----------------------------
+    def install_packages(self, index):
+        print("==== Installing System Packages From Bundle ====")
+
+        packages = [
+            os.path.join(self.package_dir, os.path.basename(entry["path"]))
+            for entry in index["files"]
+            if entry["kind"] in ["deb", "rpm"]
+        ]
+
+        if not packages:
+            return
+
+        if index["package_manager"] == "apt":
+            self.engine.run(["sudo", "apt-get", "install", "-y", "--no-install-recommends"] + packages)
+        else:
+            self.engine.run(["sudo", "dnf", "install", "-y", "--disablerepo=*"] + packages)
+
+        shutil.rmtree(self.package_dir, ignore_errors=True)
+
+    # -----------------------------
+    # Provision
+    # -----------------------------
+    def provision(self, index):
+        # Installers read these: no version lookups, no package downloads
+        os.environ["HPC_OFFLINE"] = "1"
+
+        for package, version in index["versions"].items():
+            os.environ[f"HPC_{package.upper()}_VERSION"] = version
+
+        # The wheelhouse builds from the bundled sdists instead of PyPI
+        os.environ["HPC_WHEELHOUSE_SOURCES"] = self.wheelhouse_dir
+
+        from master_setup import HPCFramework
+        HPCFramework().setup()
+
+        if "gcc" in index["versions"]:
+            from modules.install_gcc_module import GCCInstaller
+            GCCInstaller().install()
+
+    def install(self):
+        print("===== OFFLINE BUNDLE INSTALL =====")
+
+        index = self.load_index()
+        print(f"Bundle created {index['created']} for {index['os_id']} {index['os_version']}")
+
+        self.check_platform(index)
+        self.stage_files(index)
+        self.install_packages(index)
+        self.provision(index)
+
+        print("===== OFFLINE BUNDLE INSTALL COMPLETE =====")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 -m bundle.install_bundle <bundle.tar | http://mirror/>")
+        sys.exit(1)
+
+    BundleInstaller(sys.argv[1]).install()
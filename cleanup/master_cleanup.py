@@ -1,43 +1,55 @@
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
-# Import your modules
-from modules.remove_python import PythonRemover
-from modules.remove_openmpi import OpenMPIRemover
-from modules.remove_gcc import GCCRemover
-from slurm.remove_slurm import SlurmRemover
+from cleanup.remove_python_env import PythonRemover
+from cleanup.remove_openmpi import OpenMPIRemover
+from cleanup.remove_gcc import GCCRemover
+from cleanup.remove_openblas import OpenBLASRemover
+from cleanup.remove_fftw import FFTWRemover
+from cleanup.remove_slurm import SlurmRemover
+from cleanup.remove_tuning import TuningRemover
+from cleanup.remove_pmix import PMIxRemover
 
 
 class HPCCleanup:
 
-    def remove_user_modules(self):
-        print("Removing user-level HPC modules...")
-
-        PythonRemover().remove()
-        OpenMPIRemover().remove()
-        GCCRemover().remove()
-
-    def remove_slurm(self):
-        print("Removing Slurm (system-level)...")
+    def user_removers(self):
+        return [PythonRemover(), OpenMPIRemover(), GCCRemover(), OpenBLASRemover(), FFTWRemover()]
 
-        if os.geteuid() != 0:
-            print("⚠ Slurm removal requires root.")
-            print("Please run with: sudo python3 master_cleanup.py")
-            sys.exit(1)
+    def run_concurrently(self, removers):
+        # Removers only rename their trees away, so they finish quickly;
+        # running them side by side keeps the slowest one off the critical path.
+        with ThreadPoolExecutor(max_workers=len(removers)) as pool:
+            futures = [pool.submit(remover.remove) for remover in removers]
 
-        SlurmRemover().remove()
+        for future in futures:
+            future.result()
 
     def cleanup(self):
         print("===== HPC CLEANUP START =====")
 
-        # User-level removals (no root needed)
-        self.remove_user_modules()
+        removers = self.user_removers()
 
         # System-level removal (root required)
-        self.remove_slurm()
+        is_root = os.geteuid() == 0
+        if is_root:
+            print("Removing Slurm (system-level)...")
+            removers.append(SlurmRemover())
+            removers.append(TuningRemover())
+            removers.append(PMIxRemover())
+
+        print("Removing user-level HPC modules...")
+        self.run_concurrently(removers)
+
+        if not is_root:
+            print("⚠ Slurm removal requires root.")
+            print("Please run with: sudo python3 -m cleanup.master_cleanup")
+            sys.exit(1)
 
         print("===== CLEANUP COMPLETE =====")
+        print("Remaining files are being deleted in the background.")
 
 
 if __name__ == "__main__":
-    HPCCleanup().cleanup()
\ No newline at end of file
+    HPCCleanup().cleanup()
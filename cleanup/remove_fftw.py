@@ -0,0 +1,86 @@
+import os
+from pathlib import Path
+from common.generate_modulefile import ModulefileGenerator
+from common.trash_reaper import TrashReaper
+from common.source_store import SourceStore
+
+
+class FFTWRemover:
+
+    def __init__(self):
+        self.home = str(Path.home())
+        self.install_dir = f"{self.home}/hpc/fftw"
+        self.src_dir = f"{self.home}/hpc_sources"
+        self.reaper = TrashReaper()
+        self.store = SourceStore()
+
+        # Tarballs stay in the size-budgeted store unless a purge is requested
+        self.purge_sources = os.getenv("HPC_PURGE_SOURCES") == "1"
+
+    # -----------------------------
+    # Remove Installation Directory
+    # -----------------------------
+    def remove_installation(self):
+        print("Removing FFTW installation...")
+
+        if os.path.exists(self.install_dir):
+            self.reaper.discard(self.install_dir)
+            print("✔ Removed install directory.")
+        else:
+            print("Install directory not found. Skipping.")
+
+    # -----------------------------
+    # Remove Source Files
+    # -----------------------------
+    def remove_sources(self):
+        if not os.path.exists(self.src_dir):
+            return
+
+        for item in os.listdir(self.src_dir):
+            if item.startswith("fftw-"):
+                path = os.path.join(self.src_dir, item)
+
+                if os.path.isdir(path):
+                    self.reaper.discard(path)
+                    self.store.forget(item)
+                    print(f"✔ Removed source folder: {item}")
+
+                elif item.endswith(".tar.gz"):
+                    if self.purge_sources:
+                        os.remove(path)
+                        self.store.forget(item)
+                        print(f"✔ Removed tar file: {item}")
+                    else:
+                        print(f"Kept tar file in source store: {item}")
+
+        self.store.enforce_budget()
+
+    # -----------------------------
+    # Remove Modulefiles
+    # -----------------------------
+    def remove_modulefiles(self):
+        if ModulefileGenerator("fftw").remove():
+            print("✔ Removed FFTW modulefiles and activation scripts.")
+        else:
+            print("No FFTW modulefiles found. Skipping.")
+
+    # -----------------------------
+    # Main Flow
+    # -----------------------------
+    def remove(self):
+        print("===== Removing FFTW (HPC Version) =====")
+
+        self.remove_installation()
+        self.remove_sources()
+        self.remove_modulefiles()
+
+        # Trees were renamed away above; the actual unlinking runs detached
+        self.reaper.start()
+
+        print("===== FFTW completely removed =====")
+        print("Run: module unload fftw (if loaded)")
+
+
+if __name__ == "__main__":
+    remover = FFTWRemover()
+    remover.remove()
\ No newline at end of file
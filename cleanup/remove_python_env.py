@@ -1,6 +1,8 @@
 import os
-import shutil
 from pathlib import Path
+from common.generate_modulefile import ModulefileGenerator
+from common.trash_reaper import TrashReaper
+from common.source_store import SourceStore
 import re
 
 
@@ -10,7 +12,11 @@ class PythonRemover:
         self.home = str(Path.home())
         self.install_dir = f"{self.home}/hpc/python"
         self.src_dir = f"{self.home}/hpc_sources"
-        self.bashrc = f"{self.home}/.bashrc"
+        self.reaper = TrashReaper()
+        self.store = SourceStore()
+
+        # Tarballs stay in the size-budgeted store unless a purge is requested
+        self.purge_sources = os.getenv("HPC_PURGE_SOURCES") == "1"
 
     # -----------------------------
     # Remove Installation Directory
@@ -19,7 +25,7 @@ class PythonRemover:
         print("Removing Python installation...")
 
         if os.path.exists(self.install_dir):
-            shutil.rmtree(self.install_dir, ignore_errors=True)
+            self.reaper.discard(self.install_dir)
             print("✔ Removed install directory.")
         else:
             print("Install directory not found. Skipping.")
@@ -36,29 +42,28 @@ class PythonRemover:
                 path = os.path.join(self.src_dir, item)
 
                 if os.path.isdir(path):
-                    shutil.rmtree(path, ignore_errors=True)
+                    self.reaper.discard(path)
+                    self.store.forget(item)
                     print(f"✔ Removed source folder: {item}")
 
                 elif item.endswith(".tar.xz"):
-                    os.remove(path)
-                    print(f"✔ Removed tar file: {item}")
+                    if self.purge_sources:
+                        os.remove(path)
+                        self.store.forget(item)
+                        print(f"✔ Removed tar file: {item}")
+                    else:
+                        print(f"Kept tar file in source store: {item}")
+
+        self.store.enforce_budget()
 
     # -----------------------------
-    # Clean PATH from .bashrc
+    # Remove Modulefiles
     # -----------------------------
-    def clean_bashrc(self):
-        if not os.path.exists(self.bashrc):
-            return
-
-        with open(self.bashrc, "r") as f:
-            lines = f.readlines()
-
-        with open(self.bashrc, "w") as f:
-            for line in lines:
-                if "hpc/python/bin" not in line:
-                    f.write(line)
-
-        print("✔ Removed PATH entry from ~/.bashrc")
+    def remove_modulefiles(self):
+        if ModulefileGenerator("python").remove():
+            print("✔ Removed Python modulefiles and activation scripts.")
+        else:
+            print("No Python modulefiles found. Skipping.")
 
     # -----------------------------
     # Main Flow
@@ -68,10 +73,13 @@ class PythonRemover:
 
         self.remove_installation()
         self.remove_sources()
-        self.clean_bashrc()
+        self.remove_modulefiles()
+
+        # Trees were renamed away above; the actual unlinking runs detached
+        self.reaper.start()
 
         print("===== Python completely removed =====")
-        print("Run: source ~/.bashrc")
+        print("Run: module unload python (if loaded)")
 
 if __name__ == "__main__":
     remover = PythonRemover()
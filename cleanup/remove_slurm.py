@@ -2,6 +2,12 @@ import subprocess
 import os
 import shutil
 
+from slurm.install_accounting import SlurmAccountingInstaller
+from slurm.node_health import NodeHealthCheck
+from slurm.install_slurm import SlurmInstaller
+from system_check.host_facts import get_facts
+from common.privileged_session import privileged_session
+
 
 class SlurmRemover:
 
@@ -20,12 +26,7 @@ class SlurmRemover:
 
     
     def detect_package_manager(self):
-        if shutil.which("apt"):
-            return "apt"
-        elif shutil.which("dnf"):
-            return "dnf"
-        else:
-            return None
+        return get_facts().package_manager()
 
     def stop_services(self):
         print("Stopping services...")
@@ -37,34 +38,58 @@ class SlurmRemover:
             "munge"
         ]
 
-        for service in services:
-            self.run(["systemctl", "stop", service], ignore_error=True)
-            self.run(["systemctl", "disable", service], ignore_error=True)
+        # Two systemctl calls for all services: stop a b c d, disable a b c d
+        with privileged_session().batch() as batch:
+            for service in services:
+                batch.systemctl("stop", service, check=False)
+            for service in services:
+                batch.systemctl("disable", service, check=False)
+
+    def remove_build(self):
+        print("Removing source-built Slurm...")
+
+        # Exactly the files make install put into /usr/local, plus the unit files
+        removed = privileged_session().uninstall_manifest(SlurmInstaller.MANIFEST)
+
+        if removed is None:
+            print("⚠ No install manifest (installed before manifests); "
+                  "source-built files under /usr/local stay.")
+        else:
+            print(f"✔ Removed {removed['removed']} installed files and {removed['dirs']} directories.")
 
     def remove_packages(self, pkg_manager):
-        print("Removing Slurm and Munge packages...")
+        # Slurm itself never came from a package; munge did
+        print("Removing Munge packages...")
 
         if pkg_manager == "apt":
-            self.run([
-                "apt", "purge", "-y",
-                "slurm-wlm",
-                "munge",
-                "slurmctld",
-                "slurmd",
-                "slurmdbd"
-            ], ignore_error=True)
-
+            self.run(["apt", "purge", "-y", "munge"], ignore_error=True)
             self.run(["apt", "autoremove", "-y"], ignore_error=True)
 
         elif pkg_manager == "dnf":
-            self.run([
-                "dnf", "remove", "-y",
-                "slurm",
-                "munge",
-                "slurm-slurmctld",
-                "slurm-slurmd",
-                "slurm-slurmdbd"
-            ], ignore_error=True)
+            self.run(["dnf", "remove", "-y", "munge"], ignore_error=True)
+
+    def remove_accounting(self):
+        print("Removing accounting database and MariaDB tuning...")
+
+        accounting = SlurmAccountingInstaller
+
+        # MariaDB itself stays installed; only what slurmdbd added goes
+        if shutil.which("mysql"):
+            subprocess.run(
+                ["mysql", "--batch"],
+                input=(
+                    f"DROP DATABASE IF EXISTS {accounting.DATABASE};\n"
+                    f"DROP USER IF EXISTS '{accounting.DB_USER}'@'localhost';\n"
+                ),
+                text=True,
+                stderr=subprocess.DEVNULL
+            )
+
+        with privileged_session().batch() as batch:
+            for path in list(accounting.TUNING_FILES.values()) + [accounting.SERVICE_FILE]:
+                batch.remove(path)
+
+            batch.systemctl("try-restart", "mariadb", check=False)
 
     def remove_directories(self):
         print("Removing configuration directories...")
@@ -79,21 +104,25 @@ class SlurmRemover:
             "/var/spool/slurmd"
         ]
 
-        for path in paths:
-            if os.path.exists(path):
-                shutil.rmtree(path, ignore_errors=True)
+        with privileged_session().batch() as batch:
+            for path in paths:
+                batch.remove(path, check=False)
+
+            # Drain bookkeeping of the health check; the wrapper went with /etc/slurm
+            batch.remove(NodeHealthCheck.STATE_FILE)
 
     def remove_users(self):
         print("Removing users...")
 
         users = ["slurm", "munge"]
 
-        for user in users:
-            self.run(["userdel", user], ignore_error=True)
+        with privileged_session().batch() as batch:
+            for user in users:
+                batch.userdel(user, check=False)
 
     def reload_systemd(self):
         print("Reloading systemd...")
-        self.run(["systemctl", "daemon-reload"], ignore_error=True)
+        privileged_session().systemctl("daemon-reload", check=False)
 
     def remove(self):
         print("===== FULL HPC RESET START =====")
@@ -103,6 +132,8 @@ class SlurmRemover:
         pkg_manager = self.detect_package_manager()
 
         self.stop_services()
+        self.remove_accounting()
+        self.remove_build()
 
         if pkg_manager:
             self.remove_packages(pkg_manager)
@@ -0,0 +1,23 @@
+import sys
+from tuning.apply_profile import NodeTuner
+
+
+class TuningRemover:
+
+    def __init__(self, root="/"):
+        self.tuner = NodeTuner(root)
+
+    # -----------------------------
+    # Main Flow
+    # -----------------------------
+    def remove(self):
+        print("===== Removing Node Tuning Profile =====")
+
+        # Writes back the values snapshotted before the profile was applied
+        self.tuner.revert()
+
+        print("===== Node tuning reverted =====")
+
+
+if __name__ == "__main__":
+    TuningRemover(*sys.argv[1:2]).remove()
@@ -0,0 +1,213 @@
+import os
+import time
+import errno
+import shutil
+import subprocess
+from pathlib import Path
+
+from common.trash_reaper import TrashReaper
+from common.dedup_prefixes import PrefixDeduplicator
+from common.privileged_session import privileged_session
+
+
+class BuildSandbox:
+    """
+    A private, writable view of a pristine source tree.
+
+    A holder process keeps a mount namespace alive (a user namespace too
+    when not root) in which an overlay is mounted: the extracted tree is
+    the read-only lower layer, and every object file lands in this
+    sandbox's upper layer. Builds run inside it via nsenter and install
+    into a staged DESTDIR, which is committed in one step afterwards.
+    Discarding is a rename plus closing the holder's stdin, however big
+    the build got.
+    """
+
+    OWNER_FILE = "owner.pid"
+
+    def __init__(self, name, pristine=None):
+        """pristine: extracted source tree; only sweep() works without one"""
+        self.home = str(Path.home())
+        self.root = f"{self.home}/hpc/.sandboxes"
+        self.pristine = os.path.abspath(pristine) if pristine else None
+        self.name = name
+
+        # Same filesystem as ~/hpc/<pkg>/<version>, so commit_prefix is a rename
+        self.path = f"{self.root}/{name}-{os.getpid()}-{time.time_ns()}"
+        self.upper = f"{self.path}/upper"
+        self.work = f"{self.path}/work"
+        self.tree = f"{self.path}/tree"
+        self.stage = f"{self.path}/stage"
+
+        self.holder = None
+        self.overlay = False
+        self.reaper = TrashReaper()
+
+    # -----------------------------
+    # Create
+    # -----------------------------
+    def open(self):
+        self.sweep()
+
+        for path in [self.upper, self.work, self.tree, self.stage]:
+            os.makedirs(path)
+
+        with open(f"{self.path}/{self.OWNER_FILE}", "w") as f:
+            f.write(str(os.getpid()))
+
+        self.overlay = self.mount_overlay()
+
+        if self.overlay:
+            print(f"✔ Sandbox {self.name}: overlay on {os.path.basename(self.pristine)}")
+        else:
+            # No overlay (old kernel, no user namespaces): a private copy instead
+            print(f"Sandbox {self.name}: overlayfs unavailable, copying source tree")
+            subprocess.run(
+                ["cp", "-a", "--reflink=auto", f"{self.pristine}/.", self.tree],
+                check=True
+            )
+
+        return self
+
+    def mount_overlay(self):
+        # Root only needs a mount namespace; users get one via a user namespace
+        unshare = ["unshare", "-m"] if os.geteuid() == 0 else ["unshare", "-Urm"]
+
+        try:
+            # The holder exits when its stdin closes, including when we die
+            self.holder = subprocess.Popen(
+                unshare + ["--propagation", "private", "sh", "-c", "echo ready; read _"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True
+            )
+        except FileNotFoundError:
+            return False
+
+        # Until the shell runs, the pid is still in our namespace and nsenter
+        # would mount the overlay on the host
+        if self.holder.stdout.readline().strip() != "ready":
+            self.release_holder()
+            return False
+
+        options = f"lowerdir={self.pristine},upperdir={self.upper},workdir={self.work}"
+        result = subprocess.run(
+            self.enter() + ["mount", "-t", "overlay", "overlay", "-o", options, self.tree],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+
+        if result.returncode != 0:
+            self.release_holder()
+            return False
+
+        return True
+
+    def enter(self):
+        # Unprivileged namespaces forbid setgroups; we are mapped to root anyway
+        namespaces = ["-m"] if os.geteuid() == 0 else ["-U", "-m", "--preserve-credentials"]
+        return ["nsenter", "-t", str(self.holder.pid)] + namespaces
+
+    # -----------------------------
+    # Run Inside
+    # -----------------------------
+    def wrap(self, command, subdir=""):
+        """Command line that runs command in the sandbox tree (optionally a subdirectory)"""
+        directory = os.path.join(self.tree, subdir)
+
+        # env -C changes directory after nsenter, so the path resolves to the overlay
+        if self.overlay:
+            return self.enter() + ["env", "-C", directory] + command
+
+        return ["env", "-C", directory] + command
+
+    def staged(self, path):
+        """Where an absolute install path lands inside the DESTDIR"""
+        return self.stage + os.path.abspath(path)
+
+    # -----------------------------
+    # Commit Staged Install
+    # -----------------------------
+    def commit_prefix(self, prefix):
+        """Moves a staged versioned prefix into place with a single rename"""
+        staged = self.staged(prefix)
+
+        if not os.path.isdir(staged):
+            raise Exception(f"Nothing was installed under {prefix} in the sandbox.")
+
+        # Leftovers of an older, interrupted install at the same prefix
+        if os.path.lexists(prefix):
+            self.reaper.discard(prefix)
+
+        os.makedirs(os.path.dirname(prefix), exist_ok=True)
+
+        try:
+            os.rename(staged, prefix)
+        except OSError as error:
+            if error.errno != errno.EXDEV:
+                raise
+            shutil.copytree(staged, prefix, symlinks=True)
+
+        print(f"✔ Committed {prefix}")
+
+        # Headers, stdlib files and docs shared with other installed versions
+        PrefixDeduplicator().run([prefix])
+
+    def commit_manifest(self, name, target="/"):
+        """
+        Installs the stage over a shared target (/usr/local, a prefix
+        several components share) and records it in manifest name;
+        only files whose hash changed are copied
+        """
+        stats = privileged_session().install_manifest(name, self.stage, target)
+        size = PrefixDeduplicator().format_size(stats["bytes"])
+
+        print(f"✔ Committed {name} into {target}: {stats['changed']} files updated ({size}), "
+              f"{stats['unchanged']} unchanged, {stats['removed']} removed")
+
+    # -----------------------------
+    # Discard
+    # -----------------------------
+    def release_holder(self):
+        if self.holder:
+            # The overlay disappears with the last process in the namespace
+            self.holder.stdin.close()
+            self.holder.wait()
+            if self.holder.stdout:
+                self.holder.stdout.close()
+            self.holder = None
+
+    def discard(self):
+        self.release_holder()
+        self.reaper.discard(self.path)
+        self.reaper.start()
+
+    def sweep(self):
+        """Discards sandboxes whose build process no longer exists"""
+        if not os.path.isdir(self.root):
+            return
+
+        stale = False
+
+        for item in os.listdir(self.root):
+            if item.startswith("."):
+                continue
+
+            try:
+                with open(f"{self.root}/{item}/{self.OWNER_FILE}") as f:
+                    owner = int(f.read().strip())
+                os.kill(owner, 0)
+                continue
+            except (FileNotFoundError, ValueError, ProcessLookupError):
+                pass
+            except PermissionError:
+                # Owner exists but belongs to someone else
+                continue
+
+            self.reaper.discard(f"{self.root}/{item}")
+            stale = True
+
+        if stale:
+            print("Discarded stale build sandboxes.")
+            self.reaper.start()
@@ -0,0 +1,212 @@
+import os
+import gzip
+import time
+import signal
+import asyncio
+import itertools
+import subprocess
+from collections import deque
+from pathlib import Path
+
+
+class CommandFailed(subprocess.CalledProcessError):
+    """Raised for a failed or timed-out step; carries the log tail"""
+
+    def __init__(self, returncode, cmd, step, log_path, tail, timed_out=False):
+        super().__init__(returncode, cmd)
+        self.step = step
+        self.log_path = log_path
+        self.tail = tail
+        self.timed_out = timed_out
+
+    def __str__(self):
+        reason = "timed out" if self.timed_out else f"exit {self.returncode}"
+        return f"Step '{self.step}' failed ({reason}). Full log: {self.log_path}"
+
+
+class CommandEngine:
+
+    TAIL_LINES = 40
+    CHUNK_SIZE = 64 * 1024
+    KILL_GRACE = 5
+
+    def __init__(self, name, max_parallel=None):
+        self.home = str(Path.home())
+
+        run_id = time.strftime("%Y%m%d-%H%M%S")
+        self.log_dir = f"{self.home}/hpc/logs/{name}/{run_id}-{os.getpid()}"
+
+        self.max_parallel = max_parallel or os.cpu_count() or 1
+        self.tail_lines = int(os.getenv("HPC_LOG_TAIL", self.TAIL_LINES))
+        self.counter = itertools.count(1)
+
+        self.loop = None
+        self.semaphore = None
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+    def step_name(self, command):
+        """e.g. ["sudo", "make", "install"] -> "make-install" """
+        args = command[1:] if command[0] == "sudo" else command
+
+        # Build sandbox wrappers: nsenter ... env -C <dir> <command>
+        if args[0] == "nsenter" and "env" in args:
+            args = args[args.index("env"):]
+        if args[0] == "env" and args[1:2] == ["-C"]:
+            args = args[3:]
+
+        name = os.path.basename(args[0])
+
+        for arg in args[1:]:
+            if not arg.startswith("-") and " " not in arg:
+                name += "-" + os.path.basename(arg)
+                break
+
+        return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)[:60]
+
+    def limiter(self):
+        # Semaphores bind to one event loop; run()/run_many() each start a new one
+        loop = asyncio.get_running_loop()
+
+        if self.loop is not loop:
+            self.loop = loop
+            self.semaphore = asyncio.Semaphore(self.max_parallel)
+
+        return self.semaphore
+
+    # -----------------------------
+    # Output Capture
+    # -----------------------------
+    async def pump(self, stream, log, tail):
+        """Copies output to the log chunk by chunk; only the tail stays in memory"""
+        pending = b""
+
+        while True:
+            chunk = await stream.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+
+            log.write(chunk)
+
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()[-self.CHUNK_SIZE:]
+            tail.extend(lines)
+
+        if pending:
+            tail.append(pending)
+
+    async def terminate(self, process, own_group):
+        try:
+            if own_group:
+                os.killpg(process.pid, signal.SIGTERM)
+            else:
+                process.terminate()
+        except ProcessLookupError:
+            return
+
+        try:
+            await asyncio.wait_for(process.wait(), self.KILL_GRACE)
+        except asyncio.TimeoutError:
+            try:
+                if own_group:
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+    # -----------------------------
+    # Run One Step
+    # -----------------------------
+    async def run_async(self, command, step=None, timeout=None, cwd=None, env=None):
+        step = step or self.step_name(command)
+        log_path = f"{self.log_dir}/{next(self.counter):03d}-{step}.log.gz"
+
+        async with self.limiter():
+            os.makedirs(self.log_dir, exist_ok=True)
+            print(f"Running: {' '.join(command)}")
+
+            # sudo may need the terminal for a password prompt, so it stays in
+            # our process group; everything else gets its own group so a
+            # timeout or cancel can take down the whole tree (make -j, ...)
+            own_group = command[0] != "sudo"
+
+            # A new session is also a new process group (and works before Python 3.11)
+            extra = {"start_new_session": True, "stdin": subprocess.DEVNULL} if own_group else {}
+
+            start = time.monotonic()
+            tail = deque(maxlen=self.tail_lines)
+            timed_out = False
+
+            spawn = asyncio.ensure_future(asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=cwd,
+                env=env,
+                **extra
+            ))
+
+            try:
+                process = await asyncio.shield(spawn)
+            except asyncio.CancelledError:
+                # A spawn cancelled halfway (a run_many sibling failed) can wait
+                # forever for pipes that never connect; let it finish instead
+                process = await spawn
+                await self.terminate(process, own_group)
+                raise
+
+            with gzip.open(log_path, "wb", compresslevel=3) as log:
+                try:
+                    await asyncio.wait_for(
+                        asyncio.gather(self.pump(process.stdout, log, tail), process.wait()),
+                        timeout
+                    )
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    await self.terminate(process, own_group)
+                except asyncio.CancelledError:
+                    await self.terminate(process, own_group)
+                    raise
+
+        elapsed = time.monotonic() - start
+
+        if timed_out or process.returncode != 0:
+            error = CommandFailed(process.returncode, command, step, log_path,
+                                  [line.decode(errors="replace") for line in tail],
+                                  timed_out=timed_out)
+
+            print(f"✖ {error}")
+            print(f"---- last {len(error.tail)} lines of {step} ----")
+            for line in error.tail:
+                print(f"  {line}")
+            print("----")
+
+            raise error
+
+        print(f"✔ {step} ({elapsed:.1f}s, log: {log_path})")
+        return log_path
+
+    # -----------------------------
+    # Synchronous Entry Points
+    # -----------------------------
+    def run(self, command, **kwargs):
+        return asyncio.run(self.run_async(command, **kwargs))
+
+    def run_many(self, commands, **kwargs):
+        """Runs independent commands concurrently, bounded by max_parallel"""
+        async def run_all():
+            tasks = [asyncio.ensure_future(self.run_async(command, **kwargs)) for command in commands]
+
+            try:
+                return await asyncio.gather(*tasks)
+            finally:
+                # Stop the siblings of a failed step here: asyncio.run() would
+                # also cancel their half-finished spawns, which never return
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        return asyncio.run(run_all())
@@ -0,0 +1,346 @@
+import os
+import sys
+import json
+import stat
+import errno
+import fcntl
+import hashlib
+from contextlib import contextmanager
+from pathlib import Path
+
+
+# ioctl(dest, FICLONE, source): dest shares source's extents (XFS, btrfs, ...)
+FICLONE = 0x40049409
+
+# The filesystem cannot reflink (or not between these two files)
+NO_REFLINK = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS}
+
+
+class PrefixDeduplicator:
+    """
+    Finds identical files across the install prefixes under ~/hpc and the
+    source trees under ~/hpc_sources (several Python, GCC or OpenMPI
+    versions ship many of the same headers, stdlib files and docs) and
+    stores each only once.
+
+    Where the filesystem can, duplicates become reflinks: separate files
+    sharing extents, copy-on-write, so nothing else changes. Hardlinks
+    (made read-only) are only a fallback for non-root runs: root writes
+    through the read-only bit, so as root one version could change
+    another's file. Source trees never get hardlinks either, as that would
+    give a file the other tree's mtime and make autotools regenerate.
+    The hardlinks and their original modes are kept in
+    ~/hpc/.dedup-index.json; forget() (called by TrashReaper for everything
+    it discards) gives a file its mode back once no other version shares it.
+    """
+
+    INDEX_NAME = ".dedup-index.json"
+    LOCK_NAME = ".dedup.lock"
+    TRASH_NAME = ".hpc_trash"
+
+    # Below this, the saving does not pay for the hashing
+    MIN_SIZE = 4096
+
+    def __init__(self):
+        self.home = str(Path.home())
+        self.roots = [f"{self.home}/hpc", f"{self.home}/hpc_sources"]
+        self.sources = f"{self.home}/hpc_sources{os.sep}"
+        self.index_path = f"{self.home}/hpc/{self.INDEX_NAME}"
+        self.lock_path = f"{self.home}/hpc/{self.LOCK_NAME}"
+
+        self.enabled = os.getenv("HPC_DEDUP", "1") != "0"
+        self.min_size = int(os.getenv("HPC_DEDUP_MIN_SIZE", self.MIN_SIZE))
+
+        # Read-only protects nothing from root, so root shares via reflinks only
+        # unless HPC_DEDUP_HARDLINKS=1 asks for it
+        default = "0" if os.geteuid() == 0 else "1"
+        self.hardlinks = os.getenv("HPC_DEDUP_HARDLINKS", default) != "0"
+
+        # st_dev -> whether FICLONE works there; probed on first use
+        self.reflinks = {}
+
+    # -----------------------------
+    # Index (hash cache + hardlink groups)
+    # -----------------------------
+    @contextmanager
+    def index(self):
+        """Locked read-modify-write; installs and removers may run concurrently"""
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+
+        with open(self.lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            index = {}
+            if os.path.exists(self.index_path):
+                with open(self.index_path) as f:
+                    index = json.load(f)
+
+            index.setdefault("hashes", {})
+            index.setdefault("links", {})
+
+            yield index
+
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(index, f, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+
+    # -----------------------------
+    # Scan
+    # -----------------------------
+    def scan(self):
+        """(st_dev, size) -> [(path, stat)] for every regular file worth sharing"""
+        candidates = {}
+
+        for root in self.roots:
+            if not os.path.isdir(root):
+                continue
+
+            # Prefixes and extracted trees only: no tarballs, logs, sandboxes or bookkeeping
+            stack = [
+                entry.path for entry in os.scandir(root)
+                if entry.is_dir(follow_symlinks=False)
+                and not entry.name.startswith(".") and entry.name != "logs"
+            ]
+
+            while stack:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name != self.TRASH_NAME:
+                                stack.append(entry.path)
+                            continue
+
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+
+                        info = entry.stat(follow_symlinks=False)
+                        if info.st_size >= self.min_size:
+                            candidates.setdefault((info.st_dev, info.st_size), []).append((entry.path, info))
+
+        return candidates
+
+    def digest(self, path, info, cache):
+        """Content hash, reused while inode, size and mtime are unchanged"""
+        key = [info.st_ino, info.st_size, info.st_mtime_ns]
+        cached = cache.get(path)
+
+        if cached and cached[:3] == key:
+            return cached[3]
+
+        # Chunked rather than hashlib.file_digest, which needs Python 3.11
+        digest = hashlib.blake2b()
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    break
+                digest.update(chunk)
+
+        value = digest.hexdigest()
+
+        cache[path] = key + [value]
+        return value
+
+    # -----------------------------
+    # Share
+    # -----------------------------
+    def reflink(self, source, target, info):
+        """Replaces target by a clone of source; False if the filesystem cannot"""
+        if self.reflinks.get(info.st_dev) is False:
+            return False
+
+        tmp_path = f"{target}.dedup.{os.getpid()}"
+
+        try:
+            with open(source, "rb") as src:
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                try:
+                    fcntl.ioctl(fd, FICLONE, src.fileno())
+                finally:
+                    os.close(fd)
+
+            os.chown(tmp_path, info.st_uid, info.st_gid)
+            os.chmod(tmp_path, stat.S_IMODE(info.st_mode))
+            os.utime(tmp_path, ns=(info.st_atime_ns, info.st_mtime_ns))
+            os.replace(tmp_path, target)
+
+        except OSError as error:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if error.errno not in NO_REFLINK:
+                raise
+            self.reflinks[info.st_dev] = False
+            return False
+
+        self.reflinks[info.st_dev] = True
+        return True
+
+    def hardlink(self, source, target):
+        tmp_path = f"{target}.dedup.{os.getpid()}"
+        os.link(source, tmp_path)
+        os.replace(tmp_path, target)
+
+    def share(self, canonical, duplicates, digest, index):
+        """
+        Points every duplicate at canonical's data; returns (files, bytes).
+        Hardlinks need identical owner and mode (write bits aside).
+        """
+        source, source_info = canonical
+        shared = saved = 0
+
+        for path, info in duplicates:
+            if self.reflink(source, path, info):
+                # New inode, same content: keep the cached hash valid, and
+                # flag both sides so later passes do not clone them again
+                index["hashes"][path] = [os.stat(path).st_ino, info.st_size, info.st_mtime_ns, digest, "reflink"]
+                index["hashes"][source] = index["hashes"][source][:4] + ["reflink"]
+                shared += 1
+                saved += info.st_size
+                continue
+
+            if not self.hardlinks or self.in_sources(path) or self.in_sources(source):
+                continue
+            if (info.st_uid, info.st_gid) != (source_info.st_uid, source_info.st_gid):
+                continue
+            if stat.S_IMODE(info.st_mode) & ~0o222 != stat.S_IMODE(source_info.st_mode) & ~0o222:
+                continue
+
+            group = index["links"].setdefault(digest, {})
+            group.setdefault(source, oct(stat.S_IMODE(source_info.st_mode)))
+            group.setdefault(path, oct(stat.S_IMODE(info.st_mode)))
+
+            # Read-only, so writing through one version cannot change another
+            os.chmod(source, stat.S_IMODE(source_info.st_mode) & ~0o222)
+            self.hardlink(source, path)
+
+            index["hashes"][path] = index["hashes"][source]
+            shared += 1
+            saved += info.st_size
+
+        return shared, saved
+
+    # -----------------------------
+    # Main Pass
+    # -----------------------------
+    def run(self, scope=None):
+        """
+        Deduplicates the files under scope (default: everything) against
+        all prefixes and source trees; returns the bytes reclaimed
+        """
+        if not self.enabled:
+            return 0
+
+        scope = [os.path.abspath(path) + os.sep for path in scope or []]
+        in_scope = lambda path: not scope or any(path.startswith(prefix) for prefix in scope)
+
+        shared = saved = 0
+
+        with self.index() as index:
+            candidates = self.scan()
+            seen = set()
+
+            for files in candidates.values():
+                seen.update(path for path, info in files)
+
+                # Only same-size files on the same filesystem can be shared
+                if len(files) < 2 or not any(in_scope(path) for path, info in files):
+                    continue
+
+                by_digest = {}
+                for path, info in files:
+                    by_digest.setdefault(self.digest(path, info, index["hashes"]), []).append((path, info))
+
+                for digest, same in by_digest.items():
+                    if len({info.st_ino for path, info in same}) < 2:
+                        continue
+
+                    # Keep the most shared inode; ties go to the first path
+                    same.sort(key=lambda item: (-item[1].st_nlink, item[0]))
+                    canonical = same[0]
+                    duplicates = [
+                        item for item in same
+                        if item[1].st_ino != canonical[1].st_ino
+                        and index["hashes"][item[0]][4:] != ["reflink"]
+                    ]
+
+                    files_shared, bytes_saved = self.share(canonical, duplicates, digest, index)
+                    shared += files_shared
+                    saved += bytes_saved
+
+            # Nothing is remembered for files that are gone
+            index["hashes"] = {path: value for path, value in index["hashes"].items() if path in seen}
+
+            for digest, group in list(index["links"].items()):
+                group = {path: mode for path, mode in group.items() if path in seen}
+                if len(group) > 1:
+                    index["links"][digest] = group
+                else:
+                    self.restore(group)
+                    del index["links"][digest]
+
+        if shared:
+            methods = {True: "reflinks", False: "read-only hardlinks"}
+            used = sorted({methods[value] for value in self.reflinks.values()})
+            print(f"✔ Dedup: {shared} duplicate files shared ({' and '.join(used)}), "
+                  f"{self.format_size(saved)} reclaimed")
+
+        return saved
+
+    # -----------------------------
+    # Removal
+    # -----------------------------
+    def restore(self, group):
+        for path, mode in group.items():
+            if os.path.exists(path):
+                os.chmod(path, int(mode, 8))
+
+    def forget(self, path):
+        """
+        path (a prefix or tree) is about to go. Its files leave the index,
+        and a file no other version shares any more gets its mode back.
+        Reflinked files need nothing: their extents are reference counted.
+        """
+        if not os.path.exists(self.index_path):
+            return
+
+        prefix = os.path.abspath(path) + os.sep
+        gone = lambda member: (member + os.sep).startswith(prefix)
+
+        with self.index() as index:
+            index["hashes"] = {
+                member: value for member, value in index["hashes"].items() if not gone(member)
+            }
+
+            for digest, group in list(index["links"].items()):
+                kept = {member: mode for member, mode in group.items() if not gone(member)}
+
+                if len(kept) == len(group):
+                    continue
+
+                if len(kept) > 1:
+                    index["links"][digest] = kept
+                else:
+                    self.restore(kept)
+                    del index["links"][digest]
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+    def in_sources(self, path):
+        return path.startswith(self.sources)
+
+    def format_size(self, size):
+        for unit in ["B", "K", "M", "G"]:
+            if size < 1024:
+                return f"{size:.1f}{unit}"
+            size /= 1024
+        return f"{size:.1f}T"
+
+
+if __name__ == "__main__":
+    deduplicator = PrefixDeduplicator()
+    reclaimed = deduplicator.run(sys.argv[1:])
+
+    if not reclaimed:
+        print("No duplicate files to share.")
@@ -0,0 +1,194 @@
+import os
+import glob
+from pathlib import Path
+
+
+class ModulefileGenerator:
+
+    # Sub-directories of an install prefix and the variable they extend
+    SEARCH_PATHS = [
+        ("bin", "PATH"),
+        ("lib", "LD_LIBRARY_PATH"),
+        ("lib64", "LD_LIBRARY_PATH"),
+        ("lib/pkgconfig", "PKG_CONFIG_PATH"),
+        ("lib64/pkgconfig", "PKG_CONFIG_PATH"),
+        ("include", "CPATH"),
+        ("share/man", "MANPATH"),
+    ]
+
+    def __init__(self, package, version=None, prefix=None):
+        self.home = str(Path.home())
+        self.package = package
+        self.version = version
+        self.prefix = prefix
+
+        self.modulefile_root = f"{self.home}/hpc/modulefiles"
+        self.activate_root = f"{self.home}/hpc/env"
+
+    # -----------------------------
+    # Locations
+    # -----------------------------
+    def use_lua(self):
+        """Lmod understands both formats; plain Environment Modules only Tcl"""
+        return bool(os.getenv("LMOD_CMD"))
+
+    def modulefile_path(self):
+        path = f"{self.modulefile_root}/{self.package}/{self.version}"
+        return path + ".lua" if self.use_lua() else path
+
+    def activation_script_path(self):
+        return f"{self.activate_root}/{self.package}-{self.version}.sh"
+
+    # -----------------------------
+    # Collect Search Paths
+    # -----------------------------
+    def search_paths(self):
+        """Only directories that exist in the prefix end up in the environment"""
+        paths = []
+
+        for subdir, variable in self.SEARCH_PATHS:
+            path = os.path.join(self.prefix, subdir)
+            if os.path.isdir(path):
+                paths.append((variable, path))
+
+        return paths
+
+    # -----------------------------
+    # Render Modulefile
+    # -----------------------------
+    def render_tcl(self):
+        lines = [
+            "#%Module1.0",
+            f"## {self.package} {self.version} (generated by hpcctl)",
+            "",
+            f'module-whatis "{self.package} {self.version}"',
+            f"conflict {self.package}",
+            "",
+        ]
+
+        for variable, path in self.search_paths():
+            lines.append(f"prepend-path {variable} {path}")
+
+        lines.append(f"setenv HPC_{self.env_name()}_ROOT {self.prefix}")
+        return "\n".join(lines) + "\n"
+
+    def render_lua(self):
+        lines = [
+            f"-- {self.package} {self.version} (generated by hpcctl)",
+            "",
+            f'whatis("{self.package} {self.version}")',
+            f'family("{self.package}")',
+            "",
+        ]
+
+        for variable, path in self.search_paths():
+            lines.append(f'prepend_path("{variable}", "{path}")')
+
+        lines.append(f'setenv("HPC_{self.env_name()}_ROOT", "{self.prefix}")')
+        return "\n".join(lines) + "\n"
+
+    # -----------------------------
+    # Render Activation Script
+    # -----------------------------
+    def render_activation_script(self):
+        """
+        Paths are resolved once at install time, so sourcing the script
+        costs no lookups. Entries of other versions of the same package
+        are stripped first, which makes switching versions a single source.
+        """
+        package_root = os.path.dirname(self.prefix)
+        variables = {}
+
+        for variable, path in self.search_paths():
+            variables.setdefault(variable, []).append(path)
+
+        lines = [
+            f"# {self.package} {self.version} (generated by hpcctl)",
+            "_hpc_strip() {",
+            "    _hpc_out=",
+            '    _hpc_rest="$1:"',
+            '    while [ -n "$_hpc_rest" ]; do',
+            '        _hpc_entry="${_hpc_rest%%:*}"',
+            '        _hpc_rest="${_hpc_rest#*:}"',
+            '        case "$_hpc_entry" in',
+            f'            "{package_root}"/*|"") ;;',
+            '            *) _hpc_out="${_hpc_out:+$_hpc_out:}$_hpc_entry" ;;',
+            "        esac",
+            "    done",
+            "}",
+        ]
+
+        for variable, paths in variables.items():
+            joined = ":".join(paths)
+            lines.append(f'_hpc_strip "${{{variable}:-}}"')
+            lines.append(f'export {variable}="{joined}${{_hpc_out:+:$_hpc_out}}"')
+
+        lines.append(f'export HPC_{self.env_name()}_ROOT="{self.prefix}"')
+        lines.append("unset _hpc_out _hpc_rest _hpc_entry")
+        lines.append("unset -f _hpc_strip")
+        return "\n".join(lines) + "\n"
+
+    def env_name(self):
+        return self.package.upper().replace("-", "_")
+
+    # -----------------------------
+    # Write Files
+    # -----------------------------
+    def write_if_changed(self, path, content):
+        """Keeps the cached file (and its mtime) when nothing changed"""
+        if os.path.exists(path):
+            with open(path) as f:
+                if f.read() == content:
+                    return False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+        return True
+
+    def generate(self):
+        print(f"Generating environment module for {self.package} {self.version}...")
+
+        modulefile = self.render_lua() if self.use_lua() else self.render_tcl()
+
+        if self.write_if_changed(self.modulefile_path(), modulefile):
+            print(f"✔ Modulefile written: {self.modulefile_path()}")
+        else:
+            print("Modulefile already up to date.")
+
+        self.write_if_changed(
+            self.activation_script_path(),
+            self.render_activation_script()
+        )
+        print(f"✔ Activation script: {self.activation_script_path()}")
+
+    def usage_hint(self):
+        return (
+            f"Run: module use {self.modulefile_root} && "
+            f"module load {self.package}/{self.version}\n"
+            f"  or: source {self.activation_script_path()}"
+        )
+
+    # -----------------------------
+    # Remove Modulefiles
+    # -----------------------------
+    def remove(self):
+        """Drops modulefiles and activation scripts of every version"""
+        removed = False
+
+        module_dir = f"{self.modulefile_root}/{self.package}"
+        if os.path.isdir(module_dir):
+            for item in os.listdir(module_dir):
+                os.remove(os.path.join(module_dir, item))
+            os.rmdir(module_dir)
+            removed = True
+
+        for script in glob.glob(f"{self.activate_root}/{self.package}-*.sh"):
+            os.remove(script)
+            removed = True
+
+        return removed
@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import stat
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+
+class InstallManifest:
+    """
+    What a staged install (make install DESTDIR=stage) put into a shared
+    target like /usr/local or /opt/hpc/pmix: every file and symlink with
+    its hash, and the directories the install had to create.
+
+    commit() copies only the files whose hash changed since the last
+    install and removes the ones the new build no longer ships, so a
+    reinstall of the same version touches almost nothing. uninstall()
+    removes exactly what the manifest lists. Both unlink and copy in
+    parallel.
+
+    Runs as root (in-process or inside the privileged helper) and never
+    prints: the helper's stdout is its JSON pipe.
+    """
+
+    ROOT = "/var/lib/hpcctl/manifests"
+
+    def __init__(self, name, workers=None):
+        self.name = name
+        self.path = f"{self.ROOT}/{name}.json"
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+
+    @classmethod
+    def installed(cls, prefix=""):
+        """Names of the manifests on this node, optionally only those starting with prefix"""
+        if not os.path.isdir(cls.ROOT):
+            return []
+
+        return sorted(
+            item[:-len(".json")] for item in os.listdir(cls.ROOT)
+            if item.endswith(".json") and item.startswith(prefix)
+        )
+
+    # -----------------------------
+    # Manifest File
+    # -----------------------------
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self, manifest):
+        os.makedirs(self.ROOT, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    # -----------------------------
+    # Scan Stage
+    # -----------------------------
+    def digest(self, path):
+        """blake2b of the file, read 1 MiB at a time (file_digest is 3.11+)"""
+        digest = hashlib.blake2b()
+
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    break
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def scan(self, stage):
+        """relative path -> entry for every file and symlink under stage, plus its directories"""
+        files = {}
+        dirs = []
+
+        for root, subdirs, names in os.walk(stage):
+            relative = os.path.relpath(root, stage)
+
+            for name in subdirs + names:
+                path = os.path.join(root, name)
+                member = os.path.normpath(os.path.join(relative, name))
+                info = os.lstat(path)
+
+                if stat.S_ISLNK(info.st_mode):
+                    files[member] = {"type": "link", "target": os.readlink(path)}
+                    subdirs[:] = [item for item in subdirs if item != name]
+                elif stat.S_ISDIR(info.st_mode):
+                    dirs.append(member)
+                elif stat.S_ISREG(info.st_mode):
+                    files[member] = {"type": "file", "mode": oct(stat.S_IMODE(info.st_mode)),
+                                     "size": info.st_size}
+
+        regular = [member for member, entry in files.items() if entry["type"] == "file"]
+
+        # hashlib drops the GIL for large buffers, so threads hash in parallel
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for member, value in zip(regular, pool.map(lambda member: self.digest(f"{stage}/{member}"), regular)):
+                files[member]["hash"] = value
+
+        return files, dirs
+
+    # -----------------------------
+    # Install
+    # -----------------------------
+    def unchanged(self, live, entry, previous):
+        """Same content as last time, and nobody touched the installed copy since"""
+        if not previous or {key: previous.get(key) for key in entry} != entry:
+            return False
+
+        try:
+            info = os.lstat(live)
+        except FileNotFoundError:
+            return False
+
+        if entry["type"] == "link":
+            return stat.S_ISLNK(info.st_mode) and os.readlink(live) == entry["target"]
+
+        return (
+            stat.S_ISREG(info.st_mode)
+            and [info.st_size, info.st_mtime_ns] == [previous["size"], previous.get("mtime_ns")]
+        )
+
+    def place(self, source, live, entry):
+        """
+        Written next to the target and renamed over it: a running slurmd
+        keeps its mapped binary and plugins, which an in-place cp would
+        rewrite underneath it
+        """
+        tmp_path = f"{live}.manifest.{os.getpid()}"
+
+        try:
+            if entry["type"] == "link":
+                os.symlink(entry["target"], tmp_path)
+            else:
+                shutil.copy2(source, tmp_path)
+                os.chown(tmp_path, 0, 0)
+
+            os.replace(tmp_path, live)
+        except BaseException:
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if entry["type"] == "file":
+            entry["mtime_ns"] = os.lstat(live).st_mtime_ns
+
+        return entry.get("size", 0)
+
+    def mkdir(self, path):
+        """0755 whatever the umask or the staged directory's mode"""
+        os.mkdir(path)
+        os.chmod(path, 0o755)
+
+    def unlink(self, path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def prune(self, directories):
+        """Removes the given directories deepest first, where they are empty; returns the ones left"""
+        kept = []
+
+        for directory in sorted(directories, key=lambda path: path.count(os.sep), reverse=True):
+            try:
+                os.rmdir(directory)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                kept.append(directory)
+
+        return kept
+
+    def commit(self, stage, target="/"):
+        """
+        Installs stage over target; returns {"changed", "unchanged",
+        "removed", "bytes"} where bytes is what was actually copied
+        """
+        if not os.path.isdir(stage):
+            raise Exception(f"Nothing was staged for {self.name} at {stage}.")
+
+        old = self.load() or {"files": {}, "dirs": []}
+        if old.get("target", target) != target:
+            old = {"files": {}, "dirs": []}
+
+        files, dirs = self.scan(stage)
+        live = lambda member: os.path.join(target, member)
+
+        # Parents first; only directories this install creates are its to remove later.
+        # Existing ones (/usr, /etc/systemd, ...) keep their mode and owner untouched
+        created = [directory for directory in old["dirs"] if os.path.isdir(directory)]
+        for member in sorted(dirs):
+            if not os.path.isdir(live(member)):
+                self.mkdir(live(member))
+                created.append(live(member))
+
+        changed = []
+        for member, entry in files.items():
+            previous = old["files"].get(member)
+
+            if self.unchanged(live(member), entry, previous):
+                entry["mtime_ns"] = previous.get("mtime_ns")
+            else:
+                changed.append(member)
+
+        stale = [live(member) for member in old["files"] if member not in files]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            copied = sum(pool.map(
+                lambda member: self.place(f"{stage}/{member}", live(member), files[member]),
+                changed
+            ))
+            removed = sum(pool.map(self.unlink, stale))
+
+        wanted = {live(member) for member in dirs}
+        created = [directory for directory in created if directory in wanted] + self.prune(
+            directory for directory in created if directory not in wanted
+        )
+
+        self.save({"name": self.name, "target": target, "files": files, "dirs": sorted(set(created))})
+
+        return {"changed": len(changed), "unchanged": len(files) - len(changed),
+                "removed": removed, "bytes": copied}
+
+    # -----------------------------
+    # Uninstall
+    # -----------------------------
+    def uninstall(self):
+        """Removes every listed file and the directories the install created; None without a manifest"""
+        manifest = self.load()
+        if manifest is None:
+            return None
+
+        paths = [os.path.join(manifest["target"], member) for member in manifest["files"]]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            removed = sum(pool.map(self.unlink, paths))
+
+        # Directories that also hold someone else's files stay
+        kept = self.prune(manifest["dirs"])
+        os.remove(self.path)
+
+        return {"removed": removed, "dirs": len(manifest["dirs"]) - len(kept)}
+
+    def forget(self):
+        """Drops the manifest only, for a target that was removed as a whole"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or InstallManifest.installed():
+        manifest = InstallManifest(name).load()
+
+        if manifest is None:
+            print(f"{name}: no manifest")
+            continue
+
+        size = sum(entry.get("size", 0) for entry in manifest["files"].values())
+        print(f"{name}: {len(manifest['files'])} files ({size // 1024 ** 2} MB) under {manifest['target']}")
@@ -0,0 +1,239 @@
+import os
+import grp
+import pwd
+import sys
+import json
+import shutil
+import subprocess
+
+from common.install_manifest import InstallManifest
+
+
+class PrivilegedOperations:
+    """
+    The root-side half of PrivilegedSession: filesystem, user and systemd
+    operations done in-process instead of one sudo fork per command.
+
+    A batch is a list of {"op": name, ...arguments} dicts. Operations run
+    in order and the batch stops at the first failure, unless that
+    operation was sent with "check": false.
+    """
+
+    OPERATIONS = [
+        "mkdir", "chown", "chmod", "write_file", "read_file", "copy", "move",
+        "remove", "useradd", "userdel", "systemctl", "install_manifest", "uninstall_manifest",
+        "mysql", "add_cluster"
+    ]
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+    def ids(self, owner):
+        """"slurm:slurm" (or "slurm") -> (uid, gid)"""
+        user, _, group = owner.partition(":")
+        entry = pwd.getpwnam(user)
+        gid = grp.getgrnam(group).gr_gid if group else entry.pw_gid
+        return entry.pw_uid, gid
+
+    def command(self, command, input=None):
+        """Runs command, with input on stdin if given; returns its stdout"""
+        stdin = {"input": input} if input is not None else {"stdin": subprocess.DEVNULL}
+        result = subprocess.run(command, capture_output=True, text=True, **stdin)
+
+        if result.returncode != 0:
+            output = (result.stderr or result.stdout).strip()
+            raise Exception(f"{' '.join(command)} failed (exit {result.returncode}): {output}")
+
+        return result.stdout
+
+    # -----------------------------
+    # Filesystem
+    # -----------------------------
+    def mkdir(self, path, mode=None, owner=None):
+        os.makedirs(path, exist_ok=True)
+
+        if owner:
+            self.chown(path, owner)
+        if mode:
+            self.chmod(path, mode)
+
+    def chown(self, path, owner, recursive=False):
+        uid, gid = self.ids(owner)
+        os.chown(path, uid, gid, follow_symlinks=False)
+
+        if not recursive:
+            return
+
+        for root, dirs, files in os.walk(path):
+            for name in dirs + files:
+                os.chown(os.path.join(root, name), uid, gid, follow_symlinks=False)
+
+    def chmod(self, path, mode):
+        os.chmod(path, int(mode, 8))
+
+    def write_file(self, path, content, mode="644", owner="root:root"):
+        """Written next to the target, then renamed over it in one step"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+
+        # Private until owner and mode are final, so secrets never leak
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
+
+            self.chown(tmp_path, owner)
+            self.chmod(tmp_path, mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read_file(self, path):
+        """Contents of a file only root can read; None if it does not exist"""
+        if not os.path.exists(path):
+            return None
+
+        with open(path) as f:
+            return f.read()
+
+    def copy(self, source, target):
+        shutil.copy2(source, target)
+
+    def move(self, source, target):
+        shutil.move(source, target)
+
+    def remove(self, path):
+        """rm -rf: a missing path is not an error"""
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            os.remove(path)
+
+    # -----------------------------
+    # Staged Installs
+    # -----------------------------
+    def install_manifest(self, name, stage, target="/"):
+        return InstallManifest(name).commit(stage, target)
+
+    def uninstall_manifest(self, name):
+        return InstallManifest(name).uninstall()
+
+    # -----------------------------
+    # Users
+    # -----------------------------
+    def useradd(self, name, system=True, create_home=True):
+        try:
+            pwd.getpwnam(name)
+            return
+        except KeyError:
+            pass
+
+        command = ["useradd"]
+        if system:
+            command.append("-r")
+        if create_home:
+            command.append("-m")
+
+        self.command(command + [name])
+
+    def userdel(self, name):
+        try:
+            pwd.getpwnam(name)
+        except KeyError:
+            return
+
+        self.command(["userdel", name])
+
+    # -----------------------------
+    # systemd
+    # -----------------------------
+    def systemctl(self, verb, units=None):
+        self.command(["systemctl", verb] + list(units or []))
+
+    # -----------------------------
+    # Slurm Accounting
+    # -----------------------------
+    def mysql(self, sql, database=None):
+        """SQL over stdin, so passwords in it never reach an argv; returns the --batch output"""
+        return self.command(["mysql", "--batch"] + ([database] if database else []), input=sql)
+
+    def add_cluster(self, name):
+        self.command(["sacctmgr", "-i", "add", "cluster", name])
+
+    # -----------------------------
+    # Batches
+    # -----------------------------
+    def merge(self, operations):
+        """
+        Consecutive systemctl operations with the same verb and check
+        become one call: enable a, enable b -> systemctl enable a b
+        """
+        merged = []
+
+        for operation in operations:
+            previous = merged[-1] if merged else None
+
+            if (
+                previous
+                and operation["op"] == "systemctl" == previous["op"]
+                and operation.get("verb") == previous.get("verb")
+                and operation.get("check", True) == previous.get("check", True)
+                and operation.get("units") and previous.get("units")
+            ):
+                previous["units"] = previous["units"] + operation["units"]
+                previous["count"] += 1
+                continue
+
+            merged.append(dict(operation, count=1))
+
+        return merged
+
+    def apply(self, operations):
+        """
+        Runs a batch; returns {"ok", "results"} and on failure also
+        "error" and the index of the operation that failed
+        """
+        results = []
+        index = 0
+
+        for operation in self.merge(operations):
+            arguments = {
+                key: value for key, value in operation.items()
+                if key not in ["op", "check", "count"]
+            }
+
+            try:
+                if operation["op"] not in self.OPERATIONS:
+                    raise Exception(f"Unknown privileged operation: {operation['op']}")
+
+                result = getattr(self, operation["op"])(**arguments)
+
+            except Exception as error:
+                if operation.get("check", True):
+                    return {"ok": False, "results": results, "error": str(error), "index": index}
+                result = None
+
+            results.extend([result] * operation["count"])
+            index += operation["count"]
+
+        return {"ok": True, "results": results}
+
+    # -----------------------------
+    # Pipe Loop
+    # -----------------------------
+    def serve(self, requests=sys.stdin, responses=sys.stdout):
+        """One JSON batch per line in, one JSON response per line out"""
+        for line in requests:
+            if not line.strip():
+                continue
+
+            responses.write(json.dumps(self.apply(json.loads(line))) + "\n")
+            responses.flush()
+
+
+if __name__ == "__main__":
+    # Started by PrivilegedSession through sudo; lives until its stdin closes
+    PrivilegedOperations().serve()
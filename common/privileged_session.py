@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import atexit
+import subprocess
+
+from common.privileged_helper import PrivilegedOperations
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class PrivilegedRequests:
+    """The operations both a session and a batch accept"""
+
+    def mkdir(self, path, mode=None, owner=None):
+        return self.add({"op": "mkdir", "path": path, "mode": mode, "owner": owner})
+
+    def chown(self, path, owner, recursive=False):
+        return self.add({"op": "chown", "path": path, "owner": owner, "recursive": recursive})
+
+    def chmod(self, path, mode):
+        return self.add({"op": "chmod", "path": path, "mode": mode})
+
+    def write_file(self, path, content, mode="644", owner="root:root"):
+        return self.add({"op": "write_file", "path": path, "content": content,
+                         "mode": mode, "owner": owner})
+
+    def read_file(self, path):
+        return self.add({"op": "read_file", "path": path})
+
+    def copy(self, source, target):
+        return self.add({"op": "copy", "source": source, "target": target})
+
+    def move(self, source, target):
+        return self.add({"op": "move", "source": source, "target": target})
+
+    def remove(self, path, check=True):
+        return self.add({"op": "remove", "path": path, "check": check})
+
+    def install_manifest(self, name, stage, target="/"):
+        return self.add({"op": "install_manifest", "name": name, "stage": stage, "target": target})
+
+    def uninstall_manifest(self, name):
+        return self.add({"op": "uninstall_manifest", "name": name})
+
+    def useradd(self, name, system=True, create_home=True):
+        return self.add({"op": "useradd", "name": name, "system": system,
+                         "create_home": create_home})
+
+    def userdel(self, name, check=True):
+        return self.add({"op": "userdel", "name": name, "check": check})
+
+    def systemctl(self, verb, *units, check=True):
+        return self.add({"op": "systemctl", "verb": verb, "units": list(units), "check": check})
+
+    def mysql(self, sql, database=None):
+        return self.add({"op": "mysql", "sql": sql, "database": database})
+
+    def add_cluster(self, name):
+        return self.add({"op": "add_cluster", "name": name})
+
+
+class PrivilegedBatch(PrivilegedRequests):
+    """Collects operations; they go to the helper together when the block ends"""
+
+    def __init__(self, session):
+        self.session = session
+        self.operations = []
+
+    def add(self, operation):
+        self.operations.append(operation)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        # Nothing is sent for a block that raised part way through
+        if kind is None and self.operations:
+            self.session.submit(self.operations)
+        return False
+
+
+class PrivilegedSession(PrivilegedRequests):
+    """
+    One elevated helper for the whole run instead of a sudo fork per
+    mkdir/chown/systemctl. Operations go over a pipe as JSON lines and
+    the helper performs them in-process; sudo asks for credentials once.
+    Already root, the operations simply run in this process.
+    """
+
+    def __init__(self):
+        self.local = PrivilegedOperations() if os.geteuid() == 0 else None
+        self.helper = None
+
+    # -----------------------------
+    # Helper Process
+    # -----------------------------
+    def start(self):
+        print("Starting privileged helper (sudo)...")
+
+        # stderr stays on the terminal, so sudo can still prompt there
+        self.helper = subprocess.Popen(
+            ["sudo", sys.executable, "-m", "common.privileged_helper"],
+            cwd=BASE_DIR,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True
+        )
+        atexit.register(self.close)
+
+    def close(self):
+        if self.helper:
+            self.helper.stdin.close()
+            self.helper.wait()
+            self.helper = None
+
+    def exchange(self, operations):
+        if self.helper is None:
+            self.start()
+
+        try:
+            self.helper.stdin.write(json.dumps(operations) + "\n")
+            self.helper.stdin.flush()
+            line = self.helper.stdout.readline()
+        except BrokenPipeError:
+            line = ""
+
+        if not line:
+            code = self.helper.wait()
+            self.helper = None
+            raise Exception(f"Privileged helper exited (code {code}); was sudo refused?")
+
+        return json.loads(line)
+
+    # -----------------------------
+    # Requests
+    # -----------------------------
+    def submit(self, operations):
+        """Runs a batch in order; returns one result per operation"""
+        if self.local:
+            # The same JSON round trip the helper would make, minus the pipe
+            response = self.local.apply(json.loads(json.dumps(operations)))
+        else:
+            response = self.exchange(operations)
+
+        if not response["ok"]:
+            failed = operations[response["index"]]
+            raise Exception(f"Privileged {failed['op']} failed: {response['error']}")
+
+        return response["results"]
+
+    def add(self, operation):
+        return self.submit([operation])[0]
+
+    def batch(self):
+        return PrivilegedBatch(self)
+
+
+_session = None
+
+
+def privileged_session():
+    """The session for this run; every module shares the same helper"""
+    global _session
+
+    if _session is None:
+        _session = PrivilegedSession()
+
+    return _session
+
+
+if __name__ == "__main__":
+    session = privileged_session()
+    mode = "in-process (root)" if session.local else "helper via sudo"
+    print(f"Privileged operations: {mode}")
+    print(f"Helper answers: {session.submit([{'op': 'read_file', 'path': '/etc/hostname'}])}")
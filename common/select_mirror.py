@@ -0,0 +1,334 @@
+import os
+import sys
+import json
+import time
+import socket
+import http.client
+import urllib.error
+import urllib.request
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from common.verify_source import SourceVerifier, VerificationFailed
+
+
+class MirrorSelector:
+
+    # The first entry is the origin the installers' source_url() points at
+    DEFAULT_MIRRORS = {
+        "gcc": [
+            "https://ftp.gnu.org/gnu/gcc/",
+            "https://ftpmirror.gnu.org/gcc/",
+            "https://mirrors.kernel.org/gnu/gcc/",
+            "https://sourceware.org/pub/gcc/releases/"
+        ],
+        "gcc-prerequisites": [
+            "http://gcc.gnu.org/pub/gcc/infrastructure/",
+            "https://gcc.gnu.org/pub/gcc/infrastructure/",
+            "https://sourceware.org/pub/gcc/infrastructure/"
+        ],
+        "python": ["https://www.python.org/ftp/python/"],
+        "openmpi": ["https://download.open-mpi.org/release/open-mpi/"],
+        "hwloc": ["https://download.open-mpi.org/release/hwloc/"],
+        "libevent": ["https://github.com/libevent/libevent/releases/download/"],
+        "pmix": ["https://github.com/openpmix/openpmix/releases/download/"],
+        "openblas": ["https://github.com/OpenMathLib/OpenBLAS/releases/download/"],
+        "fftw": ["https://www.fftw.org/"],
+        "slurm": ["https://download.schedmd.com/slurm/"]
+    }
+
+    CHUNK_SIZE = 1024 * 1024
+    PROBE_BYTES = 256 * 1024
+
+    def __init__(self):
+        self.home = str(Path.home())
+        self.config_path = os.getenv(
+            "HPC_MIRRORS_FILE", f"{self.home}/.config/hpcctl/mirrors.json"
+        )
+        self.cache_path = f"{self.home}/.cache/hpcctl/mirrors.json"
+
+        # Rankings are per site: the fastest mirror depends on where the node is
+        self.site = os.getenv("HPC_SITE") or self.default_site()
+        self.ttl = float(os.getenv("HPC_MIRROR_TTL", "86400"))
+        self.timeout = float(os.getenv("HPC_DOWNLOAD_TIMEOUT", "30"))
+        self.mirrors = self.load_config()
+
+    # -----------------------------
+    # Configuration
+    # -----------------------------
+    def default_site(self):
+        """DNS domain of this node, e.g. node01.hpc.example.org -> hpc.example.org"""
+        fqdn = socket.getfqdn()
+        return fqdn.split(".", 1)[1] if "." in fqdn else "default"
+
+    def load_config(self):
+        """
+        mirrors.json maps package -> list of base URLs, tried in addition to
+        the origin, e.g. {"gcc": ["http://10.0.0.5/gnu/gcc/"]}.
+        """
+        mirrors = {package: list(bases) for package, bases in self.DEFAULT_MIRRORS.items()}
+
+        if os.path.exists(self.config_path):
+            with open(self.config_path) as f:
+                for package, bases in json.load(f).items():
+                    mirrors[package] = [
+                        base if base.endswith("/") else base + "/" for base in bases
+                    ] + mirrors.get(package, [])
+
+        return mirrors
+
+    def strip_scheme(self, url):
+        return url.split("://", 1)[-1]
+
+    def candidates(self, package, url):
+        """The same file on every configured mirror; the origin URL is always included"""
+        bases = list(dict.fromkeys(self.mirrors.get(package, [])))
+
+        for base in bases:
+            if self.strip_scheme(url).startswith(self.strip_scheme(base)):
+                relative = self.strip_scheme(url)[len(self.strip_scheme(base)):]
+                return [b + relative for b in bases], bases
+
+        return [url], [url]
+
+    # -----------------------------
+    # Probe
+    # -----------------------------
+    def probe(self, url):
+        """Connect latency and short-burst throughput for one mirror"""
+        request = urllib.request.Request(
+            url, headers={"Range": f"bytes=0-{self.PROBE_BYTES - 1}"}
+        )
+        start = time.monotonic()
+
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                latency = time.monotonic() - start
+                size = self.total_size(response)
+                received = len(response.read(self.PROBE_BYTES))
+        except (urllib.error.URLError, http.client.HTTPException, OSError, ValueError):
+            return None
+
+        elapsed = max(time.monotonic() - start - latency, 1e-3)
+        throughput = received / elapsed
+
+        # Expected time to fetch the whole file from this mirror
+        score = latency + (size or received) / max(throughput, 1)
+
+        return {"latency": latency, "throughput": throughput, "score": score}
+
+    def total_size(self, response):
+        content_range = response.headers.get("Content-Range", "")
+
+        if "/" in content_range and not content_range.endswith("*"):
+            return int(content_range.rsplit("/", 1)[1])
+
+        length = response.headers.get("Content-Length")
+        return int(length) if length else None
+
+    def rank(self, package, url):
+        """Candidate URLs, fastest first; reuses this site's cached ranking"""
+        urls, bases = self.candidates(package, url)
+
+        if len(urls) == 1:
+            return urls
+
+        cached = self.cached_ranking(package)
+
+        if cached and set(cached) == set(bases):
+            return [urls[bases.index(base)] for base in cached]
+
+        print(f"Probing {len(urls)} mirrors for {package}...")
+
+        with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+            results = list(pool.map(self.probe, urls))
+
+        ranked = sorted(
+            (result["score"], index)
+            for index, result in enumerate(results)
+            if result
+        )
+
+        for score, index in ranked:
+            result = results[index]
+            print(
+                f"  {bases[index]}: {result['latency'] * 1000:.0f} ms, "
+                f"{result['throughput'] / 1024 ** 2:.1f} MiB/s"
+            )
+
+        # Unreachable mirrors go last, not away: they may be back by the next attempt
+        order = [index for _, index in ranked]
+        order += [index for index in range(len(urls)) if index not in order]
+
+        self.save_ranking(package, [bases[index] for index in order])
+
+        return [urls[index] for index in order]
+
+    # -----------------------------
+    # Per-site Cache
+    # -----------------------------
+    def load_cache(self):
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def cached_ranking(self, package):
+        entry = self.load_cache().get(self.site, {}).get(package)
+
+        if not entry or time.time() - entry["probed_at"] > self.ttl:
+            return None
+
+        return entry["ranking"]
+
+    def save_ranking(self, package, ranking):
+        cache = self.load_cache()
+        cache.setdefault(self.site, {})[package] = {
+            "ranking": ranking,
+            "probed_at": time.time()
+        }
+        self.write_cache(cache)
+
+    def forget(self, package):
+        """Drops a ranking that just failed us so the next download re-probes"""
+        cache = self.load_cache()
+
+        if cache.get(self.site, {}).pop(package, None) is not None:
+            self.write_cache(cache)
+
+    def write_cache(self, cache):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}"
+
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f, indent=2)
+
+        os.replace(tmp_path, self.cache_path)
+
+    # -----------------------------
+    # Download (resume + failover)
+    # -----------------------------
+    def fetch_small(self, package, url):
+        """Small companion file (checksums, signature) from the first mirror that has it"""
+        for candidate in self.candidates(package, url)[0]:
+            try:
+                with urllib.request.urlopen(candidate, timeout=self.timeout) as response:
+                    return response.read()
+            except (urllib.error.URLError, http.client.HTTPException, OSError, ValueError):
+                continue
+
+        return None
+
+    def fetch_from(self, url, part_path, verifier):
+        """Appends to part_path from url; returns True once the file is complete"""
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        request = urllib.request.Request(url, headers=headers)
+
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as error:
+            # 416: the partial file already holds every byte
+            if error.code == 416 and offset:
+                if verifier.position != offset:
+                    verifier.catch_up(part_path, offset)
+                return True
+            raise
+
+        with response:
+            # A server that ignores Range sends the whole file again
+            if offset and response.status != 206:
+                offset = 0
+
+            # Verification state must describe exactly the bytes before offset
+            if offset == 0:
+                verifier.reset()
+            elif verifier.position != offset:
+                verifier.catch_up(part_path, offset)
+
+            size = self.total_size(response)
+
+            with open(part_path, "r+b" if offset else "wb") as out:
+                out.seek(offset)
+                out.truncate()
+
+                while True:
+                    chunk = response.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    verifier.update(chunk)
+
+                received = out.tell()
+
+        return size is None or received >= size
+
+    def download(self, package, url, dest, attempts=3, expected=None):
+        """
+        Downloads url (or the same file from a faster mirror) to dest,
+        verified on the way in. expected: optional {algorithm: hex digest}.
+        """
+        part_path = f"{dest}.part"
+        urls = self.rank(package, url)
+        errors = []
+
+        verifier = SourceVerifier(package, url.rsplit("/", 1)[-1], expected)
+        verifier.prepare(url, lambda companion: self.fetch_small(package, companion))
+
+        for attempt in range(attempts):
+            queue = list(urls)
+
+            while queue:
+                candidate = queue.pop(0)
+                resumed = os.path.exists(part_path)
+                print(f"Downloading {candidate}")
+
+                try:
+                    if self.fetch_from(candidate, part_path, verifier):
+                        self.report(verifier.finish(), verifier)
+                        os.replace(part_path, dest)
+                        return dest
+                    errors.append(f"{candidate}: connection closed early")
+                except VerificationFailed as error:
+                    # Corrupt bytes cannot be resumed from; start over from zero
+                    os.remove(part_path)
+                    errors.append(f"{candidate}: {error}")
+
+                    # The bad bytes may have come from an earlier mirror, so give
+                    # this one a clean single-source attempt before moving on
+                    if resumed:
+                        queue.insert(0, candidate)
+                except (urllib.error.URLError, http.client.HTTPException, OSError) as error:
+                    errors.append(f"{candidate}: {error}")
+
+                # Next mirror resumes from the bytes already on disk
+                print(f"✖ {errors[-1]}; failing over")
+                self.forget(package)
+
+            if attempt < attempts - 1:
+                time.sleep(2 ** attempt)
+
+        verifier.close_gpgv()
+
+        raise Exception(
+            f"Could not download {os.path.basename(dest)}:\n" + "\n".join(errors)
+        )
+
+    def report(self, checked, verifier):
+        if checked:
+            print(f"✔ {verifier.name} verified: {', '.join(checked)}")
+        else:
+            print(
+                f"⚠ Nothing published to verify {verifier.name} against; "
+                f"its sha256 is now pinned in {verifier.pins_path}"
+            )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python3 -m common.select_mirror <package> <url>")
+        sys.exit(1)
+
+    for ranked_url in MirrorSelector().rank(sys.argv[1], sys.argv[2]):
+        print(ranked_url)
@@ -0,0 +1,175 @@
+import time
+import asyncio
+
+
+async def communicate(process, data=None):
+    """process.communicate(), but a probe cancelled by its timeout takes the child down with it"""
+    try:
+        return await process.communicate(data)
+    except asyncio.CancelledError:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+        raise
+
+
+class SystemdProbe:
+    """
+    Reads ActiveState from systemd. Type=notify units only turn "active"
+    after they send READY=1 via sd_notify, so this doubles as the
+    notify-based readiness signal.
+    """
+
+    def __init__(self, unit):
+        self.unit = unit
+
+    async def check(self):
+        process = await asyncio.create_subprocess_exec(
+            "systemctl", "show", self.unit,
+            "-p", "ActiveState", "-p", "SubState", "-p", "Result",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        output, _ = await communicate(process)
+
+        props = dict(
+            line.split("=", 1)
+            for line in output.decode().splitlines()
+            if "=" in line
+        )
+        state = props.get("ActiveState", "unknown")
+
+        if state == "active":
+            return True, f"{self.unit} active", False
+
+        # A failed unit will not recover by waiting; stop polling it
+        if state == "failed":
+            return False, f"{self.unit} failed ({props.get('Result', '?')})", True
+
+        return False, f"{self.unit} {state}/{props.get('SubState', '?')}", False
+
+
+class SocketProbe:
+    """Ready once the daemon accepts connections on its port"""
+
+    def __init__(self, port, host="127.0.0.1", timeout=0.5):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    async def check(self):
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port),
+                self.timeout
+            )
+        except (OSError, asyncio.TimeoutError):
+            return False, f"port {self.port} not accepting", False
+
+        writer.close()
+        await writer.wait_closed()
+        return True, f"port {self.port} accepting", False
+
+
+class MungeProbe:
+    """Full credential round-trip: munge -n | unmunge"""
+
+    async def check(self):
+        try:
+            encode = await asyncio.create_subprocess_exec(
+                "munge", "-n",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            return False, "munge not installed", True
+
+        credential, _ = await communicate(encode)
+
+        if encode.returncode != 0:
+            return False, "munge -n failed", False
+
+        decode = await asyncio.create_subprocess_exec(
+            "unmunge",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        await communicate(decode, credential)
+
+        if decode.returncode != 0:
+            return False, "unmunge rejected credential", False
+
+        return True, "munge round-trip ok", False
+
+
+class ReadinessWaiter:
+
+    # Probes per service, checked in order on every attempt
+    SERVICES = {
+        "munge": lambda: [SystemdProbe("munge"), MungeProbe()],
+        "mariadb": lambda: [SystemdProbe("mariadb"), SocketProbe(3306)],
+        "slurmctld": lambda: [SystemdProbe("slurmctld"), SocketProbe(6817)],
+        "slurmd": lambda: [SystemdProbe("slurmd"), SocketProbe(6818)],
+        "slurmdbd": lambda: [SystemdProbe("slurmdbd"), SocketProbe(6819)],
+    }
+
+    def __init__(self, deadline=60, initial_delay=0.05, max_delay=1.0):
+        self.deadline = deadline
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+
+    # -----------------------------
+    # Poll One Service
+    # -----------------------------
+    async def wait_one(self, name, end):
+        probes = self.SERVICES[name]()
+        delay = self.initial_delay
+        start = time.monotonic()
+
+        while True:
+            ready = True
+            detail = ""
+
+            for probe in probes:
+                # A hung systemctl or munge must not hold the wait past its deadline
+                try:
+                    ok, detail, fatal = await asyncio.wait_for(probe.check(), end - time.monotonic())
+                except asyncio.TimeoutError:
+                    return name, False, "no answer before the deadline", time.monotonic() - start
+
+                if fatal:
+                    return name, False, detail, time.monotonic() - start
+                if not ok:
+                    ready = False
+                    break
+
+            if ready:
+                return name, True, detail, time.monotonic() - start
+
+            if time.monotonic() + delay > end:
+                return name, False, detail, time.monotonic() - start
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_delay)
+
+    # -----------------------------
+    # Wait On Many Services
+    # -----------------------------
+    async def wait_all(self, names, deadline):
+        end = time.monotonic() + deadline
+        return await asyncio.gather(*(self.wait_one(name, end) for name in names))
+
+    def wait(self, names, deadline=None, quiet=False):
+        """Waits concurrently for every named service; True if all became ready"""
+        results = asyncio.run(self.wait_all(names, deadline or self.deadline))
+
+        for name, ready, detail, elapsed in results:
+            if quiet and ready:
+                continue
+            mark = "✔" if ready else "✖"
+            print(f"{mark} {name}: {detail} ({elapsed:.2f}s)")
+
+        return all(ready for _, ready, _, _ in results)
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import fcntl
+from contextlib import contextmanager
+from pathlib import Path
+
+from common.trash_reaper import TrashReaper
+
+
+class SourceStore:
+
+    INDEX_NAME = ".store.json"
+    LOCK_NAME = ".store.lock"
+    DEFAULT_BUDGET = "20G"
+    UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+    def __init__(self):
+        self.home = str(Path.home())
+        self.root = f"{self.home}/hpc_sources"
+        self.index_path = os.path.join(self.root, self.INDEX_NAME)
+        self.lock_path = os.path.join(self.root, self.LOCK_NAME)
+
+        # Budget can be overridden, e.g. HPC_SOURCES_BUDGET=50G
+        self.budget = self.parse_size(
+            os.getenv("HPC_SOURCES_BUDGET", self.DEFAULT_BUDGET)
+        )
+        self.reaper = TrashReaper()
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+    def parse_size(self, value):
+        value = value.strip().upper().rstrip("B")
+
+        if value and value[-1] in self.UNITS:
+            return int(float(value[:-1]) * self.UNITS[value[-1]])
+
+        return int(value)
+
+    def format_size(self, size):
+        for unit in ["B", "K", "M", "G"]:
+            if size < 1024:
+                return f"{size:.1f}{unit}"
+            size /= 1024
+        return f"{size:.1f}T"
+
+    def entry_size(self, path):
+        if not os.path.isdir(path) or os.path.islink(path):
+            return os.lstat(path).st_size
+
+        total = 0
+        stack = [path]
+
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+
+        return total
+
+    def managed_entries(self):
+        """Everything in the store except its own bookkeeping"""
+        if not os.path.isdir(self.root):
+            return []
+
+        return [
+            item for item in os.listdir(self.root)
+            if not item.startswith(".")
+        ]
+
+    # -----------------------------
+    # Index (last use + size)
+    # -----------------------------
+    @contextmanager
+    def index(self):
+        """Locked read-modify-write of the index; removers may run concurrently"""
+        os.makedirs(self.root, exist_ok=True)
+
+        with open(self.lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            index = {}
+            if os.path.exists(self.index_path):
+                with open(self.index_path) as f:
+                    index = json.load(f)
+
+            yield index
+
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(index, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+
+    def touch(self, name):
+        """Marks a tarball or tree as just used"""
+        path = os.path.join(self.root, name)
+
+        with self.index() as index:
+            index[name] = {
+                "last_used": time.time(),
+                "size": self.entry_size(path)
+            }
+
+    def forget(self, name):
+        with self.index() as index:
+            index.pop(name, None)
+
+    # -----------------------------
+    # Garbage Collection
+    # -----------------------------
+    def release_build_tree(self, name):
+        """Drops an extracted/build tree once its install succeeded"""
+        path = os.path.join(self.root, name)
+
+        if os.path.isdir(path):
+            self.reaper.discard(path)
+            self.forget(name)
+            self.reaper.start()
+            print(f"✔ Released build tree: {name}")
+
+    def enforce_budget(self, keep=()):
+        """Evicts least-recently-used entries until the store fits its budget"""
+        with self.index() as index:
+            entries = self.managed_entries()
+
+            # Drop index records for entries removed behind our back
+            for name in list(index):
+                if name not in entries:
+                    del index[name]
+
+            # Untracked entries (e.g. left by a failed build) age by mtime
+            for name in entries:
+                if name not in index:
+                    path = os.path.join(self.root, name)
+                    index[name] = {
+                        "last_used": os.lstat(path).st_mtime,
+                        "size": self.entry_size(path)
+                    }
+
+            total = sum(record["size"] for record in index.values())
+
+            if total <= self.budget:
+                return
+
+            print(
+                f"Source store uses {self.format_size(total)}, "
+                f"budget is {self.format_size(self.budget)}. Evicting..."
+            )
+
+            by_age = sorted(index.items(), key=lambda item: item[1]["last_used"])
+
+            for name, record in by_age:
+                if total <= self.budget:
+                    break
+                if name in keep:
+                    continue
+
+                path = os.path.join(self.root, name)
+                if os.path.isdir(path) and not os.path.islink(path):
+                    self.reaper.discard(path)
+                else:
+                    os.remove(path)
+
+                del index[name]
+                total -= record["size"]
+                print(f"✔ Evicted {name} ({self.format_size(record['size'])})")
+
+        self.reaper.start()
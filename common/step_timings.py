@@ -0,0 +1,168 @@
+import os
+import json
+import time
+from pathlib import Path
+
+from system_check.host_facts import get_facts
+
+
+class StepTimings:
+
+    # Keep the most recent runs per step; old hardware/software drifts
+    HISTORY = 10
+
+    def __init__(self):
+        self.home = str(Path.home())
+        self.path = f"{self.home}/hpc/.timings.json"
+        self.hardware = self.describe_hardware()
+
+    # -----------------------------
+    # Hardware Fingerprint
+    # -----------------------------
+    def describe_hardware(self):
+        facts = get_facts()
+        cpu = facts.get("cpu")
+        mem_gb = round(facts.get("memory")["total_bytes"] / 1024 ** 3)
+
+        return {"cpus": cpu["cpus"], "model": cpu["model"], "mem_gb": mem_gb}
+
+    def hardware_key(self, hardware=None):
+        hardware = hardware or self.hardware
+        return f"{hardware['cpus']}c/{hardware['mem_gb']}g/{hardware['model']}"
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self, data):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+    def step_name(self, package, step, note=""):
+        return f"{package}/{step} [{note}]" if note else f"{package}/{step}"
+
+    def variant(self, func):
+        """
+        The installer's plan note for this step (cached, download, full
+        build, already installed, ...), so a skipped download is not timed
+        as if it were a real one; "" for steps outside any plan
+        """
+        plan = getattr(getattr(func, "__self__", None), "plan", None)
+        if plan is None:
+            return ""
+
+        try:
+            return dict(plan()).get(func.__name__, "")
+        except Exception:
+            return ""
+
+    def record(self, package, step, seconds, note=""):
+        data = self.load()
+
+        entry = data.setdefault(self.hardware_key(), {
+            "hardware": self.hardware,
+            "steps": {}
+        })
+
+        history = entry["steps"].setdefault(self.step_name(package, step, note), [])
+        history.append(round(seconds, 2))
+        del history[:-self.HISTORY]
+
+        self.save(data)
+
+    def run(self, package, func, *args):
+        """Runs an installer step and records its duration if it succeeds"""
+        # Taken before the step runs: afterwards the tarball is always "cached"
+        note = self.variant(func)
+
+        start = time.monotonic()
+        started_at = time.time()
+        ok = False
+
+        try:
+            result = func(*args)
+            ok = True
+        finally:
+            self.trace(package, func.__name__, started_at, ok)
+
+        self.record(package, func.__name__, time.monotonic() - start, note)
+        return result
+
+    def trace(self, package, step, started_at, ok):
+        """Appends the step to HPC_TRACE_FILE (JSON lines), e.g. for the benchmarks"""
+        path = os.getenv("HPC_TRACE_FILE")
+        if not path:
+            return
+
+        event = {
+            "kind": "step",
+            "name": f"{package}/{step}",
+            "start": started_at,
+            "end": time.time(),
+            "ok": ok
+        }
+
+        # One short O_APPEND write per event, so concurrent writers never interleave
+        with open(path, "a") as f:
+            f.write(json.dumps(event) + "\n")
+
+    # -----------------------------
+    # Estimation
+    # -----------------------------
+    def median(self, values):
+        ordered = sorted(values)
+        middle = len(ordered) // 2
+
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+    def estimate(self, package, step, note=""):
+        """
+        Returns (seconds, source) or (None, None) for the step as the plan
+        notes it. Timings from this exact hardware win; otherwise the
+        closest CPU count is used, with build steps scaled by the core ratio.
+        """
+        data = self.load()
+        name = self.step_name(package, step, note)
+
+        own = data.get(self.hardware_key(), {}).get("steps", {}).get(name)
+        if own:
+            return self.median(own), "this hardware"
+
+        candidates = [
+            entry for entry in data.values()
+            if entry.get("steps", {}).get(name)
+        ]
+
+        if not candidates:
+            return None, None
+
+        cpus = self.hardware["cpus"]
+        nearest = min(
+            candidates,
+            key=lambda entry: (
+                entry["hardware"]["model"] != self.hardware["model"],
+                abs(entry["hardware"]["cpus"] - cpus)
+            )
+        )
+
+        seconds = self.median(nearest["steps"][name])
+
+        if "build" in step:
+            seconds *= nearest["hardware"]["cpus"] / cpus
+
+        return seconds, f"{nearest['hardware']['cpus']}-core node"
@@ -0,0 +1,103 @@
+import os
+import glob
+import shutil
+import subprocess
+from pathlib import Path
+
+
+class Toolchain:
+    """
+    The compilers the math libraries are built with: the newest GCC
+    installed by the framework (HPC_GCC_VERSION pins one), else the system
+    GCC. Also resolves what -march=native means for that compiler, which
+    keys the tuned install prefixes, and finds the framework Python.
+    """
+
+    def __init__(self):
+        self.home = str(Path.home())
+        self.gcc_dir = self.find_gcc()
+
+        if self.gcc_dir:
+            self.cc = f"{self.gcc_dir}/bin/gcc"
+            self.cxx = f"{self.gcc_dir}/bin/g++"
+        else:
+            self.cc = shutil.which("gcc") or "gcc"
+            self.cxx = shutil.which("g++") or "g++"
+
+        # The framework GCC is built for C/C++ only; Fortran may come from the system
+        framework_fc = f"{self.gcc_dir}/bin/gfortran" if self.gcc_dir else None
+        self.fc = framework_fc if framework_fc and os.path.exists(framework_fc) else "gfortran"
+
+    # -----------------------------
+    # Locate Installs
+    # -----------------------------
+    def find_install(self, package, binary):
+        """
+        ~/hpc/<package>/<HPC_<PACKAGE>_VERSION> if that is pinned, else the
+        newest version there; None unless bin/<binary> exists
+        """
+        pinned = os.getenv(f"HPC_{package.upper()}_VERSION")
+        if pinned:
+            path = f"{self.home}/hpc/{package}/{pinned}"
+            return path if os.path.exists(f"{path}/bin/{binary}") else None
+
+        installs = [
+            path for path in glob.glob(f"{self.home}/hpc/{package}/*")
+            if os.path.exists(f"{path}/bin/{binary}")
+        ]
+        installs.sort(key=lambda path: [
+            int(part) if part.isdigit() else 0
+            for part in os.path.basename(path).split(".")
+        ])
+
+        return installs[-1] if installs else None
+
+    def find_gcc(self):
+        return self.find_install("gcc", "gcc")
+
+    def find_python(self):
+        return self.find_install("python", "python3")
+
+    def describe(self):
+        return f"framework GCC {os.path.basename(self.gcc_dir)}" if self.gcc_dir else "system GCC"
+
+    # -----------------------------
+    # Target
+    # -----------------------------
+    def march(self):
+        """What -march=native resolves to, e.g. znver3; the machine name if unknown"""
+        try:
+            result = subprocess.run(
+                [self.cc, "-march=native", "-Q", "--help=target"],
+                capture_output=True,
+                text=True
+            )
+        except FileNotFoundError:
+            return os.uname().machine
+
+        for line in result.stdout.splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[0] in ["-march=", "-mcpu="]:
+                return parts[1]
+
+        return os.uname().machine
+
+    def env(self):
+        env = dict(os.environ)
+
+        env["CC"] = self.cc
+        env["CXX"] = self.cxx
+        env["FC"] = self.fc
+        env["CFLAGS"] = f"{env.get('CFLAGS', '')} -O3 -march=native".strip()
+
+        if self.gcc_dir:
+            # Built programs find the framework's libgcc/libstdc++ first
+            paths = [f"{self.gcc_dir}/lib64", env.get("LD_LIBRARY_PATH")]
+            env["LD_LIBRARY_PATH"] = ":".join(path for path in paths if path)
+
+        return env
+
+
+if __name__ == "__main__":
+    toolchain = Toolchain()
+    print(f"{toolchain.describe()}: {toolchain.cc}, Fortran: {toolchain.fc}, -march={toolchain.march()}")
@@ -0,0 +1,215 @@
+import os
+import sys
+import time
+import fcntl
+import threading
+import subprocess
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TrashReaper:
+
+    TRASH_NAME = ".hpc_trash"
+    CLAIM_PREFIX = ".reaping-"
+
+    def __init__(self, workers=None):
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.pending = []
+        self.lock = threading.Lock()
+
+    # -----------------------------
+    # Move Into Trash
+    # -----------------------------
+    def trash_dir_for(self, path):
+        """Trash lives next to the target so the rename never crosses filesystems"""
+        parent = os.path.dirname(os.path.abspath(path))
+        return os.path.join(parent, self.TRASH_NAME)
+
+    def discard(self, path):
+        """Atomically renames path into the trash and queues it for reaping"""
+        if not os.path.lexists(path):
+            return None
+
+        # Files hardlinked with other versions get their modes back there first
+        from common.dedup_prefixes import PrefixDeduplicator
+        PrefixDeduplicator().forget(path)
+
+        trash_dir = self.trash_dir_for(path)
+        target = os.path.join(
+            trash_dir,
+            f"{os.path.basename(path)}.{os.getpid()}.{time.time_ns()}"
+        )
+
+        # A reaper may remove an empty trash dir between makedirs and rename
+        for attempt in range(3):
+            os.makedirs(trash_dir, exist_ok=True)
+            try:
+                os.rename(path, target)
+                break
+            except FileNotFoundError:
+                if not os.path.lexists(path) or attempt == 2:
+                    raise
+
+        with self.lock:
+            self.pending.append(target)
+
+        return target
+
+    # -----------------------------
+    # Background Reaper
+    # -----------------------------
+    def abandoned(self, path):
+        """A claim whose reaper died: nobody holds its lock any more"""
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return False
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+        finally:
+            os.close(fd)
+
+    def claim(self, trash_dir):
+        """
+        Moves everything in trash_dir into a new claim directory, locked for
+        the reaper that gets it; returns (claim, locked fd), or None if there
+        is nothing to claim. A rename only succeeds once and claims are made
+        under a lock on trash_dir, so concurrent start() calls never give
+        the same item to two reapers.
+        """
+        try:
+            dir_fd = os.open(trash_dir, os.O_RDONLY | os.O_DIRECTORY)
+        except (FileNotFoundError, PermissionError):
+            return None
+
+        try:
+            fcntl.flock(dir_fd, fcntl.LOCK_EX)
+
+            # Claims of interrupted reapers are taken over like any other item
+            items = [
+                item for item in os.listdir(trash_dir)
+                if not item.startswith(self.CLAIM_PREFIX)
+                or self.abandoned(os.path.join(trash_dir, item))
+            ]
+            if not items:
+                return None
+
+            claim = os.path.join(trash_dir, f"{self.CLAIM_PREFIX}{os.getpid()}.{time.time_ns()}")
+            os.mkdir(claim, 0o700)
+            fd = os.open(claim, os.O_RDONLY | os.O_DIRECTORY)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+
+            for item in items:
+                try:
+                    os.rename(os.path.join(trash_dir, item), os.path.join(claim, item))
+                except FileNotFoundError:
+                    pass
+
+            return claim, fd
+        except (FileNotFoundError, PermissionError):
+            # trash_dir was reaped away meanwhile, or is not ours to empty
+            return None
+        finally:
+            os.close(dir_fd)
+
+    def start(self):
+        """Hands queued trash to a detached reaper process and returns at once"""
+        with self.lock:
+            paths, self.pending = self.pending, []
+
+        claims = [self.claim(trash_dir) for trash_dir in sorted({os.path.dirname(path) for path in paths})]
+        claims = [claim for claim in claims if claim]
+
+        if not claims:
+            return
+
+        # The reaper inherits the locked fds and holds the claims until it exits
+        try:
+            subprocess.Popen(
+                [sys.executable, "-m", "common.trash_reaper"] + [claim for claim, _ in claims],
+                cwd=BASE_DIR,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+                pass_fds=[fd for _, fd in claims]
+            )
+        finally:
+            for _, fd in claims:
+                os.close(fd)
+
+    # -----------------------------
+    # Parallel Deletion
+    # -----------------------------
+    def clear_directory(self, path):
+        """Unlinks every non-directory entry and returns the sub-directories"""
+        subdirs = []
+
+        try:
+            entries = list(os.scandir(path))
+        except FileNotFoundError:
+            return subdirs
+        except PermissionError:
+            os.chmod(path, 0o700)
+            entries = list(os.scandir(path))
+
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+        return subdirs
+
+    def reap(self, paths):
+        # Only the detached reaper process needs the thread pool
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+        directories = []
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = set()
+
+            for path in paths:
+                if os.path.isdir(path) and not os.path.islink(path):
+                    directories.append(path)
+                    running.add(pool.submit(self.clear_directory, path))
+                else:
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+
+            while running:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    for subdir in future.result():
+                        directories.append(subdir)
+                        running.add(pool.submit(self.clear_directory, subdir))
+
+        # Every directory was queued after its parent, so reversed order is leaves first
+        for directory in reversed(directories):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+
+        for trash_dir in {os.path.dirname(path) for path in paths}:
+            try:
+                os.rmdir(trash_dir)
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    TrashReaper().reap(sys.argv[1:])
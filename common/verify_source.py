@@ -0,0 +1,212 @@
+import os
+import json
+import hashlib
+import tempfile
+import subprocess
+from pathlib import Path
+
+
+class VerificationFailed(Exception):
+    pass
+
+
+class SourceVerifier:
+    """
+    Checks a download while it streams in: every chunk is fed to the
+    hashes (and to gpgv when a signature is available), so the result is
+    known the moment the last byte lands, without reading the file again.
+    """
+
+    # Checksum files published next to the tarballs: package -> (algorithm, file name)
+    PUBLISHED_SUMS = {
+        "gcc": ("sha512", "sha512.sum")
+    }
+
+    # Detached signature suffix; checked only if the trust store has a keyring
+    SIGNATURES = {
+        "gcc": ".sig",
+        "python": ".asc",
+        "openmpi": ".asc",
+        "slurm": ".asc"
+    }
+
+    def __init__(self, package, name, expected=None):
+        self.home = str(Path.home())
+        self.package = package
+        self.name = name
+
+        # Trust store: sums.json with pinned digests, keyrings/<package>.gpg
+        self.trust_dir = os.getenv("HPC_TRUST_STORE", f"{self.home}/.config/hpcctl/trust")
+        self.pins_path = f"{self.trust_dir}/sums.json"
+        self.keyring = f"{self.trust_dir}/keyrings/{package}.gpg"
+
+        # Refuse files nothing can vouch for, instead of trusting on first use
+        self.require = os.getenv("HPC_REQUIRE_VERIFIED") == "1"
+
+        # (algorithm, hex digest, where the expectation came from)
+        self.expected = [
+            (algorithm, digest.lower(), "caller")
+            for algorithm, digest in (expected or {}).items()
+        ]
+        self.signature = None
+        self.signature_path = None
+
+        self.hashes = {}
+        self.gpgv = None
+        self.position = 0
+
+    # -----------------------------
+    # Gather Expectations
+    # -----------------------------
+    def load_pins(self):
+        try:
+            with open(self.pins_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def parse_sums(self, text):
+        """'<digest>  <file>' lines, as written by sha256sum/sha512sum"""
+        for line in text.splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[1].lstrip("*") == self.name:
+                return parts[0].lower()
+        return None
+
+    def prepare(self, url, fetch):
+        """Collects sums and signature before the download; fetch(url) -> bytes or None"""
+        for algorithm, digest in self.load_pins().get(self.name, {}).items():
+            self.expected.append((algorithm, digest, "trust store"))
+
+        if self.package in self.PUBLISHED_SUMS:
+            algorithm, sums_name = self.PUBLISHED_SUMS[self.package]
+            sums = fetch(f"{url.rsplit('/', 1)[0]}/{sums_name}")
+            digest = self.parse_sums(sums.decode(errors="replace")) if sums else None
+
+            if digest:
+                self.expected.append((algorithm, digest, f"published {sums_name}"))
+
+        suffix = self.SIGNATURES.get(self.package)
+
+        if suffix and os.path.exists(self.keyring):
+            self.signature = fetch(url + suffix)
+
+            if self.signature is None:
+                raise VerificationFailed(f"Signature {self.name}{suffix} is not available.")
+
+        if not self.expected and not self.signature and self.require:
+            raise VerificationFailed(
+                f"No checksum or signature for {self.name} and HPC_REQUIRE_VERIFIED=1."
+            )
+
+        self.reset()
+
+    # -----------------------------
+    # Streaming
+    # -----------------------------
+    def reset(self):
+        """Called whenever the download (re)starts from byte zero"""
+        self.close_gpgv()
+
+        # sha256 is always kept: it is what gets pinned in the trust store
+        algorithms = {"sha256"} | {algorithm for algorithm, _, _ in self.expected}
+        self.hashes = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+        self.position = 0
+
+        if self.signature:
+            fd, self.signature_path = tempfile.mkstemp(suffix=".sig")
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.signature)
+
+            self.gpgv = subprocess.Popen(
+                ["gpgv", "--keyring", self.keyring, self.signature_path, "-"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+
+    def update(self, chunk):
+        for digest in self.hashes.values():
+            digest.update(chunk)
+
+        if self.gpgv:
+            try:
+                self.gpgv.stdin.write(chunk)
+            except BrokenPipeError:
+                # gpgv gave up early (e.g. unusable keyring); finish() reports it
+                pass
+
+        self.position += len(chunk)
+
+    def catch_up(self, path, offset):
+        """Resuming a .part from an earlier run: hash the bytes already on disk once"""
+        self.reset()
+
+        with open(path, "rb") as f:
+            while self.position < offset:
+                chunk = f.read(min(1024 * 1024, offset - self.position))
+                if not chunk:
+                    break
+                self.update(chunk)
+
+    def close_gpgv(self):
+        if self.gpgv:
+            self.gpgv.kill()
+            self.gpgv.wait()
+            self.gpgv = None
+
+        if self.signature_path:
+            os.remove(self.signature_path)
+            self.signature_path = None
+
+    # -----------------------------
+    # Verdict
+    # -----------------------------
+    def finish(self):
+        """Raises VerificationFailed on any mismatch; returns what vouched for the file"""
+        checked = []
+
+        for algorithm, digest, source in self.expected:
+            actual = self.hashes[algorithm].hexdigest()
+
+            if actual != digest:
+                self.close_gpgv()
+                raise VerificationFailed(
+                    f"{self.name}: {algorithm} mismatch against {source} "
+                    f"(expected {digest[:16]}..., got {actual[:16]}...)"
+                )
+            checked.append(f"{algorithm} ({source})")
+
+        if self.gpgv:
+            # communicate() closes stdin, which tells gpgv the data is complete
+            _, error = self.gpgv.communicate()
+            returncode = self.gpgv.returncode
+            self.gpgv = None
+            self.close_gpgv()
+
+            if returncode != 0:
+                raise VerificationFailed(
+                    f"{self.name}: bad signature\n{error.decode(errors='replace').strip()}"
+                )
+            checked.append(f"signature ({os.path.basename(self.keyring)})")
+
+        self.pin()
+        return checked
+
+    def pin(self):
+        """Remembers the sha256 so later downloads from any mirror must match it"""
+        pins = self.load_pins()
+        entry = pins.setdefault(self.name, {})
+
+        if entry.get("sha256") == self.hashes["sha256"].hexdigest():
+            return
+
+        entry["sha256"] = self.hashes["sha256"].hexdigest()
+
+        os.makedirs(self.trust_dir, exist_ok=True)
+        tmp_path = f"{self.pins_path}.{os.getpid()}"
+
+        with open(tmp_path, "w") as f:
+            json.dump(pins, f, indent=2, sort_keys=True)
+
+        os.replace(tmp_path, self.pins_path)
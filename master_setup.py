@@ -1,6 +1,5 @@
 import os
 import sys
-import time
 import subprocess
 
 from system_check.detect_os import OSDetector
@@ -8,10 +7,20 @@ from slurm.preprocess_slurm import SlurmPreprocessor
 from slurm.install_slurm import SlurmInstaller
 from modules.install_python_module import PythonInstaller
 from modules.install_openmpi_module import OpenMPIInstaller
+from modules.install_pmix_module import PMIxInstaller
+from modules.install_openblas_module import OpenBLASInstaller
+from modules.install_fftw_module import FFTWInstaller
+from modules.build_wheelhouse import WheelhouseBuilder
+from tuning.apply_profile import NodeTuner
+from common.step_timings import StepTimings
+from common.service_readiness import ReadinessWaiter
 
 
 class HPCFramework:
 
+    def __init__(self):
+        self.timings = StepTimings()
+
     def check_root(self):
         if os.geteuid() != 0:
             print("Run as root: sudo python3 master_setup.py")
@@ -20,22 +29,25 @@ class HPCFramework:
     def verify_munge(self):
         print("Verifying Munge...")
 
-        if subprocess.run(
-            ["systemctl", "is-active", "--quiet", "munge"]
-        ).returncode != 0:
+        waiter = ReadinessWaiter()
+
+        # One quick probe first; only restart when Munge is actually down
+        if not waiter.wait(["munge"], deadline=1, quiet=True):
             subprocess.run(["systemctl", "restart", "munge"])
 
-        if subprocess.run(
-            ["systemctl", "is-active", "--quiet", "munge"]
-        ).returncode != 0:
-            print("Munge failed. Stopping setup.")
-            sys.exit(1)
+            if not waiter.wait(["munge"], deadline=30):
+                print("Munge failed. Stopping setup.")
+                sys.exit(1)
 
         print("✔ Munge running.")
 
     def verify_slurm(self):
         print("Verifying Slurm...")
-        time.sleep(2)
+
+        # Poll both daemons concurrently instead of sleeping a fixed time
+        if not ReadinessWaiter().wait(["slurmctld", "slurmd"], deadline=60):
+            print("Slurm installed but not responding.")
+            return
 
         result = subprocess.run(
             ["sinfo"],
@@ -58,6 +70,13 @@ class HPCFramework:
         detector.detect()
         print("===== OS CHECK COMPLETE =====")
 
+        # Before the builds, so they already run with the performance governor
+        self.timings.run("tuning", NodeTuner().apply)
+
+        # Slurm and OpenMPI are both configured against this PMIx, so it goes first
+        print("Setting up PMIx...")
+        PMIxInstaller().install()
+
         preprocessor = SlurmPreprocessor()
         slurm_status = preprocessor.check()
 
@@ -74,7 +93,7 @@ class HPCFramework:
             print("Unknown Slurm status.")
             sys.exit(1)
 
-        self.verify_munge()
+        self.timings.run("setup", self.verify_munge)
 
         print("--------------------------------")
         print("Setting up Python...")
@@ -84,9 +103,21 @@ class HPCFramework:
         print("Setting up OpenMPI...")
         OpenMPIInstaller().install()
 
+        print("--------------------------------")
+        print("Setting up OpenBLAS...")
+        OpenBLASInstaller().install()
+
+        print("--------------------------------")
+        print("Setting up FFTW...")
+        FFTWInstaller().install()
+
+        print("--------------------------------")
+        print("Setting up wheelhouse...")
+        WheelhouseBuilder().install()
+
         print("--------------------------------")
 
-        self.verify_slurm()
+        self.timings.run("setup", self.verify_slurm)
 
         print("===== HPC FRAMEWORK SETUP COMPLETE =====")
 
@@ -0,0 +1,265 @@
+import subprocess
+import os
+import sys
+import glob
+import tarfile
+import platform
+from pathlib import Path
+from common.step_timings import StepTimings
+from common.command_engine import CommandEngine
+from common.toolchain import Toolchain
+from system_check.host_facts import get_facts
+
+
+class WheelhouseBuilder:
+    """
+    Builds mpi4py and numpy once per node type against the framework's
+    OpenMPI, then creates a venv from those wheels with --no-index.
+    """
+
+    DEFAULT_PACKAGES = "numpy mpi4py"
+
+    # meson-python asks for these at build time when the node lacks them;
+    # no pyproject.toml lists them, so an offline bundle carries them anyway
+    BUILD_EXTRAS = ["ninja", "patchelf"]
+
+    def __init__(self):
+        from modules.install_openmpi_module import OpenMPIInstaller
+
+        self.home = str(Path.home())
+        self.timings = StepTimings()
+        self.engine = CommandEngine("wheelhouse")
+
+        self.enabled = os.getenv("HPC_WHEELHOUSE", "1") != "0"
+        self.packages = os.getenv("HPC_WHEELHOUSE_PACKAGES", self.DEFAULT_PACKAGES).split()
+
+        self.toolchain = Toolchain()
+        self.python_dir = self.toolchain.find_python()
+        self.python = f"{self.python_dir}/bin/python3" if self.python_dir else None
+
+        self.mpi_version = OpenMPIInstaller().VERSION
+        self.mpi_dir = f"{self.home}/hpc/openmpi/{self.mpi_version}"
+        self.mpicc = f"{self.mpi_dir}/bin/mpicc"
+
+        self.arch = self.target_arch()
+
+        # Wheels only fit the interpreter, MPI build and CPU they were made for
+        key = f"py{self.python_version()}-openmpi{self.mpi_version}-{self.arch}"
+        self.wheelhouse = f"{self.home}/hpc/wheelhouse/{key}"
+        self.venv_dir = f"{self.home}/hpc/venv/{key}"
+
+        self.offline = os.getenv("HPC_OFFLINE") == "1"
+
+        # Offline, the sdists and their build requirements come from the bundle
+        self.sources = os.getenv("HPC_WHEELHOUSE_SOURCES", f"{self.home}/hpc_sources/.wheelhouse-sources")
+
+    # -----------------------------
+    # Key
+    # -----------------------------
+    def python_version(self):
+        return os.path.basename(self.python_dir) if self.python_dir else "none"
+
+    def target_arch(self):
+        """Microarchitecture that -march=native resolves to, e.g. x86_64-znver3"""
+        machine = get_facts().get("cpu")["machine"]
+        march = self.toolchain.march()
+
+        return machine if march == machine else f"{machine}-{march}"
+
+    # -----------------------------
+    # Utility Runner
+    # -----------------------------
+    def run(self, command, timeout=None, env=None):
+        self.engine.run(command, timeout=timeout, env=env)
+
+    def build_env(self):
+        env = dict(os.environ)
+
+        # mpi4py picks its MPI from MPICC; put ours first for anything else that looks
+        env["MPICC"] = self.mpicc
+        env["PATH"] = f"{self.mpi_dir}/bin:{env.get('PATH', '')}"
+        env["CFLAGS"] = f"{env.get('CFLAGS', '')} -O3 -march=native".strip()
+
+        return env
+
+    # -----------------------------
+    # Build Wheels
+    # -----------------------------
+    def wheel_name(self, package):
+        return package.replace("-", "_").lower()
+
+    def missing_wheels(self):
+        present = {
+            os.path.basename(path).split("-")[0].lower()
+            for path in glob.glob(f"{self.wheelhouse}/*.whl")
+        }
+        return [package for package in self.packages if self.wheel_name(package) not in present]
+
+    def build_wheels(self):
+        print("==== Building Wheelhouse ====")
+        print(f"Target: {self.arch}, MPI: {self.mpicc}")
+
+        missing = self.missing_wheels()
+
+        if not missing:
+            print("Wheelhouse already complete.")
+            return
+
+        if self.offline and not os.path.isdir(self.sources):
+            raise Exception(f"Wheels missing for {', '.join(missing)} and HPC_OFFLINE=1 (no sources in {self.sources}).")
+
+        os.makedirs(self.wheelhouse, exist_ok=True)
+
+        for package in missing:
+            command = [
+                self.python, "-m", "pip", "wheel",
+                "--no-binary", package,
+                "--no-deps",
+                "--wheel-dir", self.wheelhouse
+            ]
+
+            # The isolated build env installs its requirements from there too
+            if self.offline:
+                command += ["--no-index", "--find-links", self.sources]
+
+            # numpy builds with meson: tune its SIMD baseline for this CPU
+            if package == "numpy":
+                command.append("-Csetup-args=-Dcpu-baseline=native")
+
+            self.run(command + [package], env=self.build_env())
+
+    # -----------------------------
+    # Sources For Offline Bundles
+    # -----------------------------
+    def build_requires(self, sdist):
+        """[build-system] requires of an sdist; pip's setuptools default without a pyproject.toml"""
+        try:
+            import tomllib
+        except ImportError:
+            # Python < 3.11: the same parser as a package
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise Exception("Bundling the wheelhouse needs Python 3.11+ or tomli (pip install tomli).")
+
+        with tarfile.open(sdist) as tar:
+            member = next((
+                member for member in tar.getmembers()
+                if member.name.count("/") == 1 and member.name.endswith("/pyproject.toml")
+            ), None)
+
+            if member is None:
+                return ["setuptools", "wheel"]
+
+            config = tomllib.load(tar.extractfile(member))
+
+        return config.get("build-system", {}).get("requires", ["setuptools", "wheel"])
+
+    def download_sources(self, dest, python_version):
+        """
+        The sdists build_wheels() needs, plus wheels of their build
+        requirements for the given Python on this platform, into dest
+        """
+        pip = [sys.executable, "-m", "pip", "download", "--dest", dest]
+
+        self.run(pip + ["--no-deps", "--no-binary", ":all:"] + self.packages)
+
+        requires = set(self.BUILD_EXTRAS)
+        for sdist in glob.glob(f"{dest}/*.tar.gz"):
+            requires.update(self.build_requires(sdist))
+
+        # Bundles only install on the OS they were made on, so this glibc is theirs too
+        machine = get_facts().get("cpu")["machine"]
+        glibc = platform.libc_ver()[1].replace(".", "_")
+
+        self.run(pip + [
+            "--only-binary", ":all:",
+            "--implementation", "cp",
+            "--python-version", ".".join(python_version.split(".")[:2]),
+            "--platform", f"manylinux_{glibc}_{machine}"
+        ] + sorted(requires))
+
+    # -----------------------------
+    # Create Venv
+    # -----------------------------
+    def create_venv(self):
+        print("==== Creating Venv From Wheelhouse ====")
+
+        if not os.path.exists(f"{self.venv_dir}/bin/python"):
+            self.run([self.python, "-m", "venv", self.venv_dir])
+
+        # No index: only the wheels built here, so mpi4py always links our OpenMPI
+        self.run([
+            f"{self.venv_dir}/bin/python", "-m", "pip", "install",
+            "--no-index",
+            "--find-links", self.wheelhouse
+        ] + self.packages)
+
+    # -----------------------------
+    # Verify
+    # -----------------------------
+    def verify(self):
+        print("==== Verifying Venv ====")
+
+        script = (
+            "import mpi4py, numpy; "
+            "print(numpy.__version__); "
+            "print(mpi4py.get_config().get('mpicc', ''))"
+        )
+        result = subprocess.run(
+            [f"{self.venv_dir}/bin/python", "-c", script],
+            capture_output=True,
+            text=True
+        )
+
+        if result.returncode != 0:
+            print(result.stderr)
+            raise Exception("Wheelhouse venv verification failed.")
+
+        numpy_version, mpicc = result.stdout.split("\n")[:2]
+
+        if mpicc and not mpicc.startswith(self.mpi_dir):
+            raise Exception(f"mpi4py was built against {mpicc}, not {self.mpicc}.")
+
+        print(f"✔ numpy {numpy_version}, mpi4py linked to {self.mpi_dir}")
+
+    # -----------------------------
+    # Plan (dry run)
+    # -----------------------------
+    def plan(self):
+        """Steps install() would run on this node; nothing is executed"""
+        if not self.enabled:
+            return []
+
+        missing = self.missing_wheels()
+
+        return [
+            ("build_wheels", f"build {', '.join(missing)}" if missing else "cached"),
+            ("create_venv", "existing" if os.path.exists(self.venv_dir) else "new"),
+            ("verify", "")
+        ]
+
+    # -----------------------------
+    # Main Flow
+    # -----------------------------
+    def install(self):
+        if not self.enabled:
+            print("Wheelhouse disabled (HPC_WHEELHOUSE=0).")
+            return
+
+        if not self.python:
+            raise Exception("Framework Python not installed. Run: hpcctl --module python")
+
+        if not os.path.exists(self.mpicc):
+            raise Exception("Framework OpenMPI not installed. Run: hpcctl --module openmpi")
+
+        self.timings.run("wheelhouse", self.build_wheels)
+        self.timings.run("wheelhouse", self.create_venv)
+        self.timings.run("wheelhouse", self.verify)
+
+        print("==== Wheelhouse Ready ====")
+        print(f"Activate with: source {self.venv_dir}/bin/activate")
+
+
+if __name__ == "__main__":
+    WheelhouseBuilder().install()
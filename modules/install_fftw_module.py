@@ -0,0 +1,393 @@
+import subprocess
+import tempfile
+import shutil
+import os
+from pathlib import Path
+from common.generate_modulefile import ModulefileGenerator
+from common.source_store import SourceStore
+from common.step_timings import StepTimings
+from common.command_engine import CommandEngine
+from common.build_sandbox import BuildSandbox
+from common.select_mirror import MirrorSelector
+from common.toolchain import Toolchain
+from system_check.host_facts import get_facts
+
+
+class FFTWInstaller:
+    """
+    FFTW 3 in double and single precision, each with the MPI, pthreads
+    and OpenMP variants, using the SIMD kernels this CPU supports. MPI is
+    the framework's OpenMPI, so the prefix is keyed by the OpenMPI version
+    as well as the microarchitecture.
+    """
+
+    # Both precisions build out of one pristine tree (VPATH) into one prefix
+    PRECISIONS = {
+        "double": [],
+        "float": ["--enable-float"]
+    }
+
+    FFT_CHECK = r"""
+#include <math.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+#include <fftw3.h>
+
+static double now(void)
+{
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return t.tv_sec + t.tv_nsec * 1e-9;
+}
+
+/* GFLOP/s of a forward transform of size n on the given number of threads */
+static double throughput(int n, int threads, double *error)
+{
+    fftw_complex *in = fftw_alloc_complex(n), *out = fftw_alloc_complex(n), *back = fftw_alloc_complex(n);
+    int repeats = 20;
+
+    fftw_plan_with_nthreads(threads);
+    fftw_plan forward = fftw_plan_dft_1d(n, in, out, FFTW_FORWARD, FFTW_MEASURE);
+    fftw_plan backward = fftw_plan_dft_1d(n, out, back, FFTW_BACKWARD, FFTW_MEASURE);
+
+    for (int i = 0; i < n; i++) {
+        in[i][0] = sin(i * 0.001);
+        in[i][1] = cos(i * 0.003);
+    }
+
+    double start = now();
+    for (int r = 0; r < repeats; r++)
+        fftw_execute(forward);
+    double elapsed = now() - start;
+
+    fftw_execute(backward);
+    *error = 0.0;
+    for (int i = 0; i < n; i++)
+        *error = fmax(*error, fabs(back[i][0] / n - in[i][0]) + fabs(back[i][1] / n - in[i][1]));
+
+    fftw_destroy_plan(forward);
+    fftw_destroy_plan(backward);
+    fftw_free(in);
+    fftw_free(out);
+    fftw_free(back);
+
+    return 5.0 * n * log2(n) * repeats / elapsed / 1e9;
+}
+
+int main(int argc, char **argv)
+{
+    int n = 1 << 20;
+    int threads = argc > 1 ? atoi(argv[1]) : 1;
+    double error_one, error_all;
+
+    fftw_init_threads();
+    fftw_set_timelimit(10.0);
+
+    double one = throughput(n, 1, &error_one);
+    double all = throughput(n, threads, &error_all);
+
+    printf("%.2f %.2f %.3g\n", one, all, fmax(error_one, error_all));
+    return 0;
+}
+"""
+
+    def __init__(self):
+        from modules.install_openmpi_module import OpenMPIInstaller
+
+        # Default version (can override via env variable)
+        self.VERSION = os.getenv("HPC_FFTW_VERSION", "3.3.10")
+
+        self.home = str(Path.home())
+        self.toolchain = Toolchain()
+
+        self.mpi_version = OpenMPIInstaller().VERSION
+        self.mpi_dir = f"{self.home}/hpc/openmpi/{self.mpi_version}"
+        self.mpicc = f"{self.mpi_dir}/bin/mpicc"
+
+        # One build per microarchitecture and MPI, e.g. 3.3.10-znver3-openmpi4.1.6
+        self.build_name = f"{self.VERSION}-{self.toolchain.march()}-openmpi{self.mpi_version}"
+        self.install_dir = f"{self.home}/hpc/fftw/{self.build_name}"
+
+        self.src_dir = f"{self.home}/hpc_sources"
+        self.store = SourceStore()
+        self.timings = StepTimings()
+        self.engine = CommandEngine("fftw")
+        self.mirrors = MirrorSelector()
+
+        self.tar_name = f"fftw-{self.VERSION}.tar.gz"
+        self.src_folder = f"fftw-{self.VERSION}"
+
+        self.enabled = os.getenv("HPC_FFTW", "1") != "0"
+
+        # Offline installs get packages and sources from a bundle
+        self.offline = os.getenv("HPC_OFFLINE") == "1"
+
+    # -----------------------------
+    # Configure Options
+    # -----------------------------
+    def simd_options(self, precision):
+        """FFTW's SIMD codelets this CPU can run; FFTW does not probe them itself"""
+        cpu = get_facts().get("cpu")
+        flags = set(cpu["flags"])
+
+        if cpu["machine"] == "aarch64":
+            return ["--enable-neon"]
+
+        options = []
+
+        if precision == "float" and "sse" in flags:
+            options.append("--enable-sse")
+        if "sse2" in flags:
+            options.append("--enable-sse2")
+        if "avx" in flags:
+            options.append("--enable-avx")
+        if "avx2" in flags:
+            options.append("--enable-avx2")
+        if "avx512f" in flags:
+            options.append("--enable-avx512")
+
+        return options
+
+    def configure_options(self, precision):
+        return [
+            f"--prefix={self.install_dir}",
+            "--enable-shared",
+            "--enable-threads",
+            "--enable-openmp",
+            "--enable-mpi",
+            f"MPICC={self.mpicc}"
+        ] + self.PRECISIONS[precision] + self.simd_options(precision)
+
+    # -----------------------------
+    # Utility Runner
+    # -----------------------------
+    def run(self, command, timeout=None):
+        # Output goes to a compressed per-step log; the tail is shown on failure
+        self.engine.run(command, timeout=timeout, env=self.toolchain.env())
+
+    # -----------------------------
+    # Detect Package Manager
+    # -----------------------------
+    def detect_package_manager(self):
+        pkg_manager = get_facts().package_manager()
+
+        if pkg_manager is None:
+            raise Exception("Unsupported Linux distribution.")
+
+        return pkg_manager
+
+    # -----------------------------
+    # Install Dependencies
+    # -----------------------------
+    def dependency_packages(self, pkg_manager):
+        if pkg_manager == "apt":
+            return ["build-essential", "make", "wget", "curl"]
+
+        elif pkg_manager == "dnf":
+            return ["gcc", "make", "wget", "curl"]
+
+        return []
+
+    def install_dependencies(self, pkg_manager):
+        print("==== Installing Dependencies ====")
+
+        if self.offline:
+            print("Dependencies provided by offline bundle.")
+            return
+
+        packages = self.dependency_packages(pkg_manager)
+
+        if pkg_manager == "apt":
+            self.run(["sudo", "apt", "update"])
+            self.run(["sudo", "apt", "install", "-y"] + packages)
+
+        elif pkg_manager == "dnf":
+            self.run(["sudo", "dnf", "install", "-y"] + packages)
+
+    # -----------------------------
+    # Download Source
+    # -----------------------------
+    def source_url(self):
+        return f"https://www.fftw.org/{self.tar_name}"
+
+    def download_source(self):
+        print("==== Downloading FFTW ====")
+
+        os.makedirs(self.src_dir, exist_ok=True)
+        os.chdir(self.src_dir)
+
+        if not os.path.exists(self.tar_name):
+            if self.offline:
+                raise Exception(f"{self.tar_name} is missing from the offline bundle.")
+            self.mirrors.download("fftw", self.source_url(), self.tar_name)
+        else:
+            print("Source already downloaded.")
+
+        self.store.touch(self.tar_name)
+
+    # -----------------------------
+    # Build & Install
+    # -----------------------------
+    def build_and_install(self):
+        print("==== Extracting ====")
+
+        os.chdir(self.src_dir)
+
+        if not os.path.exists(self.src_folder):
+            self.run(["tar", "-xf", self.tar_name])
+
+        # The extracted tree stays pristine; the build writes to a throwaway overlay
+        sandbox = BuildSandbox("fftw", self.src_folder).open()
+
+        try:
+            for precision in self.PRECISIONS:
+                build_dir = f"build-{precision}"
+
+                print(f"==== Building {precision} precision (MPI, threads, OpenMP) ====")
+                self.run(sandbox.wrap(["mkdir", "-p", build_dir]))
+                self.run(sandbox.wrap(["../configure"] + self.configure_options(precision), subdir=build_dir))
+                self.run(sandbox.wrap(["make", f"-j{os.cpu_count()}"], subdir=build_dir))
+                self.run(sandbox.wrap(["make", "install", f"DESTDIR={sandbox.stage}"], subdir=build_dir))
+
+            # Both precisions are staged; they land in the prefix together
+            sandbox.commit_prefix(self.install_dir)
+        finally:
+            sandbox.discard()
+
+    # -----------------------------
+    # Source Store Cleanup
+    # -----------------------------
+    def collect_garbage(self):
+        # The tarball stays cached; the build tree is no longer needed
+        os.chdir(self.src_dir)
+        self.store.release_build_tree(self.src_folder)
+        self.store.enforce_budget(keep=[self.tar_name])
+
+    # -----------------------------
+    # Generate Modulefile
+    # -----------------------------
+    def generate_modulefile(self):
+        self.modulefile = ModulefileGenerator("fftw", self.build_name, self.install_dir)
+        self.modulefile.generate()
+
+    # -----------------------------
+    # Verify Installation (FFT throughput)
+    # -----------------------------
+    def expected_libraries(self):
+        return [
+            f"libfftw3{suffix}{variant}.so"
+            for suffix in ["", "f"]
+            for variant in ["", "_mpi", "_threads", "_omp"]
+        ]
+
+    def fft_throughput(self):
+        """GFLOP/s of a 2^20-point complex FFT on one and on all cores, and the round-trip error"""
+        work_dir = tempfile.mkdtemp(prefix="fftw-check-")
+
+        try:
+            source = f"{work_dir}/fft.c"
+            binary = f"{work_dir}/fftw-check"
+
+            with open(source, "w") as f:
+                f.write(self.FFT_CHECK)
+
+            subprocess.run([
+                self.toolchain.cc, "-O2", "-o", binary, source,
+                f"-I{self.install_dir}/include",
+                f"-L{self.install_dir}/lib", f"-Wl,-rpath,{self.install_dir}/lib",
+                "-lfftw3_threads", "-lfftw3", "-lm", "-lpthread"
+            ], check=True, env=self.toolchain.env())
+
+            result = subprocess.run(
+                [binary, str(os.cpu_count() or 1)],
+                capture_output=True, text=True, check=True, env=self.toolchain.env()
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        one, all_cores, error = result.stdout.split()[:3]
+        return float(one), float(all_cores), float(error)
+
+    def verify(self):
+        print("==== Verifying Installation ====")
+
+        missing = [
+            library for library in self.expected_libraries()
+            if not os.path.exists(f"{self.install_dir}/lib/{library}")
+        ]
+
+        if missing:
+            raise Exception(f"FFTW installation incomplete, missing: {', '.join(missing)}")
+
+        one, all_cores, error = self.fft_throughput()
+
+        if error > 1e-6:
+            raise Exception(f"FFTW round trip returned wrong results (max error {error}).")
+
+        print("✔ FFTW Installed Successfully (double/float, MPI, threads, OpenMP)")
+        print(f"FFT 2^20: {one:.1f} GFLOP/s on 1 thread, {all_cores:.1f} GFLOP/s on {os.cpu_count()}")
+
+        # Optional floor per node type, e.g. HPC_FFT_MIN_GFLOPS=5
+        minimum = os.getenv("HPC_FFT_MIN_GFLOPS")
+        if minimum and one < float(minimum):
+            raise Exception(f"FFT reached {one:.1f} GFLOP/s, below HPC_FFT_MIN_GFLOPS={minimum}.")
+
+    # -----------------------------
+    # Plan (dry run)
+    # -----------------------------
+    def plan(self):
+        """Steps install() would run on this node; nothing is executed"""
+        if not self.enabled:
+            return []
+
+        if os.path.exists(f"{self.install_dir}/lib/libfftw3_mpi.so"):
+            return [
+                ("generate_modulefile", "already installed"),
+                ("verify", "already installed")
+            ]
+
+        tarball = os.path.join(self.src_dir, self.tar_name)
+
+        return [
+            ("install_dependencies", "system packages"),
+            ("download_source", "cached" if os.path.exists(tarball) else "download"),
+            ("build_and_install", "double + float"),
+            ("collect_garbage", "release build tree"),
+            ("generate_modulefile", "new version"),
+            ("verify", "FFT throughput")
+        ]
+
+    # -----------------------------
+    # Main Install Flow
+    # -----------------------------
+    def install(self):
+
+        if not self.enabled:
+            print("FFTW disabled (HPC_FFTW=0).")
+            return
+
+        if not os.path.exists(self.mpicc):
+            raise Exception("Framework OpenMPI not installed. Run: hpcctl --module openmpi")
+
+        # Skip if already installed
+        if os.path.exists(f"{self.install_dir}/lib/libfftw3_mpi.so"):
+            print("FFTW already installed.")
+            self.generate_modulefile()
+            self.verify()
+            return
+
+        pkg_manager = self.detect_package_manager()
+        self.timings.run("fftw", self.install_dependencies, pkg_manager)
+        self.timings.run("fftw", self.download_source)
+        self.timings.run("fftw", self.build_and_install)
+        self.timings.run("fftw", self.collect_garbage)
+        self.timings.run("fftw", self.generate_modulefile)
+        self.timings.run("fftw", self.verify)
+
+        print("==== FFTW Installation Complete ====")
+        print(self.modulefile.usage_hint())
+
+if __name__ == "__main__":
+    installer = FFTWInstaller()
+    installer.install()
@@ -1,25 +1,48 @@
 import subprocess
 import os
 import re
-import requests
+import glob
+import tarfile
 from pathlib import Path
+from common.generate_modulefile import ModulefileGenerator
+from common.source_store import SourceStore
+from common.step_timings import StepTimings
+from common.command_engine import CommandEngine
+from common.build_sandbox import BuildSandbox
+from common.select_mirror import MirrorSelector
+from system_check.host_facts import get_facts
 
 
 class GCCInstaller:
 
-    def __init__(self):
+    def __init__(self, resolve_version=True):
         self.home = str(Path.home())
-        self.install_dir = f"{self.home}/hpc/gcc"
         self.src_dir = f"{self.home}/hpc_sources"
-
-        self.VERSION = self.get_latest_gcc_version()
+        self.store = SourceStore()
+        self.timings = StepTimings()
+        self.engine = CommandEngine("gcc")
+        self.mirrors = MirrorSelector()
+
+        # Pinned version (e.g. from an offline bundle) skips the lookup; a plan
+        # (resolve_version=False) stays offline and goes by what is on disk
+        self.VERSION = os.getenv("HPC_GCC_VERSION")
+        if not self.VERSION:
+            self.VERSION = self.get_latest_gcc_version() if resolve_version else self.local_version()
+        self.install_dir = f"{self.home}/hpc/gcc/{self.VERSION}"
         self.tar_name = f"gcc-{self.VERSION}.tar.gz"
         self.src_folder = f"gcc-{self.VERSION}"
+        self.prereq_dir = f"{self.src_dir}/gcc-prerequisites"
+
+        # Offline installs get packages and sources from a bundle
+        self.offline = os.getenv("HPC_OFFLINE") == "1"
 
     # -----------------------------
     # Fetch Latest GCC Version
     # -----------------------------
     def get_latest_gcc_version(self):
+        # Imported here: requests is slow to load and only needed for this lookup
+        import requests
+
         print("Fetching latest GCC version...")
 
         url = "https://ftp.gnu.org/gnu/gcc/"
@@ -33,44 +56,53 @@ class GCCInstaller:
         print(f"Latest GCC version detected: {latest}")
         return latest
 
+    def local_version(self):
+        """Newest version installed or with a cached tarball; None if neither"""
+        versions = [
+            os.path.basename(path) for path in glob.glob(f"{self.home}/hpc/gcc/*")
+            if os.path.exists(f"{path}/bin/gcc")
+        ]
+        if os.path.isdir(self.src_dir):
+            versions += re.findall(r"gcc-(\d+\.\d+\.\d+)\.tar\.gz", " ".join(os.listdir(self.src_dir)))
+
+        versions = [version for version in versions if re.fullmatch(r"\d+\.\d+\.\d+", version)]
+        versions.sort(key=lambda s: list(map(int, s.split("."))))
+        return versions[-1] if versions else None
+
     # -----------------------------
     # Utility Runner
     # -----------------------------
-    def run(self, command):
-        subprocess.run(command, check=True)
+    def run(self, command, timeout=None):
+        # Output goes to a compressed per-step log; the tail is shown on failure
+        self.engine.run(command, timeout=timeout)
 
     # -----------------------------
     # Detect Package Manager
     # -----------------------------
     def detect_package_manager(self):
-        if subprocess.run(["which", "apt"], stdout=subprocess.DEVNULL).returncode == 0:
-            return "apt"
-        elif subprocess.run(["which", "dnf"], stdout=subprocess.DEVNULL).returncode == 0:
-            return "dnf"
-        else:
+        pkg_manager = get_facts().package_manager()
+
+        if pkg_manager is None:
             raise Exception("Unsupported Linux distribution.")
 
+        return pkg_manager
+
     # -----------------------------
     # Install Build Dependencies
     # -----------------------------
-    def install_dependencies(self, pkg_manager):
-        print("Installing GCC build dependencies...")
-
+    def dependency_packages(self, pkg_manager):
         if pkg_manager == "apt":
-            self.run(["sudo", "apt", "update"])
-            self.run([
-                "sudo", "apt", "install", "-y",
+            return [
                 "build-essential",
                 "libgmp-dev",
                 "libmpfr-dev",
                 "libmpc-dev",
                 "wget",
                 "curl"
-            ])
+            ]
 
         elif pkg_manager == "dnf":
-            self.run([
-                "sudo", "dnf", "install", "-y",
+            return [
                 "gcc",
                 "gcc-c++",
                 "make",
@@ -79,11 +111,32 @@ class GCCInstaller:
                 "libmpc-devel",
                 "wget",
                 "curl"
-            ])
+            ]
+
+        return []
+
+    def install_dependencies(self, pkg_manager):
+        print("Installing GCC build dependencies...")
+
+        if self.offline:
+            print("Dependencies provided by offline bundle.")
+            return
+
+        packages = self.dependency_packages(pkg_manager)
+
+        if pkg_manager == "apt":
+            self.run(["sudo", "apt", "update"])
+            self.run(["sudo", "apt", "install", "-y"] + packages)
+
+        elif pkg_manager == "dnf":
+            self.run(["sudo", "dnf", "install", "-y"] + packages)
 
     # -----------------------------
     # Download Source
     # -----------------------------
+    def source_url(self):
+        return f"https://ftp.gnu.org/gnu/gcc/gcc-{self.VERSION}/{self.tar_name}"
+
     def download_source(self):
         print("Downloading GCC source...")
 
@@ -91,11 +144,56 @@ class GCCInstaller:
         os.chdir(self.src_dir)
 
         if not os.path.exists(self.tar_name):
-            url = f"https://ftp.gnu.org/gnu/gcc/gcc-{self.VERSION}/{self.tar_name}"
-            self.run(["wget", url])
+            if self.offline:
+                raise Exception(f"{self.tar_name} is missing from the offline bundle.")
+            self.mirrors.download("gcc", self.source_url(), self.tar_name)
         else:
             print("Source already downloaded.")
 
+        self.store.touch(self.tar_name)
+
+    # -----------------------------
+    # GCC Prerequisites (gmp, mpfr, mpc, isl)
+    # -----------------------------
+    def prerequisite_archives(self):
+        """Reads archive names and base URL from contrib/download_prerequisites"""
+        member = f"{self.src_folder}/contrib/download_prerequisites"
+
+        with tarfile.open(os.path.join(self.src_dir, self.tar_name)) as tar:
+            script = tar.extractfile(member).read().decode()
+
+        base_url = re.search(r"^base_url='([^']+)'", script, re.M).group(1)
+        archives = re.findall(r"^(?:gmp|mpfr|mpc|isl|gettext)='([^']+)'", script, re.M)
+
+        return [(archive, base_url + archive) for archive in archives]
+
+    def prerequisite_sums(self):
+        """sha512 of each prerequisite, as shipped in contrib/prerequisites.sha512"""
+        member = f"{self.src_folder}/contrib/prerequisites.sha512"
+
+        with tarfile.open(os.path.join(self.src_dir, self.tar_name)) as tar:
+            try:
+                text = tar.extractfile(member).read().decode()
+            except KeyError:
+                return {}
+
+        return {
+            line.split()[1]: line.split()[0]
+            for line in text.splitlines()
+            if len(line.split()) == 2
+        }
+
+    def fetch_prerequisites(self):
+        os.makedirs(self.prereq_dir, exist_ok=True)
+        sums = self.prerequisite_sums()
+
+        for archive, url in self.prerequisite_archives():
+            if not os.path.exists(os.path.join(self.prereq_dir, archive)):
+                self.mirrors.download(
+                    "gcc-prerequisites", url, os.path.join(self.prereq_dir, archive),
+                    expected={"sha512": sums[archive]} if archive in sums else None
+                )
+
     # -----------------------------
     # Build & Install
     # -----------------------------
@@ -107,47 +205,52 @@ class GCCInstaller:
         if not os.path.exists(self.src_folder):
             self.run(["tar", "-xf", self.tar_name])
 
-        os.chdir(self.src_folder)
+        # The extracted tree stays pristine; the build writes to a throwaway overlay
+        sandbox = BuildSandbox("gcc", self.src_folder).open()
 
-        print("Downloading prerequisites...")
-        if os.path.exists("contrib/download_prerequisites"):
-            self.run(["./contrib/download_prerequisites"])
+        try:
+            # Pre-fetched archives (offline bundle) make the script skip its downloads
+            if os.path.isdir(self.prereq_dir) and os.listdir(self.prereq_dir):
+                self.run(sandbox.wrap(["cp", "-rn", f"{self.prereq_dir}/.", "."]))
 
-        os.makedirs("build", exist_ok=True)
-        os.chdir("build")
+            print("Downloading prerequisites...")
+            if os.path.exists(f"{self.src_folder}/contrib/download_prerequisites"):
+                self.run(sandbox.wrap(["./contrib/download_prerequisites"]))
 
-        print("Configuring GCC...")
-        self.run([
-            "../configure",
-            f"--prefix={self.install_dir}",
-            "--enable-languages=c,c++",
-            "--disable-multilib"
-        ])
+            self.run(sandbox.wrap(["mkdir", "-p", "build"]))
 
-        print("Building GCC (this will take time)...")
-        self.run(["make", f"-j{os.cpu_count()}"])
+            print("Configuring GCC...")
+            self.run(sandbox.wrap([
+                "../configure",
+                f"--prefix={self.install_dir}",
+                "--enable-languages=c,c++",
+                "--disable-multilib"
+            ], subdir="build"))
 
-        print("Installing GCC...")
-        self.run(["make", "install"])
+            print("Building GCC (this will take time)...")
+            self.run(sandbox.wrap(["make", f"-j{os.cpu_count()}"], subdir="build"))
+
+            print("Installing GCC...")
+            self.run(sandbox.wrap(["make", "install", f"DESTDIR={sandbox.stage}"], subdir="build"))
+            sandbox.commit_prefix(self.install_dir)
+        finally:
+            sandbox.discard()
 
     # -----------------------------
-    # Update PATH
+    # Source Store Cleanup
     # -----------------------------
-    def update_environment(self):
-        bashrc = f"{self.home}/.bashrc"
-
-        if not os.path.exists(bashrc):
-            open(bashrc, "w").close()
-
-        with open(bashrc, "r") as f:
-            content = f.read()
+    def collect_garbage(self):
+        # The tarball stays cached; the multi-GB build tree is no longer needed
+        os.chdir(self.src_dir)
+        self.store.release_build_tree(self.src_folder)
+        self.store.enforce_budget(keep=[self.tar_name])
 
-        if "hpc/gcc/bin" not in content:
-            with open(bashrc, "a") as f:
-                f.write('\nexport PATH="$HOME/hpc/gcc/bin:$PATH"\n')
-            print("PATH updated in ~/.bashrc")
-        else:
-            print("PATH already configured.")
+    # -----------------------------
+    # Generate Modulefile
+    # -----------------------------
+    def generate_modulefile(self):
+        self.modulefile = ModulefileGenerator("gcc", self.VERSION, self.install_dir)
+        self.modulefile.generate()
 
     # -----------------------------
     # Verify Installation
@@ -172,6 +275,39 @@ class GCCInstaller:
         else:
             raise Exception("GCC installation failed.")
 
+    # -----------------------------
+    # Plan (dry run)
+    # -----------------------------
+    def plan(self):
+        """Steps install() would run on this node; nothing is executed"""
+        if self.VERSION is None:
+            return [
+                ("install_dependencies", "system packages"),
+                ("download_source", "latest (unresolved)"),
+                ("build_and_install", "full build"),
+                ("collect_garbage", "release build tree"),
+                ("generate_modulefile", "new version"),
+                ("verify", "")
+            ]
+
+        if os.path.exists(f"{self.install_dir}/bin/gcc"):
+            return [
+                ("generate_modulefile", "already installed"),
+                ("verify", "already installed")
+            ]
+
+        tarball = os.path.join(self.src_dir, self.tar_name)
+        tree = os.path.join(self.src_dir, self.src_folder)
+
+        return [
+            ("install_dependencies", "system packages"),
+            ("download_source", "cached" if os.path.exists(tarball) else "download"),
+            ("build_and_install", "extracted tree reused" if os.path.exists(tree) else "full build"),
+            ("collect_garbage", "release build tree"),
+            ("generate_modulefile", "new version"),
+            ("verify", "")
+        ]
+
     # -----------------------------
     # Main Install Flow
     # -----------------------------
@@ -179,19 +315,21 @@ class GCCInstaller:
 
         if os.path.exists(f"{self.install_dir}/bin/gcc"):
             print("GCC already installed.")
+            self.generate_modulefile()
             self.verify()
             return
 
         pkg_manager = self.detect_package_manager()
 
-        self.install_dependencies(pkg_manager)
-        self.download_source()
-        self.build_and_install()
-        self.update_environment()
-        self.verify()
+        self.timings.run("gcc", self.install_dependencies, pkg_manager)
+        self.timings.run("gcc", self.download_source)
+        self.timings.run("gcc", self.build_and_install)
+        self.timings.run("gcc", self.collect_garbage)
+        self.timings.run("gcc", self.generate_modulefile)
+        self.timings.run("gcc", self.verify)
 
         print("==== GCC Installation Complete ====")
-        print("Run: source ~/.bashrc")
+        print(self.modulefile.usage_hint())
 
 if __name__ == "__main__":
     installer = GCCInstaller()
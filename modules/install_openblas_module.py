@@ -0,0 +1,363 @@
+import subprocess
+import tempfile
+import shutil
+import os
+from pathlib import Path
+from common.generate_modulefile import ModulefileGenerator
+from common.source_store import SourceStore
+from common.step_timings import StepTimings
+from common.command_engine import CommandEngine
+from common.build_sandbox import BuildSandbox
+from common.select_mirror import MirrorSelector
+from common.toolchain import Toolchain
+from system_check.host_facts import get_facts
+
+
+class OpenBLASInstaller:
+    """
+    OpenBLAS (BLAS + LAPACK, OpenMP-threaded) with kernels for this node's
+    microarchitecture, built with the framework's toolchain. The prefix is
+    keyed by what -march=native resolves to, so node types sharing a home
+    directory each get their own build.
+    """
+
+    GEMM_CHECK = r"""
+#include <math.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+#include <cblas.h>
+
+static double now(void)
+{
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return t.tv_sec + t.tv_nsec * 1e-9;
+}
+
+int main(int argc, char **argv)
+{
+    int n = argc > 1 ? atoi(argv[1]) : 2048;
+    int repeats = 3;
+    double *a = malloc(sizeof(double) * n * n);
+    double *b = malloc(sizeof(double) * n * n);
+    double *c = malloc(sizeof(double) * n * n);
+
+    for (long i = 0; i < (long) n * n; i++) {
+        a[i] = 1.0;
+        b[i] = 2.0;
+    }
+
+    /* Warm-up: thread pool start and page faults stay out of the timing */
+    cblas_dgemm(CblasRowMajor, CblasNoTrans, CblasNoTrans, n, n, n, 1.0, a, n, b, n, 0.0, c, n);
+
+    double start = now();
+    for (int r = 0; r < repeats; r++)
+        cblas_dgemm(CblasRowMajor, CblasNoTrans, CblasNoTrans, n, n, n, 1.0, a, n, b, n, 0.0, c, n);
+    double elapsed = now() - start;
+
+    double error = 0.0;
+    for (long i = 0; i < (long) n * n; i += n + 1)
+        error = fmax(error, fabs(c[i] - 2.0 * n));
+
+    printf("%.2f %.3g\n", 2.0 * n * n * n * repeats / elapsed / 1e9, error);
+    return 0;
+}
+"""
+
+    def __init__(self):
+        # Default version (can override via env variable)
+        self.VERSION = os.getenv("HPC_OPENBLAS_VERSION", "0.3.28")
+
+        self.home = str(Path.home())
+        self.toolchain = Toolchain()
+        self.target = self.openblas_target()
+
+        # One build per microarchitecture, e.g. 0.3.28-znver3
+        self.build_name = f"{self.VERSION}-{self.toolchain.march()}"
+        self.install_dir = f"{self.home}/hpc/openblas/{self.build_name}"
+
+        self.src_dir = f"{self.home}/hpc_sources"
+        self.store = SourceStore()
+        self.timings = StepTimings()
+        self.engine = CommandEngine("openblas")
+        self.mirrors = MirrorSelector()
+
+        self.tar_name = f"OpenBLAS-{self.VERSION}.tar.gz"
+        self.src_folder = f"OpenBLAS-{self.VERSION}"
+
+        self.enabled = os.getenv("HPC_OPENBLAS", "1") != "0"
+
+        # Offline installs get packages and sources from a bundle
+        self.offline = os.getenv("HPC_OFFLINE") == "1"
+
+    # -----------------------------
+    # Microarchitecture -> OpenBLAS TARGET
+    # -----------------------------
+    def openblas_target(self):
+        """
+        Kernel set for this CPU from its /proc/cpuinfo flags; None builds
+        every kernel (DYNAMIC_ARCH) and picks one at run time instead.
+        HPC_OPENBLAS_TARGET overrides the detection.
+        """
+        override = os.getenv("HPC_OPENBLAS_TARGET")
+        if override:
+            return override
+
+        cpu = get_facts().get("cpu")
+        flags = set(cpu["flags"])
+
+        if cpu["machine"] == "aarch64":
+            # Arm lists "Features", not "flags"; ARMV8 runs everywhere
+            return "ARMV8"
+
+        if cpu["machine"] != "x86_64":
+            return None
+
+        if "amx_tile" in flags:
+            return "SAPPHIRERAPIDS"
+        if "avx512_bf16" in flags:
+            return "COOPERLAKE"
+        if {"avx512f", "avx512vl", "avx512bw"} <= flags:
+            return "SKYLAKEX"
+        if {"avx2", "fma"} <= flags:
+            return "ZEN" if "AMD" in cpu["model"] else "HASWELL"
+        if "avx" in flags:
+            return "SANDYBRIDGE"
+
+        return None
+
+    def make_options(self):
+        """Passed to both make and make install; install re-reads them"""
+        options = [
+            "USE_OPENMP=1",
+            f"NUM_THREADS={os.cpu_count() or 1}",
+            f"CC={self.toolchain.cc}",
+            f"FC={self.toolchain.fc}"
+        ]
+
+        if self.target:
+            options.append(f"TARGET={self.target}")
+        else:
+            options.append("DYNAMIC_ARCH=1")
+
+        return options
+
+    # -----------------------------
+    # Utility Runner
+    # -----------------------------
+    def run(self, command, timeout=None):
+        # Output goes to a compressed per-step log; the tail is shown on failure
+        self.engine.run(command, timeout=timeout, env=self.toolchain.env())
+
+    # -----------------------------
+    # Detect Package Manager
+    # -----------------------------
+    def detect_package_manager(self):
+        pkg_manager = get_facts().package_manager()
+
+        if pkg_manager is None:
+            raise Exception("Unsupported Linux distribution.")
+
+        return pkg_manager
+
+    # -----------------------------
+    # Install Dependencies
+    # -----------------------------
+    def dependency_packages(self, pkg_manager):
+        if pkg_manager == "apt":
+            return ["build-essential", "gfortran", "make", "perl", "wget", "curl"]
+
+        elif pkg_manager == "dnf":
+            return ["gcc", "gcc-gfortran", "make", "perl", "wget", "curl"]
+
+        return []
+
+    def install_dependencies(self, pkg_manager):
+        print("==== Installing Dependencies ====")
+
+        if self.offline:
+            print("Dependencies provided by offline bundle.")
+            return
+
+        packages = self.dependency_packages(pkg_manager)
+
+        if pkg_manager == "apt":
+            self.run(["sudo", "apt", "update"])
+            self.run(["sudo", "apt", "install", "-y"] + packages)
+
+        elif pkg_manager == "dnf":
+            self.run(["sudo", "dnf", "install", "-y"] + packages)
+
+    # -----------------------------
+    # Download Source
+    # -----------------------------
+    def source_url(self):
+        return (
+            "https://github.com/OpenMathLib/OpenBLAS/releases/download/"
+            f"v{self.VERSION}/{self.tar_name}"
+        )
+
+    def download_source(self):
+        print("==== Downloading OpenBLAS ====")
+
+        os.makedirs(self.src_dir, exist_ok=True)
+        os.chdir(self.src_dir)
+
+        if not os.path.exists(self.tar_name):
+            if self.offline:
+                raise Exception(f"{self.tar_name} is missing from the offline bundle.")
+            self.mirrors.download("openblas", self.source_url(), self.tar_name)
+        else:
+            print("Source already downloaded.")
+
+        self.store.touch(self.tar_name)
+
+    # -----------------------------
+    # Build & Install
+    # -----------------------------
+    def build_and_install(self):
+        print("==== Extracting ====")
+
+        os.chdir(self.src_dir)
+
+        if not os.path.exists(self.src_folder):
+            self.run(["tar", "-xf", self.tar_name])
+
+        # The extracted tree stays pristine; the build writes to a throwaway overlay
+        sandbox = BuildSandbox("openblas", self.src_folder).open()
+
+        try:
+            print(f"==== Building (TARGET={self.target or 'DYNAMIC_ARCH'}, {self.toolchain.describe()}) ====")
+            self.run(sandbox.wrap(["make", f"-j{os.cpu_count()}"] + self.make_options()))
+
+            print("==== Installing ====")
+            self.run(sandbox.wrap(
+                ["make", "install", f"PREFIX={self.install_dir}", f"DESTDIR={sandbox.stage}"]
+                + self.make_options()
+            ))
+            sandbox.commit_prefix(self.install_dir)
+        finally:
+            sandbox.discard()
+
+    # -----------------------------
+    # Source Store Cleanup
+    # -----------------------------
+    def collect_garbage(self):
+        # The tarball stays cached; the build tree is no longer needed
+        os.chdir(self.src_dir)
+        self.store.release_build_tree(self.src_folder)
+        self.store.enforce_budget(keep=[self.tar_name])
+
+    # -----------------------------
+    # Generate Modulefile
+    # -----------------------------
+    def generate_modulefile(self):
+        self.modulefile = ModulefileGenerator("openblas", self.build_name, self.install_dir)
+        self.modulefile.generate()
+
+    # -----------------------------
+    # Verify Installation (GEMM throughput)
+    # -----------------------------
+    def gemm_throughput(self):
+        """GFLOP/s of a 2048^3 dgemm on all cores, and the largest error seen"""
+        work_dir = tempfile.mkdtemp(prefix="openblas-check-")
+
+        try:
+            source = f"{work_dir}/gemm.c"
+            binary = f"{work_dir}/openblas-gemm-check"
+
+            with open(source, "w") as f:
+                f.write(self.GEMM_CHECK)
+
+            subprocess.run([
+                self.toolchain.cc, "-O2", "-o", binary, source,
+                f"-I{self.install_dir}/include",
+                f"-L{self.install_dir}/lib", f"-Wl,-rpath,{self.install_dir}/lib",
+                "-lopenblas", "-lm"
+            ], check=True, env=self.toolchain.env())
+
+            result = subprocess.run(
+                [binary], capture_output=True, text=True, check=True, env=self.toolchain.env()
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        gflops, error = result.stdout.split()[:2]
+        return float(gflops), float(error)
+
+    def verify(self):
+        print("==== Verifying Installation ====")
+
+        if not os.path.exists(f"{self.install_dir}/lib/libopenblas.so"):
+            raise Exception("OpenBLAS installation failed.")
+
+        gflops, error = self.gemm_throughput()
+
+        if error > 1e-6:
+            raise Exception(f"OpenBLAS dgemm returned wrong results (max error {error}).")
+
+        print("✔ OpenBLAS Installed Successfully")
+        print(f"dgemm 2048: {gflops:.1f} GFLOP/s on {os.cpu_count()} threads "
+              f"(TARGET={self.target or 'DYNAMIC_ARCH'})")
+
+        # Optional floor per node type, e.g. HPC_GEMM_MIN_GFLOPS=500
+        minimum = os.getenv("HPC_GEMM_MIN_GFLOPS")
+        if minimum and gflops < float(minimum):
+            raise Exception(f"dgemm reached {gflops:.1f} GFLOP/s, below HPC_GEMM_MIN_GFLOPS={minimum}.")
+
+    # -----------------------------
+    # Plan (dry run)
+    # -----------------------------
+    def plan(self):
+        """Steps install() would run on this node; nothing is executed"""
+        if not self.enabled:
+            return []
+
+        if os.path.exists(f"{self.install_dir}/lib/libopenblas.so"):
+            return [
+                ("generate_modulefile", "already installed"),
+                ("verify", "already installed")
+            ]
+
+        tarball = os.path.join(self.src_dir, self.tar_name)
+
+        return [
+            ("install_dependencies", "system packages"),
+            ("download_source", "cached" if os.path.exists(tarball) else "download"),
+            ("build_and_install", f"TARGET={self.target or 'DYNAMIC_ARCH'}"),
+            ("collect_garbage", "release build tree"),
+            ("generate_modulefile", "new version"),
+            ("verify", "dgemm throughput")
+        ]
+
+    # -----------------------------
+    # Main Install Flow
+    # -----------------------------
+    def install(self):
+
+        if not self.enabled:
+            print("OpenBLAS disabled (HPC_OPENBLAS=0).")
+            return
+
+        # Skip if already installed
+        if os.path.exists(f"{self.install_dir}/lib/libopenblas.so"):
+            print("OpenBLAS already installed.")
+            self.generate_modulefile()
+            self.verify()
+            return
+
+        pkg_manager = self.detect_package_manager()
+        self.timings.run("openblas", self.install_dependencies, pkg_manager)
+        self.timings.run("openblas", self.download_source)
+        self.timings.run("openblas", self.build_and_install)
+        self.timings.run("openblas", self.collect_garbage)
+        self.timings.run("openblas", self.generate_modulefile)
+        self.timings.run("openblas", self.verify)
+
+        print("==== OpenBLAS Installation Complete ====")
+        print(self.modulefile.usage_hint())
+
+if __name__ == "__main__":
+    installer = OpenBLASInstaller()
+    installer.install()
@@ -1,56 +1,90 @@
 import subprocess
 import os
 from pathlib import Path
+from common.generate_modulefile import ModulefileGenerator
+from common.source_store import SourceStore
+from common.step_timings import StepTimings
+from common.command_engine import CommandEngine
+from common.build_sandbox import BuildSandbox
+from common.select_mirror import MirrorSelector
+from modules.install_pmix_module import PMIxInstaller
+from system_check.host_facts import get_facts
 
 
 class OpenMPIInstaller:
 
     def __init__(self):
         # Default version (can override via env variable)
-        self.VERSION = os.getenv("OPENMPI_VERSION", "4.1.6")
+        self.VERSION = os.getenv("HPC_OPENMPI_VERSION", "4.1.6")
 
         self.home = str(Path.home())
-        self.install_dir = f"{self.home}/hpc/openmpi"
+        self.install_dir = f"{self.home}/hpc/openmpi/{self.VERSION}"
         self.src_dir = f"{self.home}/hpc_sources"
+        self.store = SourceStore()
+        self.timings = StepTimings()
+        self.engine = CommandEngine("openmpi")
+        self.mirrors = MirrorSelector()
+        self.pmix = PMIxInstaller()
 
         self.tar_name = f"openmpi-{self.VERSION}.tar.gz"
         self.src_folder = f"openmpi-{self.VERSION}"
 
+        # Offline installs get packages and sources from a bundle
+        self.offline = os.getenv("HPC_OFFLINE") == "1"
+
     # -----------------------------
     # Utility Runner
     # -----------------------------
-    def run(self, command):
-        subprocess.run(command, check=True)
+    def run(self, command, timeout=None):
+        # Output goes to a compressed per-step log; the tail is shown on failure
+        self.engine.run(command, timeout=timeout)
 
     # -----------------------------
     # Detect Package Manager
     # -----------------------------
     def detect_package_manager(self):
-        if subprocess.run(["which", "apt"], stdout=subprocess.DEVNULL).returncode == 0:
-            return "apt"
-        elif subprocess.run(["which", "dnf"], stdout=subprocess.DEVNULL).returncode == 0:
-            return "dnf"
-        else:
+        pkg_manager = get_facts().package_manager()
+
+        if pkg_manager is None:
             raise Exception("Unsupported Linux distribution.")
 
+        return pkg_manager
+
     # -----------------------------
     # Install Dependencies
     # -----------------------------
+    def dependency_packages(self, pkg_manager):
+        if pkg_manager == "apt":
+            return ["build-essential", "gcc", "g++", "make", "wget", "curl"]
+
+        elif pkg_manager == "dnf":
+            return ["gcc", "gcc-c++", "make", "wget", "curl"]
+
+        return []
+
     def install_dependencies(self, pkg_manager):
         print("==== Installing Dependencies ====")
 
+        if self.offline:
+            print("Dependencies provided by offline bundle.")
+            return
+
+        packages = self.dependency_packages(pkg_manager)
+
         if pkg_manager == "apt":
             self.run(["sudo", "apt", "update"])
-            self.run(["sudo", "apt", "install", "-y",
-                      "build-essential", "gcc", "g++", "make", "wget", "curl"])
+            self.run(["sudo", "apt", "install", "-y"] + packages)
 
         elif pkg_manager == "dnf":
-            self.run(["sudo", "dnf", "install", "-y",
-                      "gcc", "gcc-c++", "make", "wget", "curl"])
+            self.run(["sudo", "dnf", "install", "-y"] + packages)
 
     # -----------------------------
     # Download Source
     # -----------------------------
+    def source_url(self):
+        series = ".".join(self.VERSION.split(".")[:2])
+        return f"https://download.open-mpi.org/release/open-mpi/v{series}/{self.tar_name}"
+
     def download_source(self):
         print("==== Downloading OpenMPI ====")
 
@@ -58,11 +92,14 @@ class OpenMPIInstaller:
         os.chdir(self.src_dir)
 
         if not os.path.exists(self.tar_name):
-            url = f"https://download.open-mpi.org/release/open-mpi/v4.1/{self.tar_name}"
-            self.run(["wget", url])
+            if self.offline:
+                raise Exception(f"{self.tar_name} is missing from the offline bundle.")
+            self.mirrors.download("openmpi", self.source_url(), self.tar_name)
         else:
             print("Source already downloaded.")
 
+        self.store.touch(self.tar_name)
+
     # -----------------------------
     # Build & Install
     # -----------------------------
@@ -74,37 +111,40 @@ class OpenMPIInstaller:
         if not os.path.exists(self.src_folder):
             self.run(["tar", "-xf", self.tar_name])
 
-        os.chdir(self.src_folder)
+        # The extracted tree stays pristine; the build writes to a throwaway overlay
+        sandbox = BuildSandbox("openmpi", self.src_folder).open()
 
-        print("==== Configuring ====")
-        self.run(["./configure", f"--prefix={self.install_dir}"])
+        try:
+            print("==== Configuring ====")
+            # The node's PMIx (when installed) is the one slurmd serves to srun
+            self.run(sandbox.wrap(
+                ["./configure", f"--prefix={self.install_dir}"] + self.pmix.configure_args(libevent=True)
+            ))
 
-        print("==== Building ====")
-        self.run(["make", f"-j{os.cpu_count()}"])
+            print("==== Building ====")
+            self.run(sandbox.wrap(["make", f"-j{os.cpu_count()}"]))
 
-        print("==== Installing ====")
-        self.run(["make", "install"])
+            print("==== Installing ====")
+            self.run(sandbox.wrap(["make", "install", f"DESTDIR={sandbox.stage}"]))
+            sandbox.commit_prefix(self.install_dir)
+        finally:
+            sandbox.discard()
 
     # -----------------------------
-    # Update Environment
+    # Source Store Cleanup
     # -----------------------------
-    def update_environment(self):
-        bashrc = f"{self.home}/.bashrc"
-
-        if not os.path.exists(bashrc):
-            open(bashrc, "w").close()
-
-        with open(bashrc, "r") as f:
-            content = f.read()
-
-        if "hpc/openmpi/bin" not in content:
-            with open(bashrc, "a") as f:
-                f.write('\nexport PATH="$HOME/hpc/openmpi/bin:$PATH"\n')
-                f.write('export LD_LIBRARY_PATH="$HOME/hpc/openmpi/lib:$LD_LIBRARY_PATH"\n')
+    def collect_garbage(self):
+        # The tarball stays cached; the multi-GB build tree is no longer needed
+        os.chdir(self.src_dir)
+        self.store.release_build_tree(self.src_folder)
+        self.store.enforce_budget(keep=[self.tar_name])
 
-            print("Environment variables added to ~/.bashrc")
-        else:
-            print("Environment already configured.")
+    # -----------------------------
+    # Generate Modulefile
+    # -----------------------------
+    def generate_modulefile(self):
+        self.modulefile = ModulefileGenerator("openmpi", self.VERSION, self.install_dir)
+        self.modulefile.generate()
 
     # -----------------------------
     # Verify Installation
@@ -129,6 +169,29 @@ class OpenMPIInstaller:
         else:
             raise Exception("OpenMPI installation failed.")
 
+    # -----------------------------
+    # Plan (dry run)
+    # -----------------------------
+    def plan(self):
+        """Steps install() would run on this node; nothing is executed"""
+        if os.path.exists(f"{self.install_dir}/bin/mpirun"):
+            return [
+                ("generate_modulefile", "already installed"),
+                ("verify", "already installed")
+            ]
+
+        tarball = os.path.join(self.src_dir, self.tar_name)
+        tree = os.path.join(self.src_dir, self.src_folder)
+
+        return [
+            ("install_dependencies", "system packages"),
+            ("download_source", "cached" if os.path.exists(tarball) else "download"),
+            ("build_and_install", "extracted tree reused" if os.path.exists(tree) else "full build"),
+            ("collect_garbage", "release build tree"),
+            ("generate_modulefile", "new version"),
+            ("verify", "")
+        ]
+
     # -----------------------------
     # Main Install Flow
     # -----------------------------
@@ -137,18 +200,20 @@ class OpenMPIInstaller:
         # Skip if already installed
         if os.path.exists(f"{self.install_dir}/bin/mpirun"):
             print("OpenMPI already installed.")
+            self.generate_modulefile()
             self.verify()
             return
 
         pkg_manager = self.detect_package_manager()
-        self.install_dependencies(pkg_manager)
-        self.download_source()
-        self.build_and_install()
-        self.update_environment()
-        self.verify()
+        self.timings.run("openmpi", self.install_dependencies, pkg_manager)
+        self.timings.run("openmpi", self.download_source)
+        self.timings.run("openmpi", self.build_and_install)
+        self.timings.run("openmpi", self.collect_garbage)
+        self.timings.run("openmpi", self.generate_modulefile)
+        self.timings.run("openmpi", self.verify)
 
         print("==== OpenMPI Installation Complete ====")
-        print("Run: source ~/.bashrc")
+        print(self.modulefile.usage_hint())
 
 if __name__ == "__main__":
     installer = OpenMPIInstaller()
@@ -0,0 +1,314 @@
+import subprocess
+import os
+from pathlib import Path
+from common.generate_modulefile import ModulefileGenerator
+from common.source_store import SourceStore
+from common.step_timings import StepTimings
+from common.command_engine import CommandEngine
+from common.build_sandbox import BuildSandbox
+from common.select_mirror import MirrorSelector
+from common.trash_reaper import TrashReaper
+from system_check.host_facts import get_facts
+
+
+class PMIxInstaller:
+    """
+    One PMIx for the whole node, with the hwloc and libevent it was built
+    against, in a single system prefix. Slurm (--with-pmix) and OpenMPI
+    (--with-pmix) are both configured against it, so srun can start MPI
+    ranks directly instead of going through mpirun's own daemons.
+    """
+
+    # Outside any home directory: slurmd and every user's OpenMPI load it
+    PREFIX_ROOT = "/opt/hpc/pmix"
+
+    def __init__(self):
+        # Default versions (can override via env variables)
+        self.VERSION = os.getenv("HPC_PMIX_VERSION", "4.2.9")
+        self.HWLOC_VERSION = os.getenv("HPC_HWLOC_VERSION", "2.10.0")
+        self.LIBEVENT_VERSION = os.getenv("HPC_LIBEVENT_VERSION", "2.1.12")
+
+        self.home = str(Path.home())
+        self.install_dir = f"{self.PREFIX_ROOT}/{self.VERSION}"
+        self.src_dir = f"{self.home}/hpc_sources"
+        self.store = SourceStore()
+        self.timings = StepTimings()
+        self.engine = CommandEngine("pmix")
+        self.mirrors = MirrorSelector()
+        self.reaper = TrashReaper()
+
+        # Dependencies first; each one is committed before the next configures
+        self.components = [
+            {
+                "name": "libevent",
+                "tar_name": f"libevent-{self.LIBEVENT_VERSION}-stable.tar.gz",
+                "src_folder": f"libevent-{self.LIBEVENT_VERSION}-stable",
+                "url": (
+                    "https://github.com/libevent/libevent/releases/download/"
+                    f"release-{self.LIBEVENT_VERSION}-stable/"
+                    f"libevent-{self.LIBEVENT_VERSION}-stable.tar.gz"
+                ),
+                "configure": ["--disable-openssl"]
+            },
+            {
+                "name": "hwloc",
+                "tar_name": f"hwloc-{self.HWLOC_VERSION}.tar.gz",
+                "src_folder": f"hwloc-{self.HWLOC_VERSION}",
+                "url": (
+                    "https://download.open-mpi.org/release/hwloc/"
+                    f"v{self.series(self.HWLOC_VERSION)}/hwloc-{self.HWLOC_VERSION}.tar.gz"
+                ),
+                "configure": ["--disable-cairo"]
+            },
+            {
+                "name": "pmix",
+                "tar_name": f"pmix-{self.VERSION}.tar.gz",
+                "src_folder": f"pmix-{self.VERSION}",
+                "url": (
+                    "https://github.com/openpmix/openpmix/releases/download/"
+                    f"v{self.VERSION}/pmix-{self.VERSION}.tar.gz"
+                ),
+                "configure": self.with_dependencies()
+            }
+        ]
+
+        # Offline installs get packages and sources from a bundle
+        self.offline = os.getenv("HPC_OFFLINE") == "1"
+
+    def series(self, version):
+        return ".".join(version.split(".")[:2])
+
+    # -----------------------------
+    # Used By Slurm And OpenMPI
+    # -----------------------------
+    def enabled(self):
+        return os.getenv("HPC_PMIX", "1") != "0"
+
+    def installed(self):
+        return os.path.exists(f"{self.install_dir}/bin/pmix_info")
+
+    def with_dependencies(self):
+        """The matching hwloc/libevent; OpenMPI refuses an external PMIx without them"""
+        return [f"--with-hwloc={self.install_dir}", f"--with-libevent={self.install_dir}"]
+
+    def rpath(self):
+        # Libraries resolve without LD_LIBRARY_PATH, also under slurmd
+        return f"LDFLAGS=-Wl,-rpath,{self.install_dir}/lib"
+
+    def configure_args(self, libevent=False):
+        """
+        What a consumer passes to ./configure; empty when PMIx is not
+        installed. Slurm only takes hwloc; OpenMPI also needs libevent.
+        """
+        if not self.enabled() or not self.installed():
+            return []
+
+        args = [f"--with-pmix={self.install_dir}", f"--with-hwloc={self.install_dir}"]
+        if libevent:
+            args.append(f"--with-libevent={self.install_dir}")
+
+        return args + [self.rpath()]
+
+    # -----------------------------
+    # Utility Runner
+    # -----------------------------
+    def run(self, command, timeout=None):
+        # Output goes to a compressed per-step log; the tail is shown on failure
+        self.engine.run(command, timeout=timeout)
+
+    # -----------------------------
+    # Detect Package Manager
+    # -----------------------------
+    def detect_package_manager(self):
+        pkg_manager = get_facts().package_manager()
+
+        if pkg_manager is None:
+            raise Exception("Unsupported Linux distribution.")
+
+        return pkg_manager
+
+    # -----------------------------
+    # Install Dependencies
+    # -----------------------------
+    def dependency_packages(self, pkg_manager):
+        if pkg_manager == "apt":
+            return ["build-essential", "gcc", "make", "zlib1g-dev", "wget", "curl"]
+
+        elif pkg_manager == "dnf":
+            return ["gcc", "make", "zlib-devel", "wget", "curl"]
+
+        return []
+
+    def install_dependencies(self, pkg_manager):
+        print("==== Installing Dependencies ====")
+
+        if self.offline:
+            print("Dependencies provided by offline bundle.")
+            return
+
+        packages = self.dependency_packages(pkg_manager)
+
+        if pkg_manager == "apt":
+            self.run(["sudo", "apt", "update"])
+            self.run(["sudo", "apt", "install", "-y"] + packages)
+
+        elif pkg_manager == "dnf":
+            self.run(["sudo", "dnf", "install", "-y"] + packages)
+
+    # -----------------------------
+    # Download Sources
+    # -----------------------------
+    def download_sources(self):
+        print("==== Downloading PMIx, hwloc and libevent ====")
+
+        os.makedirs(self.src_dir, exist_ok=True)
+        os.chdir(self.src_dir)
+
+        for component in self.components:
+            tar_name = component["tar_name"]
+
+            if not os.path.exists(tar_name):
+                if self.offline:
+                    raise Exception(f"{tar_name} is missing from the offline bundle.")
+                self.mirrors.download(component["name"], component["url"], tar_name)
+            else:
+                print(f"{tar_name} already downloaded.")
+
+            self.store.touch(tar_name)
+
+    # -----------------------------
+    # Build & Install
+    # -----------------------------
+    def build_component(self, component):
+        print(f"==== Building {component['name']} ====")
+
+        os.chdir(self.src_dir)
+
+        if not os.path.exists(component["src_folder"]):
+            self.run(["tar", "-xf", component["tar_name"]])
+
+        # The extracted tree stays pristine; the build writes to a throwaway overlay
+        sandbox = BuildSandbox(component["name"], component["src_folder"]).open()
+
+        try:
+            self.run(sandbox.wrap(
+                ["./configure", f"--prefix={self.install_dir}", self.rpath()] + component["configure"]
+            ))
+            self.run(sandbox.wrap(["make", f"-j{os.cpu_count()}"]))
+            self.run(sandbox.wrap(["make", "install", f"DESTDIR={sandbox.stage}"]))
+
+            # Copied over the prefix: the next component configures against it
+            sandbox.commit_manifest(self.manifest_name(component))
+        finally:
+            sandbox.discard()
+
+    def manifest_name(self, component):
+        return f"pmix-{self.VERSION}-{component['name']}"
+
+    def build_and_install(self):
+        # Leftovers of an interrupted install would mix versions in the prefix
+        if os.path.lexists(self.install_dir):
+            self.reaper.discard(self.install_dir)
+            self.reaper.start()
+
+        for component in self.components:
+            self.build_component(component)
+
+    # -----------------------------
+    # Source Store Cleanup
+    # -----------------------------
+    def collect_garbage(self):
+        # The tarballs stay cached; the build trees are no longer needed
+        os.chdir(self.src_dir)
+
+        for component in self.components:
+            self.store.release_build_tree(component["src_folder"])
+
+        self.store.enforce_budget(keep=[component["tar_name"] for component in self.components])
+
+    # -----------------------------
+    # Generate Modulefile
+    # -----------------------------
+    def generate_modulefile(self):
+        self.modulefile = ModulefileGenerator("pmix", self.VERSION, self.install_dir)
+        self.modulefile.generate()
+
+    # -----------------------------
+    # Verify Installation
+    # -----------------------------
+    def verify(self):
+        print("==== Verifying Installation ====")
+
+        if not self.installed():
+            raise Exception("PMIx installation failed.")
+
+        result = subprocess.run(
+            [f"{self.install_dir}/bin/pmix_info", "--version"],
+            capture_output=True,
+            text=True
+        )
+
+        if result.returncode != 0:
+            raise Exception("Verification failed.")
+
+        print("✔ PMIx Installed Successfully")
+        print(result.stdout.splitlines()[0])
+
+    # -----------------------------
+    # Plan (dry run)
+    # -----------------------------
+    def plan(self):
+        """Steps install() would run on this node; nothing is executed"""
+        if not self.enabled():
+            return []
+
+        if self.installed():
+            return [
+                ("generate_modulefile", "already installed"),
+                ("verify", "already installed")
+            ]
+
+        missing = [
+            component["name"] for component in self.components
+            if not os.path.exists(os.path.join(self.src_dir, component["tar_name"]))
+        ]
+
+        return [
+            ("install_dependencies", "system packages"),
+            ("download_sources", f"download {', '.join(missing)}" if missing else "cached"),
+            ("build_and_install", "libevent, hwloc, pmix"),
+            ("collect_garbage", "release build trees"),
+            ("generate_modulefile", "new version"),
+            ("verify", "")
+        ]
+
+    # -----------------------------
+    # Main Install Flow
+    # -----------------------------
+    def install(self):
+
+        if not self.enabled():
+            print("PMIx disabled (HPC_PMIX=0); Slurm and OpenMPI use their own.")
+            return
+
+        # Skip if already installed
+        if self.installed():
+            print("PMIx already installed.")
+            self.generate_modulefile()
+            self.verify()
+            return
+
+        pkg_manager = self.detect_package_manager()
+        self.timings.run("pmix", self.install_dependencies, pkg_manager)
+        self.timings.run("pmix", self.download_sources)
+        self.timings.run("pmix", self.build_and_install)
+        self.timings.run("pmix", self.collect_garbage)
+        self.timings.run("pmix", self.generate_modulefile)
+        self.timings.run("pmix", self.verify)
+
+        print("==== PMIx Installation Complete ====")
+        print(self.modulefile.usage_hint())
+
+if __name__ == "__main__":
+    installer = PMIxInstaller()
+    installer.install()
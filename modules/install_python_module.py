@@ -1,28 +1,47 @@
 import subprocess
 import os
 import re
-import requests
+import glob
 from pathlib import Path
 from system_check.detect_os import OSDetector
+from common.generate_modulefile import ModulefileGenerator
+from common.source_store import SourceStore
+from common.step_timings import StepTimings
+from common.command_engine import CommandEngine
+from common.build_sandbox import BuildSandbox
+from common.select_mirror import MirrorSelector
 
 
 class PythonInstaller:
 
-    def __init__(self):
+    def __init__(self, resolve_version=True):
         self.home = str(Path.home())
-        self.install_dir = f"{self.home}/hpc/python"
         self.src_dir = f"{self.home}/hpc_sources"
-
-        # 🔥 Fetch latest version automatically
-        self.VERSION = self.get_latest_python_version()
+        self.store = SourceStore()
+        self.timings = StepTimings()
+        self.engine = CommandEngine("python")
+        self.mirrors = MirrorSelector()
+
+        # Pinned version (e.g. from an offline bundle) skips the lookup; a plan
+        # (resolve_version=False) stays offline and goes by what is on disk
+        self.VERSION = os.getenv("HPC_PYTHON_VERSION")
+        if not self.VERSION:
+            self.VERSION = self.get_latest_python_version() if resolve_version else self.local_version()
+        self.install_dir = f"{self.home}/hpc/python/{self.VERSION}"
 
         self.tar_name = f"Python-{self.VERSION}.tar.xz"
         self.src_folder = f"Python-{self.VERSION}"
 
+        # Offline installs get packages and sources from a bundle
+        self.offline = os.getenv("HPC_OFFLINE") == "1"
+
     # -----------------------------
     # Fetch Latest Python Version
     # -----------------------------
     def get_latest_python_version(self):
+        # Imported here: requests is slow to load and only needed for this lookup
+        import requests
+
         print("Fetching latest Python version...")
 
         url = "https://www.python.org/ftp/python/"
@@ -37,22 +56,32 @@ class PythonInstaller:
         print(f"Latest Python version detected: {latest}")
         return latest
 
+    def local_version(self):
+        """Newest version installed or with a cached tarball; None if neither"""
+        versions = [
+            os.path.basename(path) for path in glob.glob(f"{self.home}/hpc/python/*")
+            if os.path.exists(f"{path}/bin/python3")
+        ]
+        if os.path.isdir(self.src_dir):
+            versions += re.findall(r"Python-(\d+\.\d+\.\d+)\.tar\.xz", " ".join(os.listdir(self.src_dir)))
+
+        versions = [version for version in versions if re.fullmatch(r"\d+\.\d+\.\d+", version)]
+        versions.sort(key=lambda s: list(map(int, s.split("."))))
+        return versions[-1] if versions else None
+
     # -----------------------------
     # Utility Runner
     # -----------------------------
-    def run(self, command):
-        subprocess.run(command, check=True)
+    def run(self, command, timeout=None):
+        # Output goes to a compressed per-step log; the tail is shown on failure
+        self.engine.run(command, timeout=timeout)
 
     # -----------------------------
     # Install Build Dependencies
     # -----------------------------
-    def install_dependencies(self, pkg_manager):
-        print("==== Installing Build Dependencies ====")
-
+    def dependency_packages(self, pkg_manager):
         if pkg_manager == "apt":
-            self.run(["sudo", "apt", "update"])
-            self.run([
-                "sudo", "apt", "install", "-y",
+            return [
                 "build-essential",
                 "libssl-dev",
                 "zlib1g-dev",
@@ -68,11 +97,10 @@ class PythonInstaller:
                 "tk-dev",
                 "wget",
                 "curl"
-            ])
+            ]
 
         elif pkg_manager == "dnf":
-            self.run([
-                "sudo", "dnf", "install", "-y",
+            return [
                 "gcc",
                 "make",
                 "openssl-devel",
@@ -85,7 +113,25 @@ class PythonInstaller:
                 "tk-devel",
                 "wget",
                 "curl"
-            ])
+            ]
+
+        return []
+
+    def install_dependencies(self, pkg_manager):
+        print("==== Installing Build Dependencies ====")
+
+        if self.offline:
+            print("Dependencies provided by offline bundle.")
+            return
+
+        packages = self.dependency_packages(pkg_manager)
+
+        if pkg_manager == "apt":
+            self.run(["sudo", "apt", "update"])
+            self.run(["sudo", "apt", "install", "-y"] + packages)
+
+        elif pkg_manager == "dnf":
+            self.run(["sudo", "dnf", "install", "-y"] + packages)
 
         else:
             raise Exception("Unsupported package manager.")
@@ -93,6 +139,9 @@ class PythonInstaller:
     # -----------------------------
     # Download Source
     # -----------------------------
+    def source_url(self):
+        return f"https://www.python.org/ftp/python/{self.VERSION}/{self.tar_name}"
+
     def download_source(self):
         print("==== Downloading Python Source ====")
 
@@ -100,11 +149,14 @@ class PythonInstaller:
         os.chdir(self.src_dir)
 
         if not os.path.exists(self.tar_name):
-            url = f"https://www.python.org/ftp/python/{self.VERSION}/{self.tar_name}"
-            self.run(["wget", url])
+            if self.offline:
+                raise Exception(f"{self.tar_name} is missing from the offline bundle.")
+            self.mirrors.download("python", self.source_url(), self.tar_name)
         else:
             print("Source already downloaded.")
 
+        self.store.touch(self.tar_name)
+
     # -----------------------------
     # Build & Install
     # -----------------------------
@@ -116,40 +168,41 @@ class PythonInstaller:
         if not os.path.exists(self.src_folder):
             self.run(["tar", "-xf", self.tar_name])
 
-        os.chdir(self.src_folder)
+        # The extracted tree stays pristine; the build writes to a throwaway overlay
+        sandbox = BuildSandbox("python", self.src_folder).open()
 
-        print("==== Configuring Python ====")
-        self.run([
-            "./configure",
-            f"--prefix={self.install_dir}",
-            "--enable-optimizations"
-        ])
+        try:
+            print("==== Configuring Python ====")
+            self.run(sandbox.wrap([
+                "./configure",
+                f"--prefix={self.install_dir}",
+                "--enable-optimizations"
+            ]))
 
-        print("==== Building Python ====")
-        self.run(["make", f"-j{os.cpu_count()}"])
+            print("==== Building Python ====")
+            self.run(sandbox.wrap(["make", f"-j{os.cpu_count()}"]))
 
-        print("==== Installing Python ====")
-        self.run(["make", "install"])
+            print("==== Installing Python ====")
+            self.run(sandbox.wrap(["make", "install", f"DESTDIR={sandbox.stage}"]))
+            sandbox.commit_prefix(self.install_dir)
+        finally:
+            sandbox.discard()
 
     # -----------------------------
-    # Update PATH
+    # Source Store Cleanup
     # -----------------------------
-    def update_bashrc(self):
-        bashrc_path = f"{self.home}/.bashrc"
-
-        if not os.path.exists(bashrc_path):
-            open(bashrc_path, "w").close()
-
-        with open(bashrc_path, "r") as f:
-            content = f.read()
-
-        if "hpc/python/bin" not in content:
-            with open(bashrc_path, "a") as f:
-                f.write('\nexport PATH="$HOME/hpc/python/bin:$PATH"\n')
+    def collect_garbage(self):
+        # The tarball stays cached; the multi-GB build tree is no longer needed
+        os.chdir(self.src_dir)
+        self.store.release_build_tree(self.src_folder)
+        self.store.enforce_budget(keep=[self.tar_name])
 
-            print("PATH updated in ~/.bashrc")
-        else:
-            print("PATH already configured.")
+    # -----------------------------
+    # Generate Modulefile
+    # -----------------------------
+    def generate_modulefile(self):
+        self.modulefile = ModulefileGenerator("python", self.VERSION, self.install_dir)
+        self.modulefile.generate()
 
     # -----------------------------
     # Verification
@@ -173,6 +226,39 @@ class PythonInstaller:
         else:
             raise Exception("Python installation failed.")
 
+    # -----------------------------
+    # Plan (dry run)
+    # -----------------------------
+    def plan(self):
+        """Steps install() would run on this node; nothing is executed"""
+        if self.VERSION is None:
+            return [
+                ("install_dependencies", "system packages"),
+                ("download_source", "latest (unresolved)"),
+                ("build_and_install", "full build"),
+                ("collect_garbage", "release build tree"),
+                ("generate_modulefile", "new version"),
+                ("verify", "")
+            ]
+
+        if os.path.exists(f"{self.install_dir}/bin/python3"):
+            return [
+                ("generate_modulefile", "already installed"),
+                ("verify", "already installed")
+            ]
+
+        tarball = os.path.join(self.src_dir, self.tar_name)
+        tree = os.path.join(self.src_dir, self.src_folder)
+
+        return [
+            ("install_dependencies", "system packages"),
+            ("download_source", "cached" if os.path.exists(tarball) else "download"),
+            ("build_and_install", "extracted tree reused" if os.path.exists(tree) else "full build"),
+            ("collect_garbage", "release build tree"),
+            ("generate_modulefile", "new version"),
+            ("verify", "")
+        ]
+
     # -----------------------------
     # Main Install Flow
     # -----------------------------
@@ -183,17 +269,19 @@ class PythonInstaller:
 
         if os.path.exists(f"{self.install_dir}/bin/python3"):
             print("Python already installed.")
+            self.generate_modulefile()
             self.verify()
             return
 
-        self.install_dependencies(pkg_manager)
-        self.download_source()
-        self.build_and_install()
-        self.update_bashrc()
-        self.verify()
+        self.timings.run("python", self.install_dependencies, pkg_manager)
+        self.timings.run("python", self.download_source)
+        self.timings.run("python", self.build_and_install)
+        self.timings.run("python", self.collect_garbage)
+        self.timings.run("python", self.generate_modulefile)
+        self.timings.run("python", self.verify)
 
         print("==== Python Installation Complete ====")
-        print("Run: source ~/.bashrc")
+        print(self.modulefile.usage_hint())
 
 
 if __name__ == "__main__":
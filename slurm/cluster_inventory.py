@@ -0,0 +1,277 @@
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from slurm.hostlist import expand_hostlist, compress_hostlist
+
+
+class ClusterInventory:
+    """
+    The cluster as data: node groups with their hardware, written in TOML
+    (or YAML if PyYAML is installed), e.g.
+
+        [cluster]
+        controller = "head01"
+
+        [[nodes]]
+        names = "cpu[0001-4096]"
+        cpus = 64
+        sockets = 2
+        cores_per_socket = 32
+        threads_per_core = 1
+        memory = "256G"
+        features = ["avx512", "ib"]
+
+        [[nodes]]
+        names = "gpu[001-128]"
+        cpus = 96
+        memory = "1T"
+        features = ["avx512", "ib"]
+        gres = "gpu:h100:8"
+
+        [[partitions]]            # optional, on top of the generated ones
+        name = "debug"
+        nodes = "cpu[0001-0004]"
+        max_time = "1:00:00"
+
+    Nodes with the same hardware become one NodeName line with a compressed
+    hostlist. Each hardware class, and each feature only some nodes have,
+    gets its own partition next to the default "all" partition. Weight
+    grows with GPUs, memory and cores, so Slurm packs small jobs onto the
+    smallest nodes that fit.
+    """
+
+    HARDWARE = [
+        ("cpus", "CPUs"),
+        ("sockets", "Sockets"),
+        ("cores_per_socket", "CoresPerSocket"),
+        ("threads_per_core", "ThreadsPerCore")
+    ]
+
+    UNITS = {"M": 1, "G": 1024, "T": 1024 ** 2}
+
+    def __init__(self, data):
+        self.cluster = data.get("cluster", {})
+        self.groups = data.get("nodes", [])
+        self.extra_partitions = data.get("partitions", [])
+
+        if not self.groups:
+            raise Exception("Inventory defines no [[nodes]].")
+
+    # -----------------------------
+    # Load
+    # -----------------------------
+    @classmethod
+    def default_path(cls):
+        """HPC_INVENTORY, else ~/hpc/inventory.toml or .yaml; None if absent"""
+        if os.getenv("HPC_INVENTORY"):
+            return os.getenv("HPC_INVENTORY")
+
+        home = str(Path.home())
+        for name in ["inventory.toml", "inventory.yaml", "inventory.yml"]:
+            path = f"{home}/hpc/{name}"
+            if os.path.exists(path):
+                return path
+
+        return None
+
+    @classmethod
+    def load(cls, path):
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise Exception("YAML inventories need PyYAML (pip install pyyaml); TOML works without it.")
+
+            with open(path) as f:
+                return cls(yaml.safe_load(f) or {})
+
+        try:
+            import tomllib
+        except ImportError:
+            # Python < 3.11: the same parser as a package
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise Exception("TOML inventories need Python 3.11+ or tomli (pip install tomli).")
+
+        with open(path, "rb") as f:
+            return cls(tomllib.load(f))
+
+    # -----------------------------
+    # Nodes
+    # -----------------------------
+    def memory_mb(self, value):
+        """256G / 262144M / 262144 (MB) -> RealMemory in MB"""
+        if isinstance(value, int):
+            return value
+
+        match = re.fullmatch(r"\s*(\d+)\s*([MGT]?)i?B?\s*", str(value), re.IGNORECASE)
+        if not match:
+            raise Exception(f"Cannot read memory size: {value}")
+
+        return int(match.group(1)) * self.UNITS[(match.group(2) or "M").upper()]
+
+    def gpu_count(self, gres):
+        """gpu:h100:8,gpu:a100:2 -> 10"""
+        count = 0
+
+        for item in filter(None, (gres or "").split(",")):
+            fields = item.split(":")
+            if fields[0] == "gpu":
+                count += int(fields[-1]) if fields[-1].isdigit() else 1
+
+        return count
+
+    def node_classes(self):
+        """
+        hardware key -> {"attrs": NodeName attributes, "nodes": [names]}.
+        Groups with identical hardware merge, so one line covers them all.
+        """
+        classes = {}
+        seen = set()
+
+        for group in self.groups:
+            names = group["names"]
+            names = expand_hostlist(names) if isinstance(names, str) else list(names)
+
+            duplicates = seen.intersection(names)
+            if duplicates:
+                raise Exception(f"Nodes listed twice in the inventory: {compress_hostlist(duplicates)}")
+            seen.update(names)
+
+            if "cpus" not in group:
+                raise Exception(f"Node group {group['names']} has no cpus.")
+
+            attrs = {key: str(group[field]) for field, key in self.HARDWARE if field in group}
+
+            if "memory" in group:
+                attrs["RealMemory"] = str(self.memory_mb(group["memory"]))
+            if group.get("features"):
+                attrs["Features"] = ",".join(sorted(group["features"]))
+            if group.get("gres"):
+                attrs["Gres"] = group["gres"]
+
+            key = tuple(sorted(attrs.items()))
+            classes.setdefault(key, {"attrs": attrs, "nodes": []})["nodes"] += names
+
+        return classes
+
+    def size(self, attrs):
+        """What Weight orders by: GPUs, then memory, then cores, then features"""
+        return (
+            self.gpu_count(attrs.get("Gres")),
+            int(attrs.get("RealMemory", 0)),
+            int(attrs["CPUs"]),
+            len(attrs.get("Features", "").split(",")) if attrs.get("Features") else 0
+        )
+
+    def class_name(self, attrs):
+        """e.g. c64-m256g, c96-m1024g-gpu8; features tell otherwise equal classes apart"""
+        name = f"c{attrs['CPUs']}"
+
+        if attrs.get("RealMemory"):
+            name += f"-m{int(attrs['RealMemory']) // 1024}g"
+
+        gpus = self.gpu_count(attrs.get("Gres"))
+        if gpus:
+            name += f"-gpu{gpus}"
+
+        return name
+
+    # -----------------------------
+    # Generate
+    # -----------------------------
+    def generate(self, config):
+        """Adds NodeName and PartitionName lines (and SlurmctldHost) to a SlurmConfig"""
+        classes = sorted(self.node_classes().values(), key=lambda entry: self.size(entry["attrs"]))
+
+        # Lowest weight is allocated first: small nodes fill up before big ones
+        sizes = sorted({self.size(entry["attrs"]) for entry in classes})
+        weights = {size: index + 1 for index, size in enumerate(sizes)}
+
+        if self.cluster.get("controller"):
+            config.set("SlurmctldHost", self.cluster["controller"])
+        if self.cluster.get("name"):
+            config.set("ClusterName", self.cluster["name"])
+
+        every_node = []
+        names = {}
+
+        for entry in classes:
+            hostlist = compress_hostlist(entry["nodes"])
+            every_node += entry["nodes"]
+
+            config.add_entity("NodeName", hostlist, **entry["attrs"],
+                              Weight=weights[self.size(entry["attrs"])], State="UNKNOWN")
+
+            name = self.class_name(entry["attrs"])
+            if name in names:
+                # Same cores, memory and GPUs: the features tell them apart
+                features = entry["attrs"].get("Features", "").replace(",", "-")
+                name = f"{name}-{features}" if features else f"{name}-{names[name] + 1}"
+            names[name] = names.get(name, 0) + 1
+
+            entry["partition"] = name
+            entry["hostlist"] = hostlist
+
+        max_time = self.cluster.get("max_time", "INFINITE")
+
+        config.add_entity("PartitionName", "all", Nodes=compress_hostlist(every_node),
+                          Default="YES", MaxTime=max_time, State="UP")
+
+        # One partition per hardware class, unless it would just repeat "all"
+        if len(classes) > 1:
+            for entry in classes:
+                config.add_entity("PartitionName", entry["partition"], Nodes=entry["hostlist"],
+                                  MaxTime=max_time, State="UP")
+
+        # And one per feature that only part of the cluster has (ib, gpu, ...)
+        by_feature = {}
+        for entry in classes:
+            for feature in filter(None, entry["attrs"].get("Features", "").split(",")):
+                by_feature.setdefault(feature, []).extend(entry["nodes"])
+
+        for feature, nodes in sorted(by_feature.items()):
+            if len(nodes) < len(every_node):
+                config.add_entity("PartitionName", feature, Nodes=compress_hostlist(nodes),
+                                  MaxTime=max_time, State="UP")
+
+        for partition in self.extra_partitions:
+            nodes = partition["nodes"]
+            nodes = compress_hostlist(expand_hostlist(nodes) if isinstance(nodes, str) else nodes)
+
+            config.add_entity("PartitionName", partition["name"], Nodes=nodes,
+                              MaxTime=partition.get("max_time", max_time), State="UP")
+
+        return config
+
+    @classmethod
+    def show(cls, path=None):
+        """Prints the slurm.conf lines an inventory generates, and how long that took"""
+        from slurm.slurm_config import SlurmConfig
+
+        path = path or cls.default_path()
+        if not path:
+            print("No inventory: pass a file, set HPC_INVENTORY or create ~/hpc/inventory.toml.")
+            return False
+
+        start = time.monotonic()
+        inventory = cls.load(path)
+        config = inventory.generate(SlurmConfig())
+        elapsed = time.monotonic() - start
+
+        print(config.render(), end="")
+        print(f"# {inventory.summary()}, generated in {elapsed * 1000:.0f} ms")
+        return True
+
+    def summary(self):
+        classes = self.node_classes()
+        nodes = sum(len(entry["nodes"]) for entry in classes.values())
+        return f"{nodes} nodes in {len(classes)} hardware classes"
+
+
+if __name__ == "__main__":
+    sys.exit(0 if ClusterInventory.show(*sys.argv[1:2]) else 1)
@@ -0,0 +1,139 @@
+import re
+import sys
+import itertools
+
+
+# node[001-512] with optional prefix/suffix text around each bracket
+BRACKET = re.compile(r"\[([^\]]*)\]")
+
+# The last run of digits in a name: node017 -> ("node", "017", "")
+NUMBERED = re.compile(r"^(.*?)(\d+)(\D*)$")
+
+
+def split_top_level(expression):
+    """'a[1-2],b,c[3,5]' -> ['a[1-2]', 'b', 'c[3,5]']; commas in brackets stay"""
+    parts, depth, current = [], 0, ""
+
+    for char in expression:
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+
+        depth += {"[": 1, "]": -1}.get(char, 0)
+        current += char
+
+    parts.append(current)
+    return [part.strip() for part in parts if part.strip()]
+
+
+def expand_range(body):
+    """'001-003,007' -> ['001', '002', '003', '007'], keeping zero padding"""
+    values = []
+
+    for item in body.split(","):
+        low, _, high = item.partition("-")
+
+        if not high:
+            values.append(low)
+            continue
+
+        width = len(low) if low.startswith("0") else 0
+        if int(high) < int(low):
+            raise Exception(f"Descending hostlist range: [{item}]")
+
+        values += [f"{number:0{width}d}" for number in range(int(low), int(high) + 1)]
+
+    return values
+
+
+def expand_hostlist(expression):
+    """
+    Slurm hostlist -> names, in order: node[01-03],gpu1 -> node01 node02
+    node03 gpu1. Several brackets in one name expand as a product.
+    """
+    names = []
+
+    for part in split_top_level(expression):
+        pieces = BRACKET.split(part)
+
+        # Odd pieces were inside brackets; even pieces are literal text
+        choices = [
+            expand_range(piece) if index % 2 else [piece]
+            for index, piece in enumerate(pieces)
+        ]
+        names += ["".join(combination) for combination in itertools.product(*choices)]
+
+    return names
+
+
+def format_ranges(numbers, width):
+    ranges = []
+    start = previous = numbers[0]
+
+    for number in numbers[1:] + [None]:
+        if number is not None and number == previous + 1:
+            previous = number
+            continue
+
+        if start == previous:
+            ranges.append(f"{start:0{width}d}")
+        else:
+            ranges.append(f"{start:0{width}d}-{previous:0{width}d}")
+
+        if number is not None:
+            start = previous = number
+
+    return ranges
+
+
+def compress_hostlist(names):
+    """
+    Names -> the shortest usual hostlist: node001..node512 -> node[001-512].
+    Zero-padded and unpadded numbers are kept apart (node[01-10] differs
+    from node[1-10]); names without digits pass through unchanged.
+    """
+    groups = {}
+    plain = []
+    unique = set(names)
+
+    # Widths of the zero-padded numbers per prefix/suffix; node100 joins node[001-099]
+    padded = set()
+    parsed = []
+
+    for name in unique:
+        match = NUMBERED.match(name)
+        if not match:
+            plain.append(name)
+            continue
+
+        prefix, digits, suffix = match.groups()
+        parsed.append((prefix, digits, suffix))
+
+        if digits.startswith("0") and len(digits) > 1:
+            padded.add((prefix, suffix, len(digits)))
+
+    for prefix, digits, suffix in parsed:
+        width = len(digits) if (prefix, suffix, len(digits)) in padded else 0
+        groups.setdefault((prefix, suffix, width), []).append(int(digits))
+
+    parts = sorted(plain)
+
+    for (prefix, suffix, width), numbers in sorted(groups.items()):
+        numbers.sort()
+
+        if len(numbers) == 1:
+            parts.append(f"{prefix}{numbers[0]:0{width}d}{suffix}")
+        else:
+            parts.append(f"{prefix}[{','.join(format_ranges(numbers, width))}]{suffix}")
+
+    return ",".join(parts)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--expand":
+        print("\n".join(expand_hostlist(sys.argv[2])))
+    elif len(sys.argv) >= 2:
+        print(compress_hostlist(sys.argv[1:]))
+    else:
+        print("Usage: python3 -m slurm.hostlist [--expand <hostlist> | <name> ...]")
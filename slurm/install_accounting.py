@@ -0,0 +1,295 @@
+import os
+import re
+import sys
+import time
+import secrets
+import subprocess
+
+from system_check.detect_os import OSDetector
+from system_check.host_facts import get_facts
+from common.service_readiness import ReadinessWaiter
+from common.privileged_session import privileged_session
+from slurm.slurm_config import SlurmConfigManager
+
+
+class SlurmAccountingInstaller:
+
+    DATABASE = "slurm_acct_db"
+    DB_USER = "slurm"
+    CLUSTER = "cluster"
+
+    SLURM_CONF = "/etc/slurm/slurm.conf"
+    SLURMDBD_CONF = "/etc/slurm/slurmdbd.conf"
+    SERVICE_FILE = "/etc/systemd/system/slurmdbd.service"
+
+    # Loaded after the distro defaults so these settings win
+    TUNING_FILES = {
+        "apt": "/etc/mysql/mariadb.conf.d/90-slurmdbd.cnf",
+        "dnf": "/etc/my.cnf.d/90-slurmdbd.cnf"
+    }
+
+    MiB = 1024 ** 2
+    GiB = 1024 ** 3
+
+    def __init__(self, source_dir=None):
+        from slurm.install_slurm import SlurmInstaller
+
+        version = os.getenv("HPC_SLURM_VERSION", SlurmInstaller.VERSION)
+        self.source_dir = source_dir or f"{SlurmInstaller.WORKDIR}/slurm-{version}"
+
+        self.enabled = os.getenv("HPC_SLURM_ACCOUNTING", "1") != "0"
+        self.privileged = privileged_session()
+
+    # -----------------------------
+    # Privileged Commands
+    # -----------------------------
+    def mysql(self, sql, database=None):
+        """Runs as root through the privileged session; the SQL never shows up in argv or step logs"""
+        return self.privileged.mysql(sql, database)
+
+    def install_file(self, path, content, mode="644", owner="root:root"):
+        # Written private next to the target, so a password is never world-readable
+        self.privileged.write_file(path, content, mode=mode, owner=owner)
+
+    # -----------------------------
+    # MariaDB Tuning
+    # -----------------------------
+    def memory_bytes(self):
+        return get_facts().get("memory")["total_bytes"] or 4 * self.GiB
+
+    def tuning(self, memory=None):
+        """InnoDB settings sized to this node's RAM"""
+        memory = memory or self.memory_bytes()
+
+        # slurmctld and slurmd share the node, so the database gets a quarter of RAM
+        pool = min(max(memory // 4, 256 * self.MiB), 64 * self.GiB)
+        pool = pool // (128 * self.MiB) * (128 * self.MiB)
+
+        # Redo log around a quarter of the pool absorbs bursts of job completions
+        log_size = min(max(pool // 4, 64 * self.MiB), 4 * self.GiB)
+
+        return {
+            "innodb_buffer_pool_size": f"{pool // self.MiB}M",
+            "innodb_log_file_size": f"{log_size // self.MiB}M",
+            # Flush the redo log once a second instead of on every commit
+            "innodb_flush_log_at_trx_commit": "2",
+            "innodb_flush_method": "O_DIRECT",
+            # Values recommended by SchedMD for slurmdbd
+            "innodb_lock_wait_timeout": "900",
+            "max_allowed_packet": "16M"
+        }
+
+    def write_tuning(self, pkg_manager):
+        print("==== Tuning MariaDB For Slurm Accounting ====")
+
+        path = self.TUNING_FILES.get(pkg_manager)
+        if not path:
+            raise Exception("Unsupported package manager.")
+
+        settings = self.tuning()
+        content = "# Managed by hpcctl: sized for slurmdbd on this node\n[mysqld]\n"
+        content += "".join(f"{key}={value}\n" for key, value in settings.items())
+
+        self.install_file(path, content)
+
+        for key, value in settings.items():
+            print(f"{key} = {value}")
+
+        with self.privileged.batch() as batch:
+            batch.systemctl("enable", "mariadb")
+            batch.systemctl("restart", "mariadb")
+
+        if not ReadinessWaiter().wait(["mariadb"], deadline=60):
+            raise Exception("MariaDB did not become ready.")
+
+    # -----------------------------
+    # Database And slurmdbd.conf
+    # -----------------------------
+    def existing_password(self):
+        """Reuse the stored password so reruns do not break a running slurmdbd"""
+        content = self.privileged.read_file(self.SLURMDBD_CONF) or ""
+
+        match = re.search(r"^StoragePass=(\S+)$", content, re.MULTILINE)
+        return match.group(1) if match else None
+
+    def create_database(self):
+        print("==== Creating Accounting Database ====")
+
+        password = self.existing_password() or secrets.token_hex(16)
+
+        self.mysql(f"""
+CREATE DATABASE IF NOT EXISTS {self.DATABASE};
+CREATE USER IF NOT EXISTS '{self.DB_USER}'@'localhost' IDENTIFIED BY '{password}';
+ALTER USER '{self.DB_USER}'@'localhost' IDENTIFIED BY '{password}';
+GRANT ALL PRIVILEGES ON {self.DATABASE}.* TO '{self.DB_USER}'@'localhost';
+FLUSH PRIVILEGES;
+""")
+
+        return password
+
+    def create_slurmdbd_conf(self, password):
+        print("==== Creating slurmdbd.conf ====")
+
+        hostname = subprocess.check_output(["hostname"], text=True).strip()
+
+        config = f"""
+AuthType=auth/munge
+DbdHost={hostname}
+SlurmUser=slurm
+
+LogFile=/var/log/slurm/slurmdbd.log
+PidFile=/run/slurm/slurmdbd.pid
+
+StorageType=accounting_storage/mysql
+StorageHost=localhost
+StorageUser={self.DB_USER}
+StoragePass={password}
+StorageLoc={self.DATABASE}
+"""
+
+        # slurmdbd refuses to start if its config is readable by others
+        self.install_file(self.SLURMDBD_CONF, config, mode="600", owner="slurm:slurm")
+
+    # -----------------------------
+    # slurmdbd Service
+    # -----------------------------
+    def start_slurmdbd(self):
+        print("==== Starting slurmdbd ====")
+
+        # Normally committed with the Slurm build; older in-place builds have it in the tree
+        with self.privileged.batch() as batch:
+            if not os.path.exists(self.SERVICE_FILE):
+                batch.copy(f"{self.source_dir}/etc/slurmdbd.service", self.SERVICE_FILE)
+
+            batch.systemctl("daemon-reload")
+            batch.systemctl("enable", "slurmdbd")
+            batch.systemctl("restart", "slurmdbd")
+
+        # slurmdbd creates its schema on first start; the port opens after that
+        if not ReadinessWaiter().wait(["mariadb", "slurmdbd"], deadline=120):
+            raise Exception("slurmdbd did not become ready.")
+
+    # -----------------------------
+    # Wire Into slurm.conf
+    # -----------------------------
+    def configure_slurm_conf(self, live=True):
+        print("==== Enabling Accounting In slurm.conf ====")
+
+        hostname = subprocess.check_output(["hostname"], text=True).strip()
+        settings = {
+            "AccountingStorageType": "accounting_storage/slurmdbd",
+            "AccountingStorageHost": hostname
+        }
+
+        # Both are only read when slurmctld starts; the manager restarts it
+        # if it is running, and slurmd keeps running either way
+        if not SlurmConfigManager().update(settings, live=live):
+            print("Accounting already configured.")
+            return False
+
+        return True
+
+    def register_cluster(self):
+        print("==== Registering Cluster ====")
+
+        result = subprocess.run(
+            ["sacctmgr", "--noheader", "--parsable2", "show", "cluster", "format=cluster"],
+            capture_output=True,
+            text=True
+        )
+
+        if self.CLUSTER in result.stdout.split():
+            print(f"Cluster '{self.CLUSTER}' already registered.")
+            return
+
+        self.privileged.add_cluster(self.CLUSTER)
+
+    # -----------------------------
+    # Load Test
+    # -----------------------------
+    def load_test(self, rows=None, batch=1000):
+        """Inserts job-completion-like rows into a scratch table and reports the rate"""
+        rows = rows or int(os.getenv("HPC_ACCOUNTING_LOAD_ROWS", "100000"))
+        table = "hpcctl_load_test"
+
+        print(f"==== Accounting Load Test ({rows} job records) ====")
+
+        # Same shape and indexes as the hot part of slurmdbd's job table
+        statements = [f"""
+DROP TABLE IF EXISTS {table};
+CREATE TABLE {table} (
+    job_db_inx BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    id_job INT UNSIGNED NOT NULL,
+    id_user INT UNSIGNED NOT NULL,
+    `partition` TINYTEXT NOT NULL,
+    nodelist TEXT,
+    state INT UNSIGNED NOT NULL,
+    time_submit BIGINT UNSIGNED NOT NULL,
+    time_start BIGINT UNSIGNED NOT NULL,
+    time_end BIGINT UNSIGNED NOT NULL,
+    tres_alloc TEXT NOT NULL,
+    KEY (id_job),
+    KEY (id_user, time_submit),
+    KEY (time_end)
+) ENGINE=InnoDB;
+"""]
+
+        now = int(time.time())
+
+        # One transaction per batch, like slurmdbd committing a burst of completions
+        for start in range(0, rows, batch):
+            values = ",".join(
+                f"({job},{1000 + job % 50},'debug','node{job % 64:03d}',3,"
+                f"{now - 600},{now - 300},{now},'1=4,2=8192,4=1')"
+                for job in range(start, min(start + batch, rows))
+            )
+            statements.append(
+                "START TRANSACTION;"
+                f"INSERT INTO {table} (id_job,id_user,`partition`,nodelist,state,"
+                f"time_submit,time_start,time_end,tres_alloc) VALUES {values};"
+                "COMMIT;"
+            )
+
+        statements.append(f"SELECT COUNT(*) FROM {table};")
+
+        started = time.monotonic()
+        output = self.mysql("\n".join(statements), database=self.DATABASE)
+        elapsed = time.monotonic() - started
+
+        self.mysql(f"DROP TABLE IF EXISTS {table};", database=self.DATABASE)
+
+        inserted = int(output.split()[-1])
+        if inserted != rows:
+            raise Exception(f"Load test inserted {inserted} of {rows} rows.")
+
+        print(f"✔ {rows} job records in {elapsed:.2f}s ({rows / elapsed:,.0f} records/s)")
+        return rows / elapsed
+
+    # -----------------------------
+    # Main Flow
+    # -----------------------------
+    def install(self, pkg_manager=None, restart_slurmctld=True):
+        if not self.enabled:
+            print("Slurm accounting disabled (HPC_SLURM_ACCOUNTING=0).")
+            return
+
+        if pkg_manager is None:
+            pkg_manager = OSDetector().detect()["package_manager"]
+
+        self.write_tuning(pkg_manager)
+        password = self.create_database()
+        self.create_slurmdbd_conf(password)
+        self.start_slurmdbd()
+        self.configure_slurm_conf(live=restart_slurmctld)
+        self.register_cluster()
+
+        print("==== Slurm Accounting Ready ====")
+
+
+if __name__ == "__main__":
+    installer = SlurmAccountingInstaller()
+
+    if "--load-test" in sys.argv:
+        installer.load_test()
+    else:
+        installer.install()
@@ -1,6 +1,18 @@
 import subprocess
 import os
 from system_check.detect_os import OSDetector
+from common.step_timings import StepTimings
+from common.command_engine import CommandEngine
+from common.build_sandbox import BuildSandbox
+from common.select_mirror import MirrorSelector
+from common.service_readiness import ReadinessWaiter
+from common.privileged_session import privileged_session
+from slurm.install_accounting import SlurmAccountingInstaller
+from slurm.node_health import NodeHealthCheck
+from slurm.slurm_config import SlurmConfig, SlurmConfigManager
+from slurm.cluster_inventory import ClusterInventory
+from modules.install_pmix_module import PMIxInstaller
+from system_check.host_facts import get_facts
 
 
 class SlurmInstaller:
@@ -8,25 +20,41 @@ class SlurmInstaller:
     VERSION = "24.11.1"
     WORKDIR = "/root"
 
+    UNITS_DIR = "/etc/systemd/system"
+    UNITS = ["slurmctld.service", "slurmd.service", "slurmdbd.service"]
+
+    # What make install put into /usr/local and the unit files (see InstallManifest)
+    MANIFEST = "slurm"
+
+    def __init__(self):
+        # Pinned version (e.g. from an offline bundle) overrides the default
+        self.VERSION = os.getenv("HPC_SLURM_VERSION", self.VERSION)
+
+        self.timings = StepTimings()
+        self.tar_name = f"slurm-{self.VERSION}.tar.bz2"
+
+        # Offline installs get packages and sources from a bundle
+        self.offline = os.getenv("HPC_OFFLINE") == "1"
+        self.engine = CommandEngine("slurm")
+        self.mirrors = MirrorSelector()
+        self.pmix = PMIxInstaller()
+        self.privileged = privileged_session()
+
     # -----------------------------
     # Utility Runner
     # -----------------------------
 
-    def run(self, command):
-        print("Running:", " ".join(command))
-        subprocess.run(command, check=True)
+    def run(self, command, timeout=None):
+        # Output goes to a compressed per-step log; the tail is shown on failure
+        self.engine.run(command, timeout=timeout)
 
     # -----------------------------
     # Install Dependencies
     # -----------------------------
 
-    def install_dependencies(self, pkg_manager):
-        print("==== Installing Required Packages ====")
-
+    def dependency_packages(self, pkg_manager):
         if pkg_manager == "apt":
-            self.run(["sudo", "apt", "update"])
-
-            packages = [
+            return [
                 "build-essential",
                 "munge",
                 "libmunge-dev",
@@ -43,10 +71,8 @@ class SlurmInstaller:
                 "wget"
             ]
 
-            self.run(["sudo", "apt", "install", "-y"] + packages)
-
         elif pkg_manager == "dnf":
-            packages = [
+            return [
                 "gcc",
                 "gcc-c++",
                 "make",
@@ -65,6 +91,22 @@ class SlurmInstaller:
                 "wget"
             ]
 
+        return []
+
+    def install_dependencies(self, pkg_manager):
+        print("==== Installing Required Packages ====")
+
+        if self.offline:
+            print("Dependencies provided by offline bundle.")
+            return
+
+        packages = self.dependency_packages(pkg_manager)
+
+        if pkg_manager == "apt":
+            self.run(["sudo", "apt", "update"])
+            self.run(["sudo", "apt", "install", "-y"] + packages)
+
+        elif pkg_manager == "dnf":
             self.run(["sudo", "dnf", "install", "-y"] + packages)
 
         else:
@@ -76,37 +118,62 @@ class SlurmInstaller:
 
     def enable_munge(self):
         print("==== Enabling Munge ====")
-        self.run(["sudo", "systemctl", "enable", "munge"])
-        self.run(["sudo", "systemctl", "restart", "munge"])
+        with self.privileged.batch() as batch:
+            batch.systemctl("enable", "munge")
+            batch.systemctl("restart", "munge")
+
+        if not ReadinessWaiter().wait(["munge"], deadline=30):
+            raise Exception("Munge did not become ready.")
 
     # -----------------------------
     # Download & Build Slurm
     # -----------------------------
 
-    def download_and_build(self):
+    def source_url(self):
+        return f"https://download.schedmd.com/slurm/{self.tar_name}"
+
+    def download_source(self):
         print("==== Downloading Slurm Source ====")
 
         os.chdir(self.WORKDIR)
 
-        tar_file = f"slurm-{self.VERSION}.tar.bz2"
-        source_dir = f"slurm-{self.VERSION}"
+        if not os.path.exists(self.tar_name):
+            if self.offline:
+                raise Exception(f"{self.tar_name} is missing from the offline bundle.")
+            self.mirrors.download("slurm", self.source_url(), self.tar_name)
+
+    def download_and_build(self):
+        self.download_source()
 
-        if not os.path.exists(tar_file):
-            self.run([
-                "sudo", "wget",
-                f"https://download.schedmd.com/slurm/{tar_file}"
-            ])
+        tar_file = self.tar_name
+        source_dir = f"slurm-{self.VERSION}"
 
         if not os.path.exists(source_dir):
             self.run(["sudo", "tar", "-xjf", tar_file])
 
-        os.chdir(os.path.join(self.WORKDIR, source_dir))
-
         print("==== Building Slurm ====")
 
-        self.run(["sudo", "./configure", "--sysconfdir=/etc/slurm","--without-cgroup","--disable-cgroup"])
-        self.run(["sudo", "make", f"-j{os.cpu_count()}"])
-        self.run(["sudo", "make", "install"])
+        # Built in a throwaway overlay; nothing touches /usr/local until the commit
+        sandbox = BuildSandbox("slurm", os.path.join(self.WORKDIR, source_dir)).open()
+
+        try:
+            self.run(sandbox.wrap(
+                ["./configure", "--sysconfdir=/etc/slurm", "--without-cgroup", "--disable-cgroup"]
+                + self.pmix.configure_args()
+            ))
+            self.run(sandbox.wrap(["make", f"-j{os.cpu_count()}"]))
+            self.run(sandbox.wrap(["make", "install", f"DESTDIR={sandbox.stage}"]))
+
+            # configure generates the unit files; stage them with the binaries
+            units_dir = sandbox.staged(self.UNITS_DIR)
+            os.makedirs(units_dir, exist_ok=True)
+            self.run(sandbox.wrap(["cp"] + [f"etc/{unit}" for unit in self.UNITS] + [units_dir]))
+
+            # /usr/local is shared with other software: copied, and recorded so
+            # a reinstall copies only what changed and the remover takes exactly this
+            sandbox.commit_manifest(self.MANIFEST)
+        finally:
+            sandbox.discard()
 
     # -----------------------------
     # Create Slurm User
@@ -115,14 +182,8 @@ class SlurmInstaller:
     def create_slurm_user(self):
         print("==== Creating Slurm User ====")
 
-        result = subprocess.run(
-            ["id", "slurm"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
-
-        if result.returncode != 0:
-            self.run(["sudo", "useradd", "-r", "-m", "slurm"])
+        # A no-op when the user already exists
+        self.privileged.useradd("slurm")
 
     # -----------------------------
     # Setup Directories
@@ -139,13 +200,19 @@ class SlurmInstaller:
             "/run/slurm"
         ]
 
-        for d in dirs:
-            self.run(["sudo", "mkdir", "-p", d])
+        owned = [
+            "/var/spool/slurmctld",
+            "/var/spool/slurmd",
+            "/var/log/slurm",
+            "/run/slurm"
+        ]
 
-        self.run(["sudo", "chown", "-R", "slurm:slurm", "/var/spool/slurmctld"])
-        self.run(["sudo", "chown", "-R", "slurm:slurm", "/var/spool/slurmd"])
-        self.run(["sudo", "chown", "-R", "slurm:slurm", "/var/log/slurm"])
-        self.run(["sudo", "chown", "-R", "slurm:slurm", "/run/slurm"])
+        # One round trip to the privileged helper for the whole layout
+        with self.privileged.batch() as batch:
+            for d in dirs:
+                batch.mkdir(d)
+            for d in owned:
+                batch.chown(d, "slurm:slurm", recursive=True)
 
     # -----------------------------
     # Create slurm.conf
@@ -155,41 +222,67 @@ class SlurmInstaller:
         print("==== Creating slurm.conf ====")
 
         hostname = subprocess.check_output(["hostname"], text=True).strip()
-        cpu_count = os.cpu_count()
-
-        config = f"""
-ClusterName=cluster
-SlurmctldHost={hostname}
-
-SlurmUser=slurm
-StateSaveLocation=/var/spool/slurmctld
-SlurmdSpoolDir=/var/spool/slurmd
-
-AuthType=auth/munge
-ProctrackType=proctrack/linuxproc
-TaskPlugin=task/none
-JobAcctGatherType=jobacct_gather/none
-CgroupPlugin=disabled
-
-SlurmctldPidFile=/run/slurm/slurmctld.pid
-SlurmdPidFile=/run/slurm/slurmd.pid
-
-SlurmctldLogFile=/var/log/slurm/slurmctld.log
-SlurmdLogFile=/var/log/slurm/slurmd.log
-
-SelectType=select/cons_tres
-SchedulerType=sched/backfill
+        cpu = get_facts().get("cpu")
+
+        # slurmd checks these against the hardware, so only give what is known
+        node = {"CPUs": cpu["cpus"]}
+        if cpu["topology"]:
+            node.update({
+                "Sockets": cpu["topology"]["sockets"],
+                "CoresPerSocket": cpu["topology"]["cores_per_socket"],
+                "ThreadsPerCore": cpu["topology"]["threads_per_core"]
+            })
+
+        # Built against the shared PMIx: srun starts MPI ranks itself
+        mpi_default = "pmix" if self.pmix.configure_args() else "none"
+
+        config = SlurmConfig()
+
+        for key, value in [
+            ("ClusterName", "cluster"),
+            ("SlurmctldHost", hostname),
+            ("SlurmUser", "slurm"),
+            ("StateSaveLocation", "/var/spool/slurmctld"),
+            ("SlurmdSpoolDir", "/var/spool/slurmd"),
+            ("AuthType", "auth/munge"),
+            ("ProctrackType", "proctrack/linuxproc"),
+            ("TaskPlugin", "task/none"),
+            ("JobAcctGatherType", "jobacct_gather/none"),
+            ("CgroupPlugin", "disabled"),
+            ("SlurmctldPidFile", "/run/slurm/slurmctld.pid"),
+            ("SlurmdPidFile", "/run/slurm/slurmd.pid"),
+            ("SlurmctldLogFile", "/var/log/slurm/slurmctld.log"),
+            ("SlurmdLogFile", "/var/log/slurm/slurmd.log"),
+            ("SelectType", "select/cons_tres"),
+            ("SchedulerType", "sched/backfill"),
+            ("MpiDefault", mpi_default)
+        ]:
+            config.set(key, value)
+
+        inventory = ClusterInventory.default_path()
+
+        if inventory:
+            # Every node of the cluster, grouped into capability partitions
+            cluster = ClusterInventory.load(inventory)
+            cluster.generate(config)
+            print(f"Inventory {inventory}: {cluster.summary()}")
+        else:
+            config.add_entity("NodeName", hostname, **node, State="UNKNOWN")
+            config.add_entity("PartitionName", "debug", Nodes=hostname, Default="YES",
+                              MaxTime="INFINITE", State="UP")
 
-NodeName={hostname} CPUs={cpu_count} State=UNKNOWN
-PartitionName=debug Nodes={hostname} Default=YES MaxTime=INFINITE State=UP
-"""
+        # Diffed against the live file: unchanged means untouched, and running
+        # daemons get a reconfigure or a rolling restart only where needed.
+        # Accounting and the health check add their keys later; keep them.
+        SlurmConfigManager().apply(config, keep_extra=True)
 
-        with open("/tmp/slurm.conf", "w") as f:
-            f.write(config)
+    # -----------------------------
+    # Node Health Check
+    # -----------------------------
 
-        self.run(["sudo", "mv", "/tmp/slurm.conf", "/etc/slurm/slurm.conf"])
-        self.run(["sudo", "chown", "slurm:slurm", "/etc/slurm/slurm.conf"])
-        self.run(["sudo", "chmod", "644", "/etc/slurm/slurm.conf"])
+    def setup_health_check(self):
+        # slurmctld is not running yet, so slurm.conf is simply rewritten
+        NodeHealthCheck().install(reconfigure=False)
 
     # -----------------------------
     # Install systemd service files
@@ -198,22 +291,23 @@ PartitionName=debug Nodes={hostname} Default=YES MaxTime=INFINITE State=UP
     def install_systemd_services(self):
         print("==== Installing systemd service files ====")
 
-        source_dir = f"{self.WORKDIR}/slurm-{self.VERSION}"
+        # The unit files were staged and committed together with the build
+        for unit in self.UNITS:
+            if not os.path.exists(os.path.join(self.UNITS_DIR, unit)):
+                raise Exception(f"{unit} was not installed by the Slurm build.")
 
-        self.run([
-            "sudo", "cp",
-            f"{source_dir}/etc/slurmctld.service",
-            "/etc/systemd/system/"
-        ])
+        with self.privileged.batch() as batch:
+            batch.systemctl("daemon-reload")
+            batch.systemctl("daemon-reexec")
 
-        self.run([
-            "sudo", "cp",
-            f"{source_dir}/etc/slurmd.service",
-            "/etc/systemd/system/"
-        ])
+    # -----------------------------
+    # Accounting (slurmdbd + MariaDB)
+    # -----------------------------
 
-        self.run(["sudo", "systemctl", "daemon-reload"])
-        self.run(["sudo", "systemctl", "daemon-reexec"])
+    def setup_accounting(self, pkg_manager):
+        # Runs before slurmctld first starts, so no restart is needed afterwards
+        accounting = SlurmAccountingInstaller(f"{self.WORKDIR}/slurm-{self.VERSION}")
+        accounting.install(pkg_manager, restart_slurmctld=False)
 
     # -----------------------------
     # Enable Services
@@ -222,12 +316,22 @@ PartitionName=debug Nodes={hostname} Default=YES MaxTime=INFINITE State=UP
     def enable_services(self):
         print("==== Enabling Slurm Services ====")
 
-        self.run(["sudo", "systemctl", "enable", "slurmctld"])
-        self.run(["sudo", "systemctl", "enable", "slurmd"])
+        # Same-verb calls reach systemctl together: enable slurmctld slurmd
+        with self.privileged.batch() as batch:
+            batch.systemctl("enable", "slurmctld")
+            batch.systemctl("enable", "slurmd")
+
+            # start, not restart: a rerun must not interrupt running daemons;
+            # config changes were already applied by create_slurm_conf
+            batch.systemctl("start", "munge")
+            batch.systemctl("start", "slurmctld")
+            batch.systemctl("start", "slurmd")
+
+        # Wait on all daemons together: systemd state, then their sockets
+        if not ReadinessWaiter().wait(["munge", "slurmctld", "slurmd"], deadline=60):
+            raise Exception("Slurm services did not become ready.")
 
-        self.run(["sudo", "systemctl", "restart", "munge"])
-        self.run(["sudo", "systemctl", "start", "slurmctld"])
-        self.run(["sudo", "systemctl", "start", "slurmd"])
+        get_facts().refresh("services")
 
     # -----------------------------
     # Verify Using sinfo
@@ -250,6 +354,47 @@ PartitionName=debug Nodes={hostname} Default=YES MaxTime=INFINITE State=UP
             print(result.stderr)
             raise Exception("Slurm installation verification failed.")
 
+    # -----------------------------
+    # Plan (dry run)
+    # -----------------------------
+
+    def plan(self):
+        """Steps install() would run on this node; nothing is changed"""
+        tar_file = os.path.join(self.WORKDIR, self.tar_name)
+        source_dir = os.path.join(self.WORKDIR, f"slurm-{self.VERSION}")
+
+        if os.path.exists(source_dir):
+            build = "extracted tree reused"
+        elif os.path.exists(tar_file):
+            build = "cached tarball"
+        else:
+            build = "download + full build"
+
+        if self.pmix.enabled():
+            build += f", --with-pmix={self.pmix.install_dir}"
+
+        inventory = ClusterInventory.default_path()
+
+        accounting = SlurmAccountingInstaller(source_dir)
+        accounting_note = (
+            f"buffer pool {accounting.tuning()['innodb_buffer_pool_size']}"
+            if accounting.enabled else "disabled"
+        )
+
+        return [
+            ("install_dependencies", "system packages"),
+            ("enable_munge", ""),
+            ("download_and_build", build),
+            ("create_slurm_user", ""),
+            ("setup_directories", ""),
+            ("create_slurm_conf", f"inventory {inventory}" if inventory else "this node only"),
+            ("setup_health_check", ""),
+            ("install_systemd_services", ""),
+            ("setup_accounting", accounting_note),
+            ("enable_services", ""),
+            ("verify", "")
+        ]
+
     # -----------------------------
     # Main Install Flow
     # -----------------------------
@@ -260,15 +405,17 @@ PartitionName=debug Nodes={hostname} Default=YES MaxTime=INFINITE State=UP
 
         pkg_manager = system_info["package_manager"]
 
-        self.install_dependencies(pkg_manager)
-        self.enable_munge()
-        self.download_and_build()
-        self.create_slurm_user()
-        self.setup_directories()
-        self.create_slurm_conf()
-        self.install_systemd_services()
-        self.enable_services()
-        self.verify()
+        self.timings.run("slurm", self.install_dependencies, pkg_manager)
+        self.timings.run("slurm", self.enable_munge)
+        self.timings.run("slurm", self.download_and_build)
+        self.timings.run("slurm", self.create_slurm_user)
+        self.timings.run("slurm", self.setup_directories)
+        self.timings.run("slurm", self.create_slurm_conf)
+        self.timings.run("slurm", self.setup_health_check)
+        self.timings.run("slurm", self.install_systemd_services)
+        self.timings.run("slurm", self.setup_accounting, pkg_manager)
+        self.timings.run("slurm", self.enable_services)
+        self.timings.run("slurm", self.verify)
 
         print("==== Slurm Installation Complete ====")
 
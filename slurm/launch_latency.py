@@ -0,0 +1,137 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+
+from modules.install_openmpi_module import OpenMPIInstaller
+
+
+class LaunchLatencyTest:
+    """
+    Times how long an MPI job takes to start and finish when srun launches
+    the ranks through PMIx, against salloc + mpirun, which starts its own
+    daemon on every node first. The probe does nothing but MPI_Init,
+    a barrier and MPI_Finalize, so the difference is the launch path.
+    """
+
+    PROBE = r"""
+#include <mpi.h>
+
+int main(int argc, char **argv)
+{
+    MPI_Init(&argc, &argv);
+    MPI_Barrier(MPI_COMM_WORLD);
+    MPI_Finalize();
+    return 0;
+}
+"""
+
+    TIMEOUT = 300
+
+    def __init__(self, ntasks=None):
+        self.home = str(Path.home())
+        self.ntasks = int(ntasks or os.getenv("HPC_LAUNCH_TASKS") or os.cpu_count() or 1)
+        self.repeats = int(os.getenv("HPC_LAUNCH_REPEATS", "5"))
+
+        self.openmpi = OpenMPIInstaller().install_dir
+
+        # Under ~/hpc so every node in the allocation sees the probe
+        self.work_root = f"{self.home}/hpc/.launch-test"
+
+    # -----------------------------
+    # Preconditions
+    # -----------------------------
+    def srun_has_pmix(self):
+        result = subprocess.run(["srun", "--mpi=list"], capture_output=True, text=True)
+        return "pmix" in result.stdout + result.stderr
+
+    def build_probe(self, work_dir):
+        source = f"{work_dir}/probe.c"
+        binary = f"{work_dir}/probe"
+
+        with open(source, "w") as f:
+            f.write(self.PROBE)
+
+        subprocess.run([f"{self.openmpi}/bin/mpicc", "-O2", "-o", binary, source], check=True)
+        return binary
+
+    # -----------------------------
+    # Launchers
+    # -----------------------------
+    def commands(self, probe):
+        tasks = str(self.ntasks)
+        mpirun = [f"{self.openmpi}/bin/mpirun", "-n", tasks]
+
+        # mpirun refuses root unless told otherwise; srun does not care
+        if os.geteuid() == 0:
+            mpirun.append("--allow-run-as-root")
+
+        # Both pay for an allocation, so only the launch path differs
+        return {
+            "srun (pmix)": ["srun", "--mpi=pmix", "-n", tasks, probe],
+            "salloc + mpirun": ["salloc", "-n", tasks] + mpirun + [probe]
+        }
+
+    def time_launch(self, command):
+        start = time.monotonic()
+        result = subprocess.run(command, capture_output=True, text=True, timeout=self.TIMEOUT)
+        elapsed = time.monotonic() - start
+
+        if result.returncode != 0:
+            raise Exception(f"{' '.join(command)} failed:\n{result.stderr.strip()}")
+
+        return elapsed
+
+    def measure(self, command):
+        # The first launch also warms the page cache and the daemons' caches
+        self.time_launch(command)
+        return sorted(self.time_launch(command) for _ in range(self.repeats))
+
+    # -----------------------------
+    # Main Flow
+    # -----------------------------
+    def run(self):
+        print(f"==== Launch Latency ({self.ntasks} ranks, {self.repeats} runs each) ====")
+
+        if not os.path.exists(f"{self.openmpi}/bin/mpicc"):
+            print("✖ OpenMPI is not installed. Run: hpcctl --module openmpi")
+            return None
+
+        if not self.srun_has_pmix():
+            print("✖ srun has no PMIx plugin. Install PMIx, then rebuild Slurm:")
+            print("  hpcctl --module pmix && hpcctl --module slurm")
+            return None
+
+        os.makedirs(self.work_root, exist_ok=True)
+        work_dir = tempfile.mkdtemp(dir=self.work_root)
+
+        try:
+            probe = self.build_probe(work_dir)
+            results = {
+                name: self.measure(command)
+                for name, command in self.commands(probe).items()
+            }
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        medians = {name: samples[len(samples) // 2] for name, samples in results.items()}
+
+        for name, samples in results.items():
+            print(f"  {name:<16} median {medians[name]:6.2f}s  best {samples[0]:6.2f}s")
+
+        srun, mpirun = medians["srun (pmix)"], medians["salloc + mpirun"]
+        print("--------------------------------")
+
+        if srun < mpirun:
+            print(f"✔ srun starts {mpirun / srun:.1f}x faster ({(mpirun - srun) * 1000:.0f} ms saved per job)")
+        else:
+            print(f"⚠ srun is not faster than mpirun here ({(srun - mpirun) * 1000:+.0f} ms)")
+
+        return medians
+
+
+if __name__ == "__main__":
+    LaunchLatencyTest(*sys.argv[1:2]).run()
@@ -0,0 +1,244 @@
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import subprocess
+from pathlib import Path
+
+from common.privileged_session import privileged_session
+
+
+class NodeHealthCheck:
+    """
+    Slurm's HealthCheckProgram for this node.
+
+    Every check is a couple of syscalls and they all run at once, bounded by
+    a time budget: a check still hanging at the deadline (a stuck mount, a
+    wedged munged) counts as failed. On failure the node is drained; once
+    the checks pass again, a node this program drained is resumed. Nodes
+    drained for any other reason are left alone, and scontrol only runs on
+    a state change, so a healthy node costs no subprocess at all.
+    """
+
+    SLURM_CONF = "/etc/slurm/slurm.conf"
+    WRAPPER = "/etc/slurm/healthcheck.sh"
+    STATE_FILE = "/var/lib/hpcctl/health.json"
+
+    MUNGE_SOCKET = "/run/munge/munge.socket.2"
+    SPOOL_DIR = "/var/spool/slurmd"
+
+    REASON_PREFIX = "hpcctl health:"
+
+    def __init__(self):
+        self.home = str(Path.home())
+
+        # The wrapper pins these, since slurmd runs it with an empty environment
+        self.openmpi_prefix = os.getenv("HPC_HEALTH_OPENMPI", f"{self.home}/hpc/openmpi")
+        self.budget = float(os.getenv("HPC_HEALTH_BUDGET_MS", "200")) / 1000
+        self.tmp_min_bytes = int(os.getenv("HPC_HEALTH_TMP_MIN_MB", "1024")) * 1024 ** 2
+        self.interval = int(os.getenv("HPC_HEALTH_INTERVAL", "300"))
+
+        self.node = socket.gethostname().split(".")[0]
+
+    # -----------------------------
+    # Checks
+    # -----------------------------
+    def check_tmp(self):
+        stats = os.statvfs("/tmp")
+        free = stats.f_bavail * stats.f_frsize
+
+        if free < self.tmp_min_bytes:
+            return False, f"/tmp has {free // 1024 ** 2} MiB free"
+        if stats.f_files and stats.f_favail == 0:
+            return False, "/tmp is out of inodes"
+
+        return True, f"/tmp {free // 1024 ** 2} MiB free"
+
+    def check_munge(self):
+        # A connect only succeeds while munged is alive and accepting
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.budget)
+            try:
+                sock.connect(self.MUNGE_SOCKET)
+            except OSError as error:
+                return False, f"munge socket: {error.strerror or error}"
+
+        return True, "munge accepting connections"
+
+    def check_openmpi(self):
+        # ~/hpc/openmpi/<version>/bin/mpirun for any installed version
+        try:
+            versions = os.listdir(self.openmpi_prefix)
+        except OSError:
+            return False, f"{self.openmpi_prefix} missing"
+
+        for version in versions:
+            if os.access(f"{self.openmpi_prefix}/{version}/bin/mpirun", os.X_OK):
+                return True, f"openmpi {version}"
+
+        return False, f"no usable mpirun under {self.openmpi_prefix}"
+
+    def check_spool(self):
+        # Creating a file catches a missing directory, a full disk and a read-only remount
+        probe = f"{self.SPOOL_DIR}/.hpcctl-health-{os.getpid()}"
+
+        try:
+            fd = os.open(probe, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            os.close(fd)
+            os.remove(probe)
+        except OSError as error:
+            return False, f"{self.SPOOL_DIR} not writable: {error.strerror}"
+
+        return True, f"{self.SPOOL_DIR} writable"
+
+    def checks(self):
+        return {
+            "tmp": self.check_tmp,
+            "munge": self.check_munge,
+            "openmpi": self.check_openmpi,
+            "spool": self.check_spool
+        }
+
+    # -----------------------------
+    # Run Within Budget
+    # -----------------------------
+    def run_checks(self):
+        """name -> (ok, message); checks that miss the deadline fail"""
+        results = {}
+
+        def run_one(name, check):
+            try:
+                results[name] = check()
+            except Exception as error:
+                results[name] = (False, str(error))
+
+        # Daemon threads rather than a pool: a check stuck in the kernel
+        # must not keep the process alive past the deadline
+        threads = [
+            threading.Thread(target=run_one, args=(name, check), daemon=True)
+            for name, check in self.checks().items()
+        ]
+        deadline = time.monotonic() + self.budget
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+        for name in self.checks():
+            results.setdefault(name, (False, f"timed out after {self.budget * 1000:.0f} ms"))
+
+        return results
+
+    # -----------------------------
+    # Drain / Resume
+    # -----------------------------
+    def load_state(self):
+        try:
+            with open(self.STATE_FILE) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_state(self, state):
+        os.makedirs(os.path.dirname(self.STATE_FILE), exist_ok=True)
+        tmp_path = f"{self.STATE_FILE}.{os.getpid()}"
+
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+
+        os.replace(tmp_path, self.STATE_FILE)
+
+    def scontrol(self, *arguments):
+        result = subprocess.run(
+            ["scontrol", "update", f"NodeName={self.node}"] + list(arguments),
+            capture_output=True,
+            text=True
+        )
+        return result.returncode == 0
+
+    def enforce(self, results):
+        failures = [f"{name}: {message}" for name, (ok, message) in results.items() if not ok]
+        state = self.load_state()
+
+        if failures:
+            reason = f"{self.REASON_PREFIX} {'; '.join(sorted(failures))}"
+
+            if state.get("reason") != reason and self.scontrol("State=DRAIN", f"Reason={reason}"):
+                self.save_state({"reason": reason, "since": time.time()})
+
+        elif state.get("reason"):
+            # Only resume what we drained; the state file says we did
+            if self.scontrol("State=RESUME"):
+                os.remove(self.STATE_FILE)
+
+        return not failures
+
+    # -----------------------------
+    # Install Into slurm.conf
+    # -----------------------------
+    def wrapper_script(self):
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        return f"""#!/bin/sh
+# Generated by hpcctl: Slurm HealthCheckProgram
+export HPC_HEALTH_OPENMPI="{self.openmpi_prefix}"
+export HPC_HEALTH_BUDGET_MS="{self.budget * 1000:.0f}"
+export HPC_HEALTH_TMP_MIN_MB="{self.tmp_min_bytes // 1024 ** 2}"
+cd "{base_dir}" && exec "{sys.executable}" -s -m slurm.node_health --slurm
+"""
+
+    def configure_slurm_conf(self, reconfigure=True):
+        # Imported here: slurmd runs this module every interval and never needs it
+        from slurm.slurm_config import SlurmConfigManager
+
+        settings = {
+            "HealthCheckProgram": self.WRAPPER,
+            "HealthCheckInterval": str(self.interval),
+            "HealthCheckNodeState": "ANY"
+        }
+
+        # All three are re-read on scontrol reconfigure; nothing restarts
+        return SlurmConfigManager().update(settings, live=reconfigure)
+
+    def install(self, reconfigure=True):
+        print("==== Installing Node Health Check ====")
+
+        privileged_session().write_file(self.WRAPPER, self.wrapper_script(), mode="755")
+
+        print(f"✔ {self.WRAPPER} (budget {self.budget * 1000:.0f} ms)")
+
+        # A running controller picks the new settings up without a restart
+        if self.configure_slurm_conf(reconfigure):
+            print(f"✔ slurm.conf runs it every {self.interval}s")
+        else:
+            print("Health check already configured in slurm.conf.")
+
+    # -----------------------------
+    # Report
+    # -----------------------------
+    def report(self):
+        start = time.monotonic()
+        results = self.run_checks()
+        elapsed = (time.monotonic() - start) * 1000
+
+        print("==== Node Health ====")
+
+        for name, (ok, message) in results.items():
+            print(f"{'✔' if ok else '✖'} {name:<8} {message}")
+
+        print(f"Checked in {elapsed:.1f} ms (budget {self.budget * 1000:.0f} ms)")
+
+        return all(ok for ok, _ in results.values())
+
+
+if __name__ == "__main__":
+    health = NodeHealthCheck()
+
+    if sys.argv[1:] == ["--slurm"]:
+        # Called by slurmd: act on the result, stay quiet
+        sys.exit(0 if health.enforce(health.run_checks()) else 1)
+
+    sys.exit(0 if health.report() else 1)
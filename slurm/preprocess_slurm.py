@@ -1,6 +1,9 @@
-import subprocess
 import shutil
 
+from system_check.host_facts import get_facts
+from common.build_sandbox import BuildSandbox
+from common.privileged_session import privileged_session
+
 
 class SlurmPreprocessor:
 
@@ -14,21 +17,11 @@ class SlurmPreprocessor:
 
     def is_service_active(self, service):
         """Check if a systemd service is active"""
-        result = subprocess.run(
-            ["systemctl", "is-active", "--quiet", service],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
-        return result.returncode == 0
+        return get_facts().service_active(service)
 
     def service_exists(self, service):
         """Check if a systemd service exists"""
-        result = subprocess.run(
-            ["systemctl", "list-unit-files"],
-            capture_output=True,
-            text=True
-        )
-        return service in result.stdout
+        return get_facts().service_exists(service)
 
     # -----------------------------
     # Broken Runtime Cleanup
@@ -38,57 +31,68 @@ class SlurmPreprocessor:
         print("⚠ Detected broken Slurm environment.")
         print("Cleaning runtime leftovers (not uninstalling packages)...")
 
-        # Stop services safely (ignore errors)
-        subprocess.run(["sudo", "systemctl", "stop", "slurmctld.service"],
-                       stderr=subprocess.DEVNULL)
-        subprocess.run(["sudo", "systemctl", "stop", "slurmd.service"],
-                       stderr=subprocess.DEVNULL)
-        subprocess.run(["sudo", "systemctl", "stop", "munge.service"],
-                       stderr=subprocess.DEVNULL)
+        with privileged_session().batch() as batch:
+            # Stop services safely (ignore errors)
+            batch.systemctl("stop", "slurmctld.service", check=False)
+            batch.systemctl("stop", "slurmd.service", check=False)
+            batch.systemctl("stop", "munge.service", check=False)
+
+            # Remove stale runtime directories only
+            batch.remove("/var/spool/slurm", check=False)
+            batch.remove("/var/run/munge", check=False)
 
-        # Remove stale runtime directories only
-        subprocess.run(["sudo", "rm", "-rf", "/var/spool/slurm"],
-                       stderr=subprocess.DEVNULL)
-        subprocess.run(["sudo", "rm", "-rf", "/var/run/munge"],
-                       stderr=subprocess.DEVNULL)
+        # Half-finished builds never reached /usr/local; only their sandboxes remain
+        BuildSandbox("slurm").sweep()
+
+        get_facts().refresh("services")
 
         print("✔ Broken runtime cleaned successfully.")
 
     # -----------------------------
-    # Main Preprocess Logic
+    # Read-only Status Detection
     # -----------------------------
 
-    def check(self):
-        print("===== CHECKING SLURM STATUS =====")
+    def detect_status(self):
+        """Classify the node without changing anything: (status, reason)"""
 
         # Case 1: Slurm command not found
         if not self.command_exists("sinfo"):
-            print("Slurm not installed.")
-            return "not_installed"
-
-        print("Slurm command found.")
+            return "not_installed", "Slurm not installed."
 
         # Case 2: Service file missing
         if not self.service_exists("slurmctld.service"):
-            print("Slurm partially installed (service file missing).")
-            self.clean_broken_state()
-            return "broken_cleaned"
+            return "broken", "Slurm partially installed (service file missing)."
 
         # Case 3: Munge not active
         if not self.is_service_active("munge.service"):
-            print("Munge service not running.")
-            self.clean_broken_state()
-            return "broken_cleaned"
+            return "broken", "Munge service not running."
 
         # Case 4: Slurm fully active
         if self.is_service_active("slurmctld.service"):
-            print("✔ Slurm is running properly.")
-            return "installed"
+            return "installed", "✔ Slurm is running properly."
 
         # Case 5: Installed but inactive
-        print("Slurm installed but not active.")
-        self.clean_broken_state()
-        return "broken_cleaned"
+        return "broken", "Slurm installed but not active."
+
+    # -----------------------------
+    # Main Preprocess Logic
+    # -----------------------------
+
+    def check(self):
+        print("===== CHECKING SLURM STATUS =====")
+
+        status, reason = self.detect_status()
+
+        if status != "not_installed":
+            print("Slurm command found.")
+
+        print(reason)
+
+        if status == "broken":
+            self.clean_broken_state()
+            return "broken_cleaned"
+
+        return status
     
 if __name__ == "__main__":
     preprocessor = SlurmPreprocessor()
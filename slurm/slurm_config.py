@@ -0,0 +1,502 @@
+import os
+import sys
+import shlex
+import socket
+import tempfile
+import subprocess
+
+from common.command_engine import CommandEngine
+from common.privileged_session import privileged_session
+from common.service_readiness import ReadinessWaiter
+from slurm.hostlist import expand_hostlist
+
+
+class SlurmConfig:
+    """
+    slurm.conf as data: global parameters plus named entity lines
+    (NodeName=..., PartitionName=...). Keys are case-insensitive like
+    Slurm's own parser; the spelling of the first occurrence is kept.
+
+    Entity lines keep their order: a NodeName=DEFAULT line applies to the
+    lines after it, up to the next DEFAULT of the same kind. Parameters
+    Slurm accepts several times (SlurmctldHost: primary, then backups)
+    keep every value in order.
+    """
+
+    # Lines that define one named object each; their other keys belong to it
+    ENTITIES = ["NodeName", "NodeSet", "DownNodes", "FrontendName", "SwitchName", "PartitionName"]
+
+    # One line per value, in order of precedence
+    REPEATABLE = {"slurmctldhost"}
+
+    def __init__(self):
+        self.params = {}      # lower key -> (Key, value); a list of values for REPEATABLE keys
+        self.entities = []    # (Kind, name, {Attr: value}) in file order, DEFAULT lines included
+        self.includes = []
+
+        # Keys a parsed file gave twice where Slurm expects them once
+        self.repeated = []
+
+    # -----------------------------
+    # Parse / Render
+    # -----------------------------
+    @classmethod
+    def parse(cls, text):
+        config = cls()
+        entity_kinds = {kind.lower(): kind for kind in cls.ENTITIES}
+
+        # Backslash-newline continues a line
+        for line in text.replace("\\\n", " ").splitlines():
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+
+            if line.lower().startswith("include "):
+                config.includes.append(line.split(None, 1)[1])
+                continue
+
+            # shlex only where quotes need it; 10k-node files stay fast
+            words = shlex.split(line) if '"' in line or "'" in line else line.split()
+            tokens = [word.split("=", 1) for word in words if "=" in word]
+            if not tokens:
+                continue
+
+            kind, name = tokens[0]
+
+            if kind.lower() in entity_kinds:
+                if name.upper() != "DEFAULT" and config.entity(kind, name) is not None:
+                    config.repeated.append(f"{entity_kinds[kind.lower()]}={name}")
+                config.add_entity(entity_kinds[kind.lower()], name, **dict(tokens[1:]))
+                continue
+
+            for key, value in tokens:
+                if key.lower() in cls.REPEATABLE:
+                    config.params.setdefault(key.lower(), (key, []))[1].append(value)
+                    continue
+
+                if key.lower() in config.params:
+                    config.repeated.append(key)
+                config.set(key, value)
+
+        return config
+
+    @classmethod
+    def load(cls, path):
+        """The file as root sees it; None if there is none yet"""
+        text = privileged_session().read_file(path)
+        return cls.parse(text) if text is not None else None
+
+    def render(self):
+        lines = ["# Managed by hpcctl; edits are diffed against the next generated version"]
+
+        for key, value in self.params.values():
+            lines += [f"{key}={self.quote(item)}" for item in (value if isinstance(value, list) else [value])]
+
+        lines += [f"include {path}" for path in self.includes]
+
+        previous = None
+        for kind, name, attrs in self.entities:
+            if kind != previous:
+                lines.append("")
+                previous = kind
+
+            fields = [f"{kind}={name}"] + [f"{key}={self.quote(value)}" for key, value in attrs.items()]
+            lines.append(" ".join(fields))
+
+        return "\n".join(lines) + "\n"
+
+    def quote(self, value):
+        return f'"{value}"' if " " in value else value
+
+    # -----------------------------
+    # Edit
+    # -----------------------------
+    def get(self, key, default=None):
+        return self.params.get(key.lower(), (key, default))[1]
+
+    def set(self, key, value):
+        """A list sets every value of a REPEATABLE key; a single value replaces them all"""
+        spelled = self.params.get(key.lower(), (key, None))[0]
+
+        if key.lower() in self.REPEATABLE:
+            value = [str(item) for item in value] if isinstance(value, list) else [str(value)]
+        else:
+            value = str(value)
+
+        self.params[key.lower()] = (spelled, value)
+
+    def remove(self, key):
+        self.params.pop(key.lower(), None)
+
+    def entity(self, kind, name):
+        """Position of the named (non-DEFAULT) entity line, or None"""
+        for index, (entity_kind, entity_name, attrs) in enumerate(self.entities):
+            if entity_kind.lower() == kind.lower() and entity_name == name:
+                return index
+        return None
+
+    def add_entity(self, kind, name, **attrs):
+        """Appends a line; a named entity that exists already is replaced in place"""
+        entry = (kind, name, {key: str(value) for key, value in attrs.items()})
+        index = None if name.upper() == "DEFAULT" else self.entity(kind, name)
+
+        if index is None:
+            self.entities.append(entry)
+        else:
+            self.entities[index] = entry
+
+    def keep_extra(self, live):
+        """
+        Carries over parameters only the live file has (added by other
+        steps or by hand), and backup controllers listed after ours
+        """
+        for key, entry in live.params.items():
+            current = self.params.setdefault(key, entry)[1]
+
+            if key in self.REPEATABLE and entry[1][:len(current)] == current:
+                self.params[key] = (self.params[key][0], entry[1])
+
+    def node_names(self):
+        """Hostlist expressions of every NodeName line except DEFAULT"""
+        return [
+            name for kind, name, attrs in self.entities
+            if kind == "NodeName" and name.upper() != "DEFAULT"
+        ]
+
+    def resolved(self):
+        """
+        (lower kind, name) -> (Kind, name, attrs) with the DEFAULT lines
+        in effect folded in; DEFAULT lines themselves are keyed by their
+        ordinal, ("nodename", "DEFAULT", 1), ...
+        """
+        defaults = {}
+        ordinals = {}
+        resolved = {}
+
+        for kind, name, attrs in self.entities:
+            lower = kind.lower()
+
+            if name.upper() == "DEFAULT":
+                ordinals[lower] = ordinals.get(lower, 0) + 1
+                resolved[(lower, "DEFAULT", ordinals[lower])] = (kind, name, attrs)
+                defaults.setdefault(lower, {}).update({key.lower(): (key, value) for key, value in attrs.items()})
+                continue
+
+            merged = dict(defaults.get(lower, {}))
+            merged.update({key.lower(): (key, value) for key, value in attrs.items()})
+            resolved[(lower, name)] = (kind, name, dict(merged.values()))
+
+        return resolved
+
+    # -----------------------------
+    # Diff
+    # -----------------------------
+    def diff(self, new):
+        """
+        Changes from this config to new: (kind, key, old, new); None =
+        absent. Entities compare with their DEFAULTs applied.
+        """
+        changes = []
+
+        for key in list(self.params) + [key for key in new.params if key not in self.params]:
+            old_value = self.params.get(key, (None, None))[1]
+            new_value = new.params.get(key, (None, None))[1]
+
+            if old_value != new_value:
+                spelled = (new.params.get(key) or self.params.get(key))[0]
+                changes.append(("param", spelled, old_value, new_value))
+
+        if self.includes != new.includes:
+            changes.append(("param", "include", " ".join(self.includes) or None, " ".join(new.includes) or None))
+
+        old_entities = self.resolved()
+        new_entities = new.resolved()
+
+        for key in list(old_entities) + [key for key in new_entities if key not in old_entities]:
+            old_entity = old_entities.get(key)
+            new_entity = new_entities.get(key)
+            old_attrs = old_entity[2] if old_entity else None
+            new_attrs = new_entity[2] if new_entity else None
+
+            if old_attrs != new_attrs:
+                kind, name = (new_entity or old_entity)[:2]
+                changes.append((kind, name, old_attrs, new_attrs))
+
+        return changes
+
+
+class SlurmConfigManager:
+    """
+    Applies a new slurm.conf with the least disruption: nothing if it is
+    unchanged, scontrol reconfigure for what the daemons re-read at run
+    time, and restarts only for parameters that are read at startup.
+
+    Restarts roll: slurmctld first (its state is on disk, so queued and
+    running jobs survive), then slurmd a few nodes at a time. Running job
+    steps belong to slurmstepd, so restarting slurmd does not kill them.
+    """
+
+    SLURM_CONF = "/etc/slurm/slurm.conf"
+
+    # Read once at startup by both daemons
+    RESTART_ALL = {
+        "authtype", "authalttypes", "credtype", "plugindir", "slurmctldhost", "controlmachine",
+        "controladdr", "backupcontroller", "backupaddr", "slurmctldport", "slurmdport",
+        "switchtype", "grestypes", "include"
+    }
+
+    # Read once at startup by slurmctld
+    RESTART_SLURMCTLD = {
+        "clustername", "slurmuser", "statesavelocation", "selecttype", "selecttypeparameters",
+        "schedulertype", "prioritytype", "accountingstoragetype", "accountingstoragehost",
+        "accountingstorageport", "jobcomptype", "slurmctldpidfile"
+    }
+
+    # Read once at startup by slurmd
+    RESTART_SLURMD = {
+        "slurmdspooldir", "slurmduser", "slurmdpidfile", "proctracktype", "taskplugin",
+        "jobacctgathertype", "cgroupplugin", "launchtype"
+    }
+
+    # NodeName attributes that change what slurmd registers with
+    NODE_HARDWARE = {
+        "cpus", "boards", "sockets", "socketsperboard", "corespersocket", "threadspercore",
+        "realmemory", "gres", "nodeaddr", "nodehostname", "port", "tmpdisk"
+    }
+
+    def __init__(self):
+        self.privileged = privileged_session()
+        self.hostnames = {socket.gethostname(), socket.gethostname().split(".")[0]}
+
+        # Nodes whose slurmd restarts at the same time; the rest keep running
+        self.rolling_batch = int(os.getenv("HPC_SLURM_ROLLING_BATCH", "8"))
+        self.engine = CommandEngine("slurm-config", max_parallel=self.rolling_batch)
+
+    # -----------------------------
+    # Nodes
+    # -----------------------------
+    def expand(self, hostlists):
+        """node[01-04],gpu1 -> node01..node04, gpu1"""
+        return [node for hostlist in hostlists for node in expand_hostlist(hostlist)]
+
+    def is_local(self, node):
+        return node in self.hostnames
+
+    # -----------------------------
+    # Classify
+    # -----------------------------
+    def classify(self, changes, new):
+        """
+        What the changes need: {"slurmctld": bool, "slurmd": [nodes],
+        "reconfigure": bool}. Adding or removing nodes restarts every
+        daemon; changing one node's hardware restarts only its slurmd, and
+        Weight, Features or State changes only need a reconfigure.
+        """
+        every_node = self.expand(new.node_names())
+        actions = {"slurmctld": False, "slurmd": set(), "reconfigure": False}
+
+        for kind, key, old, new_value in changes:
+            name = key.lower()
+
+            if kind != "param" and name == "default":
+                # What a DEFAULT line changes shows up on the lines it applies to
+                continue
+
+            if kind == "param" and name in self.RESTART_ALL:
+                actions["slurmctld"] = True
+                actions["slurmd"].update(every_node)
+
+            elif kind == "param" and name in self.RESTART_SLURMCTLD:
+                actions["slurmctld"] = True
+
+            elif kind == "param" and name in self.RESTART_SLURMD:
+                actions["slurmd"].update(every_node)
+
+            elif kind == "NodeName" and (old is None or new_value is None):
+                actions["slurmctld"] = True
+                actions["slurmd"].update(every_node)
+
+            elif kind == "NodeName" and self.hardware(old) != self.hardware(new_value):
+                actions["slurmctld"] = True
+                actions["slurmd"].update(self.expand([key]))
+
+            else:
+                # Partitions, node Weight/Features/State, limits, timers, ...
+                actions["reconfigure"] = True
+
+        # Every daemon that is not restarted still has to re-read the new file
+        restarts_everything = actions["slurmctld"] and actions["slurmd"] == set(every_node)
+        if (actions["slurmctld"] or actions["slurmd"]) and not restarts_everything:
+            actions["reconfigure"] = True
+
+        actions["slurmd"] = sorted(actions["slurmd"])
+
+        return actions
+
+    def hardware(self, attrs):
+        """The NodeName attributes slurmd and slurmctld only read at startup"""
+        return {key.lower(): value for key, value in attrs.items() if key.lower() in self.NODE_HARDWARE}
+
+    def describe(self, changes):
+        for kind, key, old, new in changes:
+            label = key if kind == "param" else f"{kind}={key}"
+
+            # Entity attributes print the way slurm.conf spells them
+            old, new = [
+                " ".join(f"{k}={v}" for k, v in value.items()) if isinstance(value, dict)
+                else ", ".join(value) if isinstance(value, list) else value
+                for value in (old, new)
+            ]
+
+            if old is None:
+                print(f"  + {label} {new}")
+            elif new is None:
+                print(f"  - {label} {old}")
+            else:
+                print(f"  ~ {label}: {old} -> {new}")
+
+    # -----------------------------
+    # Apply
+    # -----------------------------
+    def slurmctld_active(self):
+        return subprocess.run(
+            ["systemctl", "is-active", "--quiet", "slurmctld"], stderr=subprocess.DEVNULL
+        ).returncode == 0
+
+    def push_command(self, node, restart):
+        """One ssh per node: replace its slurm.conf atomically, restart slurmd if needed"""
+        script = f"cat > {self.SLURM_CONF}.new && chmod 644 {self.SLURM_CONF}.new && mv {self.SLURM_CONF}.new {self.SLURM_CONF}"
+        if restart:
+            script += " && systemctl restart slurmd && systemctl is-active --quiet slurmd"
+
+        return ["ssh", "-o", "BatchMode=yes", node, script]
+
+    def push(self, nodes, text, restart):
+        """Remote nodes, at most rolling_batch at once; a failure stops the roll"""
+        if not nodes:
+            return
+
+        print(f"==== {'Restarting slurmd on' if restart else 'Updating slurm.conf on'} {len(nodes)} node(s) ====")
+
+        # ssh reads the new file from stdin; each command gets its own copy.
+        # mkstemp: a fresh 0600 file, never someone's symlink in /tmp
+        fd, path = tempfile.mkstemp(prefix="slurm.conf.")
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+
+        try:
+            self.engine.run_many([
+                ["sh", "-c", f'exec "$@" < {path}', "push"] + self.push_command(node, restart)
+                for node in nodes
+            ])
+        finally:
+            os.remove(path)
+
+    def apply(self, config, keep_extra=False, live=True):
+        """
+        Writes config if it differs from the live file and applies the
+        difference to running daemons (unless live=False). Returns the
+        list of changes; empty when nothing changed.
+        """
+        current = SlurmConfig.load(self.SLURM_CONF)
+
+        if current and current.repeated:
+            # Slurm would read one of the values; a rewrite keeps only one of them
+            raise Exception(
+                f"{self.SLURM_CONF} sets {', '.join(sorted(set(current.repeated)))} more than once; "
+                "merge those lines by hand before hpcctl rewrites the file."
+            )
+
+        if keep_extra and current:
+            config.keep_extra(current)
+
+        changes = (current or SlurmConfig()).diff(config)
+
+        if not changes:
+            print("slurm.conf unchanged.")
+            return []
+
+        print(f"slurm.conf: {len(changes)} change(s)")
+        self.describe(changes)
+
+        text = config.render()
+        self.privileged.write_file(self.SLURM_CONF, text, mode="644", owner="slurm:slurm")
+
+        if current is None or not live or not self.slurmctld_active():
+            # Daemons that are not running read the new file when they start
+            return changes
+
+        actions = self.classify(changes, config)
+        remote = [node for node in self.expand(config.node_names()) if not self.is_local(node)]
+
+        # Nodes that only need the new file get it before anything re-reads it
+        self.push([node for node in remote if node not in actions["slurmd"]], text, restart=False)
+
+        if actions["slurmctld"]:
+            print("==== Restarting slurmctld (jobs are kept in StateSaveLocation) ====")
+            self.privileged.systemctl("restart", "slurmctld")
+            if not ReadinessWaiter().wait(["slurmctld"], deadline=60):
+                raise Exception("slurmctld did not come back after the restart.")
+
+        if any(self.is_local(node) for node in actions["slurmd"]):
+            self.privileged.systemctl("restart", "slurmd")
+        self.push([node for node in actions["slurmd"] if not self.is_local(node)], text, restart=True)
+
+        if actions["reconfigure"]:
+            print("==== scontrol reconfigure ====")
+            result = subprocess.run(["scontrol", "reconfigure"], capture_output=True, text=True)
+            if result.returncode != 0:
+                raise Exception(f"scontrol reconfigure failed: {result.stderr.strip()}")
+
+        restarted = (["slurmctld"] if actions["slurmctld"] else []) + [f"slurmd@{node}" for node in actions["slurmd"]]
+        print(f"✔ slurm.conf applied (restarted: {', '.join(restarted) or 'nothing'})")
+
+        return changes
+
+    def update(self, settings, live=True):
+        """Sets a few parameters in the live slurm.conf; returns True if anything changed"""
+        config = SlurmConfig.load(self.SLURM_CONF)
+        if config is None:
+            raise Exception(f"{self.SLURM_CONF} does not exist yet.")
+
+        for key, value in settings.items():
+            config.set(key, value)
+
+        return bool(self.apply(config, live=live))
+
+    # -----------------------------
+    # Preview
+    # -----------------------------
+    def preview(self, path):
+        """Shows what applying the file at path would change and do; changes nothing"""
+        with open(path) as f:
+            config = SlurmConfig.parse(f.read())
+
+        current = SlurmConfig.load(self.SLURM_CONF) or SlurmConfig()
+        changes = current.diff(config)
+
+        if not changes:
+            print("slurm.conf unchanged.")
+            return changes
+
+        self.describe(changes)
+        actions = self.classify(changes, config)
+
+        print("--------------------------------")
+        print(f"restart slurmctld: {'yes' if actions['slurmctld'] else 'no'}")
+        print(f"restart slurmd:    {', '.join(actions['slurmd']) or 'none'}")
+        print(f"reconfigure:       {'yes' if actions['reconfigure'] else 'no'}")
+
+        return changes
+
+
+if __name__ == "__main__":
+    manager = SlurmConfigManager()
+
+    if len(sys.argv) == 3 and sys.argv[1] == "--apply":
+        with open(sys.argv[2]) as f:
+            manager.apply(SlurmConfig.parse(f.read()))
+    elif len(sys.argv) == 2:
+        manager.preview(sys.argv[1])
+    else:
+        print("Usage: python3 -m slurm.slurm_config [--apply] <slurm.conf>")
@@ -1,4 +1,4 @@
-import os
+from system_check.host_facts import get_facts
 
 
 class OSDetector:
@@ -11,31 +11,22 @@ class OSDetector:
     def detect(self):
         print("Detecting Operating System...")
 
-        if not os.path.exists("/etc/os-release"):
-            raise Exception("Cannot detect OS. /etc/os-release not found.")
-
-        with open("/etc/os-release") as f:
-            lines = f.readlines()
+        # Parsed once per run (and cached on disk) by the shared host facts
+        os_facts = get_facts().get("os")
 
-        os_info = {}
-        for line in lines:
-            if "=" in line:
-                key, value = line.strip().split("=", 1)
-                os_info[key] = value.strip('"')
+        if os_facts["os_id"] is None:
+            raise Exception("Cannot detect OS. /etc/os-release not found.")
 
-        self.os_name = os_info.get("NAME")
-        self.os_version = os_info.get("VERSION_ID")
-        self.os_id = os_info.get("ID")
+        self.os_name = os_facts["os_name"]
+        self.os_version = os_facts["os_version"]
+        self.os_id = os_facts["os_id"]
 
         print(f"OS Name: {self.os_name}")
         print(f"OS Version: {self.os_version}")
 
-        if self.os_id in ["ubuntu", "debian"]:
-            self.package_manager = "apt"
-        elif self.os_id in ["centos", "rhel", "fedora", "rocky", "almalinux"]:
-            # Prefer dnf, fallback handled later if needed
-            self.package_manager = "dnf"
-        else:
+        self.package_manager = os_facts["package_manager"]
+
+        if self.package_manager is None:
             raise Exception("Unsupported OS")
 
         print(f"Package Manager: {self.package_manager}")
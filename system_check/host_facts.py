@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+
+class HostFacts:
+    """
+    Everything modules need to know about the node, gathered once per run.
+
+    Sections are collected lazily. os, cpu, memory and packages persist in
+    ~/.cache/hpcctl/host_facts.json until /etc/os-release changes or the
+    node reboots; packages also follow the package database's mtime.
+    Services are always read live, once per run, since daemons come and go.
+    """
+
+    OS_RELEASE = "/etc/os-release"
+    BOOT_ID = "/proc/sys/kernel/random/boot_id"
+
+    PERSISTENT = ["os", "cpu", "memory", "packages"]
+
+    APT_IDS = ["ubuntu", "debian"]
+    DNF_IDS = ["centos", "rhel", "fedora", "rocky", "almalinux"]
+
+    PACKAGE_DATABASES = {
+        "apt": ["/var/lib/dpkg/status"],
+        "dnf": ["/var/lib/rpm/rpmdb.sqlite", "/var/lib/rpm/Packages"]
+    }
+
+    def __init__(self):
+        self.home = str(Path.home())
+        self.cache_path = f"{self.home}/.cache/hpcctl/host_facts.json"
+        self.facts = self.load()
+
+    # -----------------------------
+    # Persistence + Invalidation
+    # -----------------------------
+    def stamp(self):
+        """Cheap identity of this boot of this OS install"""
+        try:
+            os_release_mtime = os.stat(self.OS_RELEASE).st_mtime
+        except FileNotFoundError:
+            os_release_mtime = None
+
+        try:
+            with open(self.BOOT_ID) as f:
+                boot_id = f.read().strip()
+        except FileNotFoundError:
+            boot_id = None
+
+        return {"os_release_mtime": os_release_mtime, "boot_id": boot_id}
+
+    def load(self):
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+        if cached.get("stamp") != self.stamp():
+            return {}
+
+        return cached.get("sections", {})
+
+    def save(self):
+        sections = {
+            name: value for name, value in self.facts.items()
+            if name in self.PERSISTENT
+        }
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}"
+
+        with open(tmp_path, "w") as f:
+            json.dump({"stamp": self.stamp(), "sections": sections}, f, indent=2)
+
+        os.replace(tmp_path, self.cache_path)
+
+    def get(self, section):
+        if section == "packages" and section in self.facts:
+            # Anything that touched the package database makes the list stale
+            if self.facts["packages"]["database_mtime"] != self.package_database_mtime():
+                del self.facts["packages"]
+
+        if section not in self.facts:
+            self.facts[section] = getattr(self, f"gather_{section}")()
+
+            if section in self.PERSISTENT:
+                self.save()
+
+        return self.facts[section]
+
+    def refresh(self, *sections):
+        """Re-gathers the named sections on next access, e.g. after starting services"""
+        for section in sections:
+            self.facts.pop(section, None)
+
+    # -----------------------------
+    # Gatherers
+    # -----------------------------
+    def gather_os(self):
+        os_info = {}
+
+        if os.path.exists(self.OS_RELEASE):
+            with open(self.OS_RELEASE) as f:
+                for line in f:
+                    if "=" in line:
+                        key, value = line.strip().split("=", 1)
+                        os_info[key] = value.strip('"')
+
+        ids = [os_info.get("ID")] + os_info.get("ID_LIKE", "").split()
+
+        if any(os_id in self.APT_IDS for os_id in ids):
+            package_manager = "apt"
+        elif any(os_id in self.DNF_IDS for os_id in ids):
+            package_manager = "dnf"
+        elif shutil.which("apt"):
+            package_manager = "apt"
+        elif shutil.which("dnf"):
+            package_manager = "dnf"
+        else:
+            package_manager = None
+
+        return {
+            "os_name": os_info.get("NAME"),
+            "os_version": os_info.get("VERSION_ID"),
+            "os_id": os_info.get("ID"),
+            "package_manager": package_manager
+        }
+
+    def gather_cpu(self):
+        model = "unknown"
+        flags = []
+        cores = set()
+        sockets = set()
+
+        if os.path.exists("/proc/cpuinfo"):
+            with open("/proc/cpuinfo") as f:
+                physical_id = None
+
+                for line in f:
+                    key, _, value = line.partition(":")
+                    key, value = key.strip(), value.strip()
+
+                    if key == "model name" and model == "unknown":
+                        model = value
+                    elif key == "flags" and not flags:
+                        flags = value.split()
+                    elif key == "physical id":
+                        physical_id = value
+                        sockets.add(value)
+                    elif key == "core id":
+                        cores.add((physical_id, value))
+
+        cpus = os.cpu_count() or 1
+
+        # Topology is only reported when /proc/cpuinfo describes it consistently
+        topology = None
+        if sockets and cores and cpus % len(cores) == 0 and len(cores) % len(sockets) == 0:
+            topology = {
+                "sockets": len(sockets),
+                "cores_per_socket": len(cores) // len(sockets),
+                "threads_per_core": cpus // len(cores)
+            }
+
+        return {
+            "cpus": cpus,
+            "model": model,
+            "machine": os.uname().machine,
+            "topology": topology,
+            "flags": flags
+        }
+
+    def gather_memory(self):
+        memory = {"total_bytes": 0, "available_bytes": 0}
+
+        if os.path.exists("/proc/meminfo"):
+            with open("/proc/meminfo") as f:
+                for line in f:
+                    if line.startswith("MemTotal:"):
+                        memory["total_bytes"] = int(line.split()[1]) * 1024
+                    elif line.startswith("MemAvailable:"):
+                        memory["available_bytes"] = int(line.split()[1]) * 1024
+
+        return memory
+
+    def package_database_mtime(self):
+        for database in self.PACKAGE_DATABASES.get(self.package_manager(), []):
+            if os.path.exists(database):
+                return os.stat(database).st_mtime
+
+        return None
+
+    def gather_packages(self):
+        """Installed package name -> version, from one dpkg-query/rpm call"""
+        if self.package_manager() == "apt":
+            command = ["dpkg-query", "-W", "-f", "${Package}\t${Version}\t${Status}\n"]
+        elif self.package_manager() == "dnf":
+            command = ["rpm", "-qa", "--qf", "%{NAME}\t%{VERSION}-%{RELEASE}\tinstalled\n"]
+        else:
+            command = None
+
+        installed = {}
+
+        try:
+            output = subprocess.run(command, capture_output=True, text=True).stdout if command else ""
+        except FileNotFoundError:
+            output = ""
+
+        for line in output.splitlines():
+            parts = line.split("\t")
+
+            # dpkg keeps removed-but-not-purged packages in its database
+            if len(parts) == 3 and parts[2].endswith("installed") and "not-installed" not in parts[2]:
+                installed[parts[0]] = parts[1]
+
+        return {"database_mtime": self.package_database_mtime(), "installed": installed}
+
+    def gather_services(self):
+        """Service unit -> {"file": enablement, "active": state}, two systemctl calls"""
+        services = {}
+
+        try:
+            unit_files = subprocess.run(
+                ["systemctl", "list-unit-files", "--type=service", "--no-legend", "--plain"],
+                capture_output=True,
+                text=True
+            ).stdout
+            units = subprocess.run(
+                ["systemctl", "list-units", "--type=service", "--all", "--no-legend", "--plain"],
+                capture_output=True,
+                text=True
+            ).stdout
+        except FileNotFoundError:
+            return services
+
+        for line in unit_files.splitlines():
+            parts = line.split()
+            if len(parts) >= 2:
+                services[parts[0]] = {"file": parts[1], "active": "inactive"}
+
+        # "<unit> <load> <active> <sub> <description...>"
+        for line in units.splitlines():
+            parts = line.split()
+            if len(parts) >= 3:
+                services.setdefault(parts[0], {"file": None})["active"] = parts[2]
+
+        return services
+
+    # -----------------------------
+    # Convenience Accessors
+    # -----------------------------
+    def package_manager(self):
+        return self.get("os")["package_manager"]
+
+    def has_package(self, name):
+        return name in self.get("packages")["installed"]
+
+    def service_exists(self, name):
+        return self.unit_name(name) in self.get("services")
+
+    def service_active(self, name):
+        return self.get("services").get(self.unit_name(name), {}).get("active") == "active"
+
+    def unit_name(self, name):
+        return name if name.endswith(".service") else f"{name}.service"
+
+
+_facts = None
+
+
+def get_facts():
+    """The facts for this run; every module shares the same instance"""
+    global _facts
+
+    if _facts is None:
+        _facts = HostFacts()
+
+    return _facts
+
+
+if __name__ == "__main__":
+    facts = get_facts()
+    sections = sys.argv[1:] or ["os", "cpu", "memory", "packages", "services"]
+
+    print(json.dumps({section: facts.get(section) for section in sections}, indent=2))
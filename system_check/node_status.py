@@ -0,0 +1,326 @@
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from common.trash_reaper import TrashReaper
+
+
+class NodeStatus:
+
+    PACKAGES = ["gcc", "python", "openmpi", "pmix", "openblas", "fftw"]
+    SERVICES = ["munge", "mariadb", "slurmctld", "slurmd", "slurmdbd"]
+    CONFIG_FILES = [
+        "/etc/slurm/slurm.conf",
+        "/etc/slurm/slurmdbd.conf",
+        "/etc/munge/munge.key"
+    ]
+
+    def __init__(self):
+        self.home = str(Path.home())
+        self.hpc_dir = f"{self.home}/hpc"
+        self.cache_path = f"{self.home}/.cache/hpcctl/status.json"
+        self.ttl = float(os.getenv("HPC_STATUS_TTL", "30"))
+
+    # -----------------------------
+    # Probes
+    # -----------------------------
+    def package_dir(self, package):
+        # slurmd loads PMIx too, so it lives outside any home directory
+        if package == "pmix":
+            from modules.install_pmix_module import PMIxInstaller
+            return PMIxInstaller.PREFIX_ROOT
+
+        return f"{self.hpc_dir}/{package}"
+
+    def probe_packages(self):
+        """Versions (or tuned builds) installed under each package's directory"""
+        packages = {}
+
+        for package in self.PACKAGES:
+            try:
+                entries = os.scandir(self.package_dir(package))
+            except FileNotFoundError:
+                packages[package] = []
+                continue
+
+            # OpenBLAS installs no programs, only libraries
+            with entries:
+                packages[package] = sorted(
+                    entry.name for entry in entries
+                    if entry.is_dir() and not entry.name.startswith(".")
+                    and (os.path.isdir(f"{entry.path}/bin") or os.path.isdir(f"{entry.path}/lib"))
+                )
+
+        return packages
+
+    def probe_slurm(self):
+        try:
+            result = subprocess.run(
+                ["sinfo", "--version"],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return None
+
+        # "slurm 24.11.1"
+        parts = result.stdout.split()
+        return parts[-1] if result.returncode == 0 and parts else None
+
+    def probe_services(self):
+        """One systemctl call for every unit instead of one per service"""
+        states = {name: "unknown" for name in self.SERVICES}
+
+        try:
+            result = subprocess.run(
+                ["systemctl", "show"] + self.SERVICES + ["-p", "Id", "-p", "ActiveState"],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return states
+
+        # Units are printed in request order, separated by blank lines
+        for block, name in zip(result.stdout.strip().split("\n\n"), self.SERVICES):
+            props = dict(
+                line.split("=", 1)
+                for line in block.splitlines()
+                if "=" in line
+            )
+            states[name] = props.get("ActiveState", "unknown")
+
+        return states
+
+    def probe_configs(self):
+        checksums = {}
+
+        for path in self.CONFIG_FILES:
+            try:
+                digest = hashlib.sha256()
+
+                with open(path, "rb") as f:
+                    while True:
+                        chunk = f.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+
+                checksums[path] = digest.hexdigest()
+            except FileNotFoundError:
+                checksums[path] = None
+            except PermissionError:
+                checksums[path] = "unreadable"
+
+        return checksums
+
+    def probe_disk(self):
+        """
+        Bytes allocated by the package prefixes (hardlinks counted once).
+        Build sandboxes and trash waiting to be reaped are not installs.
+        """
+        skip = {".sandboxes", TrashReaper.TRASH_NAME}
+        total = 0
+        seen = set()
+        pending = [self.package_dir(package) for package in self.PACKAGES]
+
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+            except (FileNotFoundError, PermissionError):
+                continue
+
+            with entries:
+                for entry in entries:
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in skip:
+                            continue
+                        pending.append(entry.path)
+                    elif stat.st_nlink > 1:
+                        if (stat.st_dev, stat.st_ino) in seen:
+                            continue
+                        seen.add((stat.st_dev, stat.st_ino))
+
+                    total += stat.st_blocks * 512
+
+        return total
+
+    # -----------------------------
+    # Collect (concurrently)
+    # -----------------------------
+    def collect(self):
+        start = time.monotonic()
+
+        probes = {
+            "packages": self.probe_packages,
+            "slurm": self.probe_slurm,
+            "services": self.probe_services,
+            "configs": self.probe_configs,
+            "disk_bytes": self.probe_disk
+        }
+
+        with ThreadPoolExecutor(max_workers=len(probes)) as pool:
+            futures = {key: pool.submit(probe) for key, probe in probes.items()}
+            status = {key: future.result() for key, future in futures.items()}
+
+        status["hostname"] = socket.gethostname()
+        status["collected_at"] = time.time()
+        status["probe_seconds"] = round(time.monotonic() - start, 3)
+
+        return status
+
+    # -----------------------------
+    # Cache
+    # -----------------------------
+    def load_cached(self):
+        try:
+            with open(self.cache_path) as f:
+                status = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if time.time() - status.get("collected_at", 0) > self.ttl:
+            return None
+
+        return status
+
+    def save_cache(self, status):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        self.write_atomic(self.cache_path, json.dumps(status, indent=2))
+
+    def get(self, refresh=False):
+        """Cached snapshot if younger than HPC_STATUS_TTL, else a fresh probe"""
+        status = None if refresh else self.load_cached()
+
+        if status is None:
+            status = self.collect()
+            self.save_cache(status)
+
+        return status
+
+    def write_atomic(self, path, text):
+        # Readers (monitoring scrapers) never see a half-written file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        with open(tmp_path, "w") as f:
+            f.write(text)
+
+        os.replace(tmp_path, path)
+
+    # -----------------------------
+    # Output
+    # -----------------------------
+    def label(self, value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+    def render_prometheus(self, status):
+        lines = [
+            "# HELP hpcctl_package_installed Package version installed under ~/hpc.",
+            "# TYPE hpcctl_package_installed gauge"
+        ]
+
+        for package, versions in status["packages"].items():
+            for version in versions:
+                lines.append(
+                    f'hpcctl_package_installed{{package="{package}",version="{self.label(version)}"}} 1'
+                )
+
+        if status["slurm"]:
+            lines.append(
+                f'hpcctl_package_installed{{package="slurm",version="{self.label(status["slurm"])}"}} 1'
+            )
+
+        # The state gets its own series: as a label on _up it would start a new
+        # series on every transition and break rate() and absent() on up
+        lines += [
+            "# HELP hpcctl_service_up 1 if the systemd unit is active.",
+            "# TYPE hpcctl_service_up gauge"
+        ]
+        for service, state in status["services"].items():
+            lines.append(f'hpcctl_service_up{{service="{service}"}} {1 if state == "active" else 0}')
+
+        lines += [
+            "# HELP hpcctl_service_info systemd ActiveState of the unit.",
+            "# TYPE hpcctl_service_info gauge"
+        ]
+        for service, state in status["services"].items():
+            lines.append(f'hpcctl_service_info{{service="{service}",state="{self.label(state)}"}} 1')
+
+        lines += [
+            "# HELP hpcctl_config_info Config file checksum; compare across nodes to spot drift.",
+            "# TYPE hpcctl_config_info gauge"
+        ]
+        for path, checksum in status["configs"].items():
+            if checksum:
+                lines.append(f'hpcctl_config_info{{path="{path}",sha256="{checksum}"}} 1')
+
+        lines += [
+            "# HELP hpcctl_hpc_disk_bytes Bytes allocated by the installed package prefixes.",
+            "# TYPE hpcctl_hpc_disk_bytes gauge",
+            f"hpcctl_hpc_disk_bytes {status['disk_bytes']}",
+            "# HELP hpcctl_status_timestamp_seconds When the snapshot was collected.",
+            "# TYPE hpcctl_status_timestamp_seconds gauge",
+            f"hpcctl_status_timestamp_seconds {status['collected_at']:.3f}",
+            "# HELP hpcctl_status_probe_seconds Time taken to collect the snapshot.",
+            "# TYPE hpcctl_status_probe_seconds gauge",
+            f"hpcctl_status_probe_seconds {status['probe_seconds']}"
+        ]
+
+        return "\n".join(lines) + "\n"
+
+    def show(self, status):
+        age = time.time() - status["collected_at"]
+        print(f"==== Node Status: {status['hostname']} ({age:.0f}s old) ====")
+
+        for package, versions in status["packages"].items():
+            mark = "✔" if versions else "✖"
+            print(f"{mark} {package}: {', '.join(versions) or 'not installed'}")
+
+        mark = "✔" if status["slurm"] else "✖"
+        print(f"{mark} slurm: {status['slurm'] or 'not installed'}")
+
+        print("---- Services ----")
+        for service, state in status["services"].items():
+            mark = "✔" if state == "active" else "✖"
+            print(f"{mark} {service}: {state}")
+
+        print("---- Config Checksums ----")
+        for path, checksum in status["configs"].items():
+            print(f"{path}: {(checksum or 'missing')[:16]}")
+
+        print(f"Disk usage of installed packages: {status['disk_bytes'] / 1024 ** 3:.2f} GiB")
+
+    def report(self, args):
+        """args: [--json] [--prometheus [path]] [--refresh]"""
+        status = self.get(refresh="--refresh" in args)
+
+        if "--prometheus" in args:
+            position = args.index("--prometheus") + 1
+            text = self.render_prometheus(status)
+
+            if position < len(args) and not args[position].startswith("--"):
+                self.write_atomic(args[position], text)
+            else:
+                sys.stdout.write(text)
+
+        elif "--json" in args:
+            print(json.dumps(status, indent=2))
+
+        else:
+            self.show(status)
+
+
+if __name__ == "__main__":
+    NodeStatus().report(sys.argv[1:])
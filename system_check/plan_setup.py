@@ -0,0 +1,128 @@
+import sys
+
+from common.step_timings import StepTimings
+from slurm.preprocess_slurm import SlurmPreprocessor
+
+
+class SetupPlanner:
+
+    def __init__(self):
+        self.timings = StepTimings()
+
+    # -----------------------------
+    # Installer Lookup
+    # -----------------------------
+    def installer(self, name):
+        # Imported on demand so planning one module never loads the others.
+        # No version lookups either: a plan must work on an offline node
+        if name == "python":
+            from modules.install_python_module import PythonInstaller
+            return PythonInstaller(resolve_version=False)
+        if name == "openmpi":
+            from modules.install_openmpi_module import OpenMPIInstaller
+            return OpenMPIInstaller()
+        if name == "openblas":
+            from modules.install_openblas_module import OpenBLASInstaller
+            return OpenBLASInstaller()
+        if name == "fftw":
+            from modules.install_fftw_module import FFTWInstaller
+            return FFTWInstaller()
+        if name == "wheelhouse":
+            from modules.build_wheelhouse import WheelhouseBuilder
+            return WheelhouseBuilder()
+        if name == "gcc":
+            from modules.install_gcc_module import GCCInstaller
+            return GCCInstaller(resolve_version=False)
+        if name == "tuning":
+            from tuning.apply_profile import NodeTuner
+            return NodeTuner()
+        if name == "pmix":
+            from modules.install_pmix_module import PMIxInstaller
+            return PMIxInstaller()
+        if name == "slurm":
+            from slurm.install_slurm import SlurmInstaller
+            return SlurmInstaller()
+
+        raise Exception(f"Unknown module: {name}")
+
+    # -----------------------------
+    # Build Step Lists
+    # -----------------------------
+    def plan_module(self, name):
+        return [(name, step, note) for step, note in self.installer(name).plan()]
+
+    def plan_setup(self):
+        """Mirrors HPCFramework.setup, including its Slurm skip/clean decision"""
+        steps = self.plan_module("tuning")
+        steps += self.plan_module("pmix")
+
+        status, reason = SlurmPreprocessor().detect_status()
+
+        if status == "installed":
+            print("Slurm fully configured; installation will be skipped.")
+        else:
+            if status == "broken":
+                steps.append(("slurm", "clean_broken_state", reason))
+            steps += self.plan_module("slurm")
+
+        steps.append(("setup", "verify_munge", ""))
+        steps += self.plan_module("python")
+        steps += self.plan_module("openmpi")
+        steps += self.plan_module("openblas")
+        steps += self.plan_module("fftw")
+        steps += self.plan_module("wheelhouse")
+        steps.append(("setup", "verify_slurm", ""))
+
+        return steps
+
+    # -----------------------------
+    # Output
+    # -----------------------------
+    def format_eta(self, seconds):
+        seconds = int(round(seconds))
+
+        if seconds >= 3600:
+            return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+        if seconds >= 60:
+            return f"{seconds // 60}m {seconds % 60:02d}s"
+        return f"{seconds}s"
+
+    def show(self, title, steps):
+        print(f"===== HPC PLAN: {title} =====")
+        print(f"Hardware: {self.timings.hardware_key()}")
+        print("--------------------------------")
+
+        total = 0
+        unknown = 0
+
+        for number, (package, step, note) in enumerate(steps, 1):
+            seconds, source = self.timings.estimate(package, step, note)
+
+            if seconds is None:
+                eta = "no data"
+                unknown += 1
+            else:
+                eta = f"~{self.format_eta(seconds)}"
+                total += seconds
+                if source != "this hardware":
+                    eta += f" ({source})"
+
+            line = f"{number:>3}. {package:<8} {step:<26} {eta:<24}"
+            print(f"{line} {note}".rstrip())
+
+        print("--------------------------------")
+        summary = f"Estimated total: ~{self.format_eta(total)}"
+        if unknown:
+            summary += f" (+{unknown} step(s) without recorded timings)"
+        print(summary)
+        print("Nothing was executed.")
+
+    def plan(self, target="setup"):
+        if target == "setup":
+            self.show("setup", self.plan_setup())
+        else:
+            self.show(f"module {target}", self.plan_module(target))
+
+
+if __name__ == "__main__":
+    SetupPlanner().plan(*sys.argv[1:2])
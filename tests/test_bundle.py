@@ -0,0 +1,210 @@
+import io
+import os
+import sys
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from bundle.create_bundle import BundleBuilder
+from bundle.install_bundle import BundleInstaller
+from common.select_mirror import MirrorSelector
+from modules.install_gcc_module import GCCInstaller
+from modules.build_wheelhouse import WheelhouseBuilder
+from slurm.install_slurm import SlurmInstaller
+
+
+# GCC's own list of prerequisites, which the bundle reads out of the GCC tarball
+PREREQUISITES = "base_url='http://gcc.example/infrastructure/'\ngmp='gmp-6.2.1.tar.bz2'\nmpfr='mpfr-4.1.0.tar.bz2'\n"
+
+
+def fake_download(self, package, url, dest, **kwargs):
+    """Stands in for every mirror; the GCC tarball has to be a real one"""
+    name = os.path.basename(dest)
+
+    if not name.startswith("gcc-"):
+        with open(dest, "w") as f:
+            f.write(f"{package} {url}\n")
+        return
+
+    script = PREREQUISITES.encode()
+    info = tarfile.TarInfo(f"{name[:-len('.tar.gz')]}/contrib/download_prerequisites")
+    info.size = len(script)
+
+    with tarfile.open(dest, "w:gz") as tar:
+        tar.addfile(info, io.BytesIO(script))
+
+
+def write_sdist(path, pyproject=None):
+    top = os.path.basename(path)[:-len(".tar.gz")]
+
+    with tarfile.open(path, "w:gz") as tar:
+        if pyproject is not None:
+            info = tarfile.TarInfo(f"{top}/pyproject.toml")
+            info.size = len(pyproject.encode())
+            tar.addfile(info, io.BytesIO(pyproject.encode()))
+
+
+def fake_wheelhouse_sources(self, dest, python_version):
+    """What pip download leaves behind: the sdists and the wheels that build them"""
+    for name in ["numpy-2.1.0.tar.gz", "mpi4py-4.0.0.tar.gz"]:
+        write_sdist(f"{dest}/{name}")
+
+    with open(f"{dest}/meson_python-0.16.0-py3-none-any.whl", "w") as f:
+        f.write(python_version)
+
+
+class BundleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.home = f"{self.tmp.name}/home"
+        self.cwd = os.getcwd()
+
+        os.makedirs(self.home)
+        os.makedirs(f"{self.tmp.name}/slurm")
+
+        # Pins keep the installers from looking up the latest GCC and Python online
+        self.env = mock.patch.dict(os.environ, {
+            "HOME": self.home,
+            "HPC_GCC_VERSION": "13.2.0",
+            "HPC_PYTHON_VERSION": "3.12.4",
+            "HPC_MIRRORS_FILE": f"{self.tmp.name}/mirrors.json"
+        })
+        self.env.start()
+
+        self.patches = [
+            mock.patch.object(MirrorSelector, "download", fake_download),
+            mock.patch.object(WheelhouseBuilder, "download_sources", fake_wheelhouse_sources),
+            mock.patch.object(SlurmInstaller, "WORKDIR", f"{self.tmp.name}/slurm")
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+        self.env.stop()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+    def create(self):
+        """A bundle with sources only; system packages need apt/dnf and are left out"""
+        builder = BundleBuilder(f"{self.tmp.name}/bundle.tar")
+        installers = builder.installers()
+
+        os.makedirs(builder.src_dir)
+        builder.collect_sources(installers)
+        builder.collect_wheelhouse(installers, tempfile.mkdtemp(dir=self.tmp.name))
+        builder.write_archive(
+            {"os_id": "test", "os_version": "1", "package_manager": "apt"},
+            builder.versions(installers)
+        )
+
+        return builder.output
+
+    def fresh_node(self):
+        """Nothing downloaded yet, and no way to download anything"""
+        for name in os.listdir(f"{self.home}/hpc_sources"):
+            path = f"{self.home}/hpc_sources/{name}"
+
+            if os.path.isdir(path):
+                for item in os.listdir(path):
+                    os.remove(f"{path}/{item}")
+            else:
+                os.remove(path)
+
+        self.patches[0].stop()
+        self.patches[0] = mock.patch.object(
+            MirrorSelector, "download", side_effect=AssertionError("offline install downloaded")
+        )
+        self.patches[0].start()
+
+    def offline_setup(self, framework):
+        """What HPCFramework().setup() fetches, minus the builds"""
+        from modules.install_pmix_module import PMIxInstaller
+        from modules.install_python_module import PythonInstaller
+        from modules.install_openmpi_module import OpenMPIInstaller
+        from modules.install_openblas_module import OpenBLASInstaller
+        from modules.install_fftw_module import FFTWInstaller
+
+        PMIxInstaller().download_sources()
+        SlurmInstaller().download_source()
+        PythonInstaller().download_source()
+        OpenMPIInstaller().download_source()
+        OpenBLASInstaller().download_source()
+        FFTWInstaller().download_source()
+
+        self.downloaded += ["pmix", "slurm", "python", "openmpi", "openblas", "fftw"]
+
+        # The wheelhouse builds from the bundled sdists, never from PyPI
+        wheelhouse = WheelhouseBuilder()
+
+        with mock.patch.object(wheelhouse, "run") as run:
+            wheelhouse.build_wheels()
+
+        for call in run.call_args_list:
+            command = call.args[0]
+            self.assertIn("--no-index", command)
+            self.assertEqual(command[command.index("--find-links") + 1], wheelhouse.sources)
+
+        self.assertEqual(run.call_count, 2)
+        self.assertIn("numpy-2.1.0.tar.gz", os.listdir(wheelhouse.sources))
+
+    def offline_gcc(self, gcc):
+        gcc.download_source()
+
+        for archive, _ in gcc.prerequisite_archives():
+            self.assertTrue(os.path.exists(f"{gcc.prereq_dir}/{archive}"), archive)
+
+        self.downloaded.append("gcc")
+
+    # -----------------------------
+    # Tests
+    # -----------------------------
+    def test_provision_runs_offline_from_created_bundle(self):
+        bundle = BundleInstaller(self.create())
+        index = bundle.load_index()
+
+        self.fresh_node()
+        bundle.stage_files(index)
+
+        self.downloaded = []
+        setup = mock.patch("master_setup.HPCFramework.setup", autospec=True, side_effect=self.offline_setup)
+        install = mock.patch.object(GCCInstaller, "install", autospec=True, side_effect=self.offline_gcc)
+
+        with setup, install:
+            bundle.provision(index)
+
+        self.assertEqual(sorted(self.downloaded), sorted(index["versions"].keys() - {"hwloc", "libevent"}))
+        self.assertEqual(os.environ["HPC_OFFLINE"], "1")
+
+    def test_bundle_carries_pmix_and_its_dependencies(self):
+        index = BundleInstaller(self.create()).load_index()
+        sources = {entry["package"] for entry in index["files"] if entry["kind"] == "source"}
+
+        self.assertTrue({"pmix", "hwloc", "libevent"} <= sources)
+        self.assertEqual(index["versions"]["hwloc"], "2.10.0")
+        self.assertEqual(index["versions"]["libevent"], "2.1.12")
+
+    def test_build_requires_read_from_sdist(self):
+        builder = WheelhouseBuilder()
+        meson = f"{self.tmp.name}/numpy-2.1.0.tar.gz"
+        legacy = f"{self.tmp.name}/legacy-1.0.tar.gz"
+
+        write_sdist(meson, '[build-system]\nrequires = ["meson-python>=0.15.0", "Cython>=3.0.6"]\n')
+        write_sdist(legacy)
+
+        self.assertEqual(builder.build_requires(meson), ["meson-python>=0.15.0", "Cython>=3.0.6"])
+        self.assertEqual(builder.build_requires(legacy), ["setuptools", "wheel"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import errno
+import tempfile
+import unittest
+from unittest import mock
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from tuning.apply_profile import NodeTuner
+from cleanup.remove_tuning import TuningRemover
+
+
+# What a freshly booted, untuned node looks like
+UNTUNED = {
+    "sys/devices/system/cpu/cpu0/cpufreq/scaling_governor": "powersave",
+    "sys/devices/system/cpu/cpu1/cpufreq/scaling_governor": "powersave",
+    "sys/kernel/mm/transparent_hugepage/enabled": "[always] madvise never",
+    "sys/kernel/mm/transparent_hugepage/defrag": "[always] defer madvise never",
+    "proc/sys/kernel/numa_balancing": "1",
+    "proc/sys/vm/swappiness": "60",
+    "proc/sys/vm/zone_reclaim_mode": "0"
+}
+
+
+class NodeTuningTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+        for path, value in UNTUNED.items():
+            self.set(path, value)
+
+        self.env = mock.patch.dict(os.environ, {"HPC_TUNING": "1", "HPC_TUNING_SKIP": ""})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    # -----------------------------
+    # Fake sysfs
+    # -----------------------------
+    def set(self, path, value):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, "w") as f:
+            f.write(value + "\n")
+
+    def get(self, path):
+        return NodeTuner(self.root).read(os.path.join(self.root, path))
+
+    def snapshot(self):
+        with open(NodeTuner(self.root).snapshot_path) as f:
+            return json.load(f)
+
+    # -----------------------------
+    # Tests
+    # -----------------------------
+    def test_apply_writes_profile(self):
+        NodeTuner(self.root).apply()
+
+        self.assertEqual(self.get("sys/devices/system/cpu/cpu0/cpufreq/scaling_governor"), "performance")
+        self.assertEqual(self.get("sys/devices/system/cpu/cpu1/cpufreq/scaling_governor"), "performance")
+        self.assertEqual(self.get("sys/kernel/mm/transparent_hugepage/enabled"), "madvise")
+        self.assertEqual(self.get("proc/sys/kernel/numa_balancing"), "0")
+        self.assertEqual(self.get("proc/sys/vm/swappiness"), "10")
+        self.assertEqual(NodeTuner(self.root).changes(), [])
+
+        # Settings that already matched are not snapshotted
+        self.assertNotIn("/proc/sys/vm/zone_reclaim_mode", self.snapshot())
+
+    def test_snapshot_keeps_value_from_before_first_apply(self):
+        NodeTuner(self.root).apply()
+
+        # Someone changes a tuned setting; the next run tunes it again
+        self.set("proc/sys/vm/swappiness", "30")
+        NodeTuner(self.root).apply()
+
+        self.assertEqual(self.get("proc/sys/vm/swappiness"), "10")
+        self.assertEqual(self.snapshot()["/proc/sys/vm/swappiness"], "60")
+        self.assertEqual(self.snapshot()["/proc/sys/kernel/numa_balancing"], "1")
+
+    def test_remover_restores_snapshot(self):
+        NodeTuner(self.root).apply()
+        NodeTuner(self.root).apply()
+
+        TuningRemover(self.root).remove()
+
+        self.assertEqual(self.get("sys/devices/system/cpu/cpu0/cpufreq/scaling_governor"), "powersave")
+        self.assertEqual(self.get("sys/kernel/mm/transparent_hugepage/enabled"), "always")
+        self.assertEqual(self.get("proc/sys/vm/swappiness"), "60")
+        self.assertFalse(os.path.exists(NodeTuner(self.root).snapshot_path))
+
+    def test_unwritable_setting_is_skipped(self):
+        tuner = NodeTuner(self.root)
+        swappiness = os.path.join(self.root, "proc/sys/vm/swappiness")
+        write = tuner.write
+
+        # Root writes through file modes, so the kernel's refusal is simulated
+        def refuse(path, value):
+            if path == swappiness:
+                raise PermissionError(errno.EACCES, "Permission denied", path)
+            write(path, value)
+
+        with mock.patch.object(tuner, "write", side_effect=refuse):
+            tuner.apply()
+
+        self.assertEqual(self.get("proc/sys/vm/swappiness"), "60")
+        self.assertEqual(self.get("proc/sys/kernel/numa_balancing"), "0")
+        self.assertNotIn("/proc/sys/vm/swappiness", self.snapshot())
+
+
+if __name__ == "__main__":
+    unittest.main()
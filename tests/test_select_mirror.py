@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from common.select_mirror import MirrorSelector
+
+
+PACKAGE = "testpkg"
+FILE_NAME = "testpkg-1.0.tar.gz"
+
+# More than one CHUNK_SIZE, so a transfer can break between chunks
+PAYLOAD = os.urandom(3 * 1024 * 1024 // 2)
+
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD under /pub/, honouring Range; the server's knobs shape each reply"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.headers.get("Range"))
+        time.sleep(server.delay)
+
+        if self.path != f"/pub/{FILE_NAME}":
+            self.send_error(404)
+            return
+
+        start, end = 0, len(PAYLOAD) - 1
+        ranged = self.headers.get("Range", "").startswith("bytes=")
+
+        if ranged:
+            low, _, high = self.headers["Range"][len("bytes="):].partition("-")
+            start = int(low)
+            end = min(int(high), end) if high else end
+
+            if start >= len(PAYLOAD):
+                self.send_error(416)
+                return
+
+        body = PAYLOAD[start:end + 1]
+
+        self.send_response(206 if ranged else 200)
+        self.send_header("Content-Length", str(len(body)))
+        if ranged:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(PAYLOAD)}")
+        self.end_headers()
+
+        # A broken mirror promises the whole body but drops the connection part way
+        if server.break_after is not None:
+            body = body[:server.break_after]
+
+        self.wfile.write(body)
+        server.sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MirrorSelectorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.servers = []
+
+        self.env = mock.patch.dict(os.environ, {
+            "HOME": self.tmp.name,
+            "HPC_SITE": "test",
+            "HPC_MIRRORS_FILE": f"{self.tmp.name}/mirrors.json",
+            "HPC_DOWNLOAD_TIMEOUT": "5"
+        })
+        self.env.start()
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+        self.env.stop()
+        self.tmp.cleanup()
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+    def start_mirror(self, delay=0, break_after=None):
+        """A stand-in mirror on an ephemeral port; returns its base URL"""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), MirrorHandler)
+        server.daemon_threads = True
+        server.delay = delay
+        server.break_after = break_after
+        server.requests = []
+        server.sent = 0
+
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+
+        return server, f"http://127.0.0.1:{server.server_address[1]}/pub/"
+
+    def selector(self, bases):
+        with open(os.environ["HPC_MIRRORS_FILE"], "w") as f:
+            json.dump({PACKAGE: bases}, f)
+
+        return MirrorSelector()
+
+    def download(self, selector, base):
+        dest = f"{self.tmp.name}/{FILE_NAME}"
+        expected = {"sha256": hashlib.sha256(PAYLOAD).hexdigest()}
+
+        selector.download(PACKAGE, base + FILE_NAME, dest, attempts=1, expected=expected)
+
+        with open(dest, "rb") as f:
+            return f.read()
+
+    # -----------------------------
+    # Ranking
+    # -----------------------------
+    def test_rank_puts_lowest_latency_first(self):
+        slow, slow_base = self.start_mirror(delay=0.3)
+        fast, fast_base = self.start_mirror()
+
+        selector = self.selector([slow_base, fast_base])
+        ranked = selector.rank(PACKAGE, slow_base + FILE_NAME)
+
+        self.assertEqual(ranked, [fast_base + FILE_NAME, slow_base + FILE_NAME])
+        self.assertEqual(selector.cached_ranking(PACKAGE), [fast_base, slow_base])
+
+    def test_rank_reuses_cached_ranking_without_probing(self):
+        first, first_base = self.start_mirror()
+        second, second_base = self.start_mirror()
+
+        selector = self.selector([first_base, second_base])
+        selector.save_ranking(PACKAGE, [second_base, first_base])
+
+        ranked = selector.rank(PACKAGE, first_base + FILE_NAME)
+
+        self.assertEqual(ranked, [second_base + FILE_NAME, first_base + FILE_NAME])
+        self.assertEqual(first.requests + second.requests, [])
+
+    def test_unreachable_mirror_ranks_last(self):
+        broken, broken_base = self.start_mirror(break_after=1024)
+        healthy, healthy_base = self.start_mirror(delay=0.1)
+
+        selector = self.selector([broken_base, healthy_base])
+
+        self.assertEqual(selector.rank(PACKAGE, broken_base + FILE_NAME)[0], healthy_base + FILE_NAME)
+
+    # -----------------------------
+    # Resume
+    # -----------------------------
+    def test_download_resumes_partial_file_with_range(self):
+        server, base = self.start_mirror()
+        selector = self.selector([base])
+
+        offset = len(PAYLOAD) // 3
+        with open(f"{self.tmp.name}/{FILE_NAME}.part", "wb") as f:
+            f.write(PAYLOAD[:offset])
+
+        self.assertEqual(self.download(selector, base), PAYLOAD)
+        self.assertEqual(server.requests, [f"bytes={offset}-"])
+        self.assertEqual(server.sent, len(PAYLOAD) - offset)
+
+    # -----------------------------
+    # Failover
+    # -----------------------------
+    def test_download_fails_over_mid_transfer_and_resumes(self):
+        broken, broken_base = self.start_mirror(break_after=300 * 1024)
+        healthy, healthy_base = self.start_mirror()
+
+        selector = self.selector([broken_base, healthy_base])
+        selector.save_ranking(PACKAGE, [broken_base, healthy_base])
+
+        self.assertEqual(self.download(selector, broken_base), PAYLOAD)
+
+        # The second mirror only sent what the first one did not
+        self.assertEqual(broken.requests, [None])
+        self.assertEqual(healthy.requests, [f"bytes={300 * 1024}-"])
+        self.assertEqual(healthy.sent, len(PAYLOAD) - 300 * 1024)
+
+        # The ranking that failed is dropped, so the next download re-probes
+        self.assertIsNone(selector.cached_ranking(PACKAGE))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import fcntl
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from common.trash_reaper import TrashReaper
+
+
+class TrashReaperTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.trash_dir = os.path.join(self.tmp.name, TrashReaper.TRASH_NAME)
+
+        # discard() also updates the dedup index under HOME
+        self.env = mock.patch.dict(os.environ, {"HOME": self.tmp.name})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+    def make_tree(self, name, files=20):
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(f"{path}/sub")
+
+        for index in range(files):
+            with open(f"{path}/sub/{index}", "w") as f:
+                f.write("x")
+
+        return path
+
+    def wait_reaped(self, timeout=10):
+        end = time.monotonic() + timeout
+
+        while os.path.exists(self.trash_dir) and time.monotonic() < end:
+            time.sleep(0.05)
+
+        self.assertFalse(os.path.exists(self.trash_dir))
+
+    # -----------------------------
+    # Tests
+    # -----------------------------
+    def test_concurrent_starts_claim_disjoint_items(self):
+        reapers = []
+
+        for index in range(8):
+            reaper = TrashReaper()
+            reaper.discard(self.make_tree(f"tree{index}"))
+            reapers.append(reaper)
+
+        claimed = []
+        claim = TrashReaper.claim
+
+        def record(reaper, trash_dir):
+            result = claim(reaper, trash_dir)
+            if result:
+                claimed.append(sorted(os.listdir(result[0])))
+            return result
+
+        threads = [threading.Thread(target=reaper.start) for reaper in reapers]
+
+        with mock.patch.object(TrashReaper, "claim", record):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        items = [item for names in claimed for item in names]
+        self.assertEqual(len(items), 8)
+        self.assertEqual(len(set(items)), 8)
+
+        self.wait_reaped()
+
+    def test_abandoned_claim_is_taken_over(self):
+        os.makedirs(f"{self.trash_dir}/{TrashReaper.CLAIM_PREFIX}1.1/old/sub")
+
+        reaper = TrashReaper()
+        reaper.discard(self.make_tree("tree"))
+        reaper.start()
+
+        self.wait_reaped()
+
+    def test_live_claim_is_left_to_its_reaper(self):
+        live = f"{self.trash_dir}/{TrashReaper.CLAIM_PREFIX}1.1"
+        os.makedirs(f"{live}/busy")
+
+        fd = os.open(live, os.O_RDONLY)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+        try:
+            reaper = TrashReaper()
+            reaper.discard(self.make_tree("tree"))
+            reaper.start()
+
+            end = time.monotonic() + 10
+            while len(os.listdir(self.trash_dir)) > 1 and time.monotonic() < end:
+                time.sleep(0.05)
+
+            self.assertEqual(os.listdir(self.trash_dir), [os.path.basename(live)])
+            self.assertTrue(os.path.isdir(f"{live}/busy"))
+        finally:
+            os.close(fd)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import os
+import sys
+import glob
+import json
+
+
+class NodeTuner:
+    """
+    Applies the compute-node tuning profile through sysfs/procfs.
+
+    The value each setting had before is snapshotted the first time it is
+    changed, so revert() puts the node back exactly as the framework found
+    it. Settings are runtime-only and fall back to the OS defaults on reboot.
+    root lets everything run against a fake sysfs/procfs tree.
+    """
+
+    # (name, path glob under root, value)
+    PROFILE = [
+        ("cpu_governor", "sys/devices/system/cpu/cpu*/cpufreq/scaling_governor", "performance"),
+        ("thp_enabled", "sys/kernel/mm/transparent_hugepage/enabled", "madvise"),
+        ("thp_defrag", "sys/kernel/mm/transparent_hugepage/defrag", "madvise"),
+        ("numa_balancing", "proc/sys/kernel/numa_balancing", "0"),
+        ("swappiness", "proc/sys/vm/swappiness", "10"),
+        ("zone_reclaim_mode", "proc/sys/vm/zone_reclaim_mode", "0")
+    ]
+
+    def __init__(self, root="/"):
+        self.root = os.path.abspath(root)
+        self.snapshot_path = os.path.join(self.root, "var/lib/hpcctl/tuning.json")
+
+        self.enabled = os.getenv("HPC_TUNING", "1") != "0"
+
+        # Comma-separated setting names to leave alone, e.g. HPC_TUNING_SKIP=swappiness
+        self.skip = set(filter(None, os.getenv("HPC_TUNING_SKIP", "").split(",")))
+
+    # -----------------------------
+    # Read / Write Settings
+    # -----------------------------
+    def paths(self, pattern):
+        return sorted(glob.glob(os.path.join(self.root, pattern)))
+
+    def read(self, path):
+        """Current value; selector files like 'always [madvise] never' yield the bracketed one"""
+        with open(path) as f:
+            value = f.read().strip()
+
+        if "[" in value:
+            return value.split("[", 1)[1].split("]", 1)[0]
+
+        return value
+
+    def write(self, path, value):
+        with open(path, "w") as f:
+            f.write(value)
+
+    def relative(self, path):
+        return "/" + os.path.relpath(path, self.root)
+
+    # -----------------------------
+    # Snapshot
+    # -----------------------------
+    def load_snapshot(self):
+        try:
+            with open(self.snapshot_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_snapshot(self, snapshot):
+        os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}"
+
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, indent=2, sort_keys=True)
+
+        os.replace(tmp_path, self.snapshot_path)
+
+    # -----------------------------
+    # Plan (dry run)
+    # -----------------------------
+    def changes(self):
+        """(name, path, current, wanted) for every setting that differs from the profile"""
+        changes = []
+
+        for name, pattern, value in self.PROFILE:
+            if name in self.skip:
+                continue
+
+            for path in self.paths(pattern):
+                try:
+                    current = self.read(path)
+                except OSError:
+                    continue
+
+                if current != value:
+                    changes.append((name, path, current, value))
+
+        return changes
+
+    def plan(self):
+        """Steps apply() would run on this node; nothing is executed"""
+        if not self.enabled:
+            return []
+
+        names = sorted({name for name, _, _, _ in self.changes()})
+        return [("apply", ", ".join(names) if names else "already tuned")]
+
+    # -----------------------------
+    # Apply
+    # -----------------------------
+    def apply(self):
+        print("==== Applying Node Tuning Profile ====")
+
+        if not self.enabled:
+            print("Node tuning disabled (HPC_TUNING=0).")
+            return
+
+        for name, pattern, value in self.PROFILE:
+            if name not in self.skip and not self.paths(pattern):
+                print(f"⚠ {name}: not available on this node. Skipping.")
+
+        snapshot = self.load_snapshot()
+        changed = 0
+
+        for name, path, current, value in self.changes():
+            key = self.relative(path)
+
+            # Keep the value from before the first apply, not from a previous run
+            snapshot.setdefault(key, current)
+
+            try:
+                self.write(path, value)
+            except OSError as error:
+                print(f"⚠ {name}: cannot set {key} ({error.strerror}). Skipping.")
+                if snapshot[key] == current:
+                    del snapshot[key]
+                continue
+
+            print(f"✔ {name}: {current} -> {value} ({key})")
+            changed += 1
+
+        if snapshot:
+            self.save_snapshot(snapshot)
+
+        if changed:
+            print(f"✔ Tuned {changed} setting(s); previous values in {self.snapshot_path}")
+        else:
+            print("✔ Node already matches the tuning profile.")
+
+    # -----------------------------
+    # Revert
+    # -----------------------------
+    def revert(self):
+        print("==== Reverting Node Tuning Profile ====")
+
+        snapshot = self.load_snapshot()
+
+        if not snapshot:
+            print("No tuning snapshot found. Skipping.")
+            return
+
+        remaining = {}
+
+        for key, value in sorted(snapshot.items()):
+            path = os.path.join(self.root, key.lstrip("/"))
+
+            if not os.path.exists(path):
+                continue
+
+            try:
+                self.write(path, value)
+                print(f"✔ Restored {key} = {value}")
+            except OSError as error:
+                print(f"✖ Could not restore {key} ({error.strerror})")
+                remaining[key] = value
+
+        if remaining:
+            # Keep what failed so a later revert can finish the job
+            self.save_snapshot(remaining)
+        else:
+            os.remove(self.snapshot_path)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    root = "/"
+
+    if "--root" in args:
+        index = args.index("--root")
+        root = args[index + 1]
+        del args[index:index + 2]
+
+    tuner = NodeTuner(root)
+
+    if args == ["--revert"]:
+        tuner.revert()
+    else:
+        tuner.apply()